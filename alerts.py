@@ -0,0 +1,187 @@
+"""
+Background alert dispatcher: notifications are queued by the automation loop
+and delivered by a worker thread, so a slow sink (e.g. a sound clip that
+blocks until it finishes) never stalls scraping or commenting.
+
+Alerts arriving within coalesce_seconds of each other are delivered together
+as one batch, so a burst of matches produces one alert. A sink is any
+callable taking that batch (a list of event dicts); SoundSink,
+DesktopNotificationSink, FileSink and WebhookSink are provided.
+"""
+import json
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def summarize(events):
+    """Short human-readable text for a batch of alert events."""
+    first = events[0]
+    text = first.get("message") or f"Commented on {first.get('url_type', '')} post {first.get('post_id', '')}".strip()
+    if len(events) > 1:
+        text += f" (+{len(events) - 1} more)"
+    return text
+
+
+class AlertDispatcher:
+    """
+    Delivers alerts to sinks from a daemon thread.
+
+    notify() never blocks: when max_queue alerts are already waiting, the new
+    one is dropped (and counted in `dropped`). After the first alert of a
+    burst arrives, the worker waits coalesce_seconds for more before
+    delivering them all as one batch. A failing sink is logged and does not
+    affect the other sinks.
+    """
+
+    def __init__(self, sinks, max_queue=100, coalesce_seconds=3.0):
+        self.sinks = list(sinks)
+        self.coalesce_seconds = coalesce_seconds
+        self.delivered_batches = 0
+        self.delivered_events = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def notify(self, event):
+        """Queues an alert (a dict; "message" overrides the default text). Returns False if it was dropped."""
+        event = dict(event)
+        event.setdefault("ts", time.time())
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Alert queue is full; dropped alert: %s", summarize([event]))
+            return False
+
+    def stop(self, timeout=10):
+        """Delivers whatever is still queued, then stops the worker (waits up to timeout seconds)."""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout) # The worker is draining, so room frees up
+        except queue.Full:
+            logger.warning("Alert dispatcher did not drain its queue; %d alert(s) left undelivered.", self._queue.qsize())
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            if event is _STOP:
+                return
+            batch = [event]
+            stopping = False
+            deadline = time.monotonic() + self.coalesce_seconds
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    event = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if event is _STOP:
+                    stopping = True
+                    break
+                batch.append(event)
+            self._deliver(batch)
+            if stopping:
+                return
+
+    def _deliver(self, batch):
+        for sink in self.sinks:
+            try:
+                sink(batch)
+            except Exception as e:
+                logger.warning("Alert sink %s failed: %s", getattr(sink, "name", sink), e)
+        self.delivered_batches += 1
+        self.delivered_events += len(batch)
+
+
+class SoundSink:
+    """Plays one sound per batch through play(sound_file_path), e.g. playsound."""
+
+    name = "sound"
+
+    def __init__(self, play, sound_file_path):
+        self.play = play
+        self.sound_file_path = sound_file_path
+
+    def __call__(self, events):
+        self.play(self.sound_file_path)
+
+
+class DesktopNotificationSink:
+    """Shows a desktop notification (notify-send on Linux, osascript on macOS) per batch."""
+
+    name = "desktop"
+
+    def __init__(self, title="Naver Cafe automation"):
+        self.title = title
+        if sys.platform == "darwin":
+            self.command = "osascript" if shutil.which("osascript") else None
+        else:
+            self.command = "notify-send" if shutil.which("notify-send") else None
+        if self.command is None:
+            logger.info("No desktop notification command found; desktop alerts will be skipped.")
+
+    def __call__(self, events):
+        if self.command is None:
+            return
+        text = summarize(events)
+        if self.command == "osascript":
+            args = ["osascript", "-e", f"display notification {json.dumps(text)} with title {json.dumps(self.title)}"]
+        else:
+            args = ["notify-send", self.title, text]
+        subprocess.run(args, check=False, timeout=10, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class FileSink:
+    """Appends each batch as one JSON line ({"ts", "count", "summary", "events"}) to path."""
+
+    name = "file"
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, events):
+        record = {"ts": time.time(), "count": len(events), "summary": summarize(events), "events": events}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+
+class WebhookSink:
+    """POSTs each batch as JSON ({"count", "summary", "events"}) to url."""
+
+    name = "webhook"
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, events):
+        import urllib.request # Imported on first use: pulls in http.client and ssl
+
+        body = json.dumps({"count": len(events), "summary": summarize(events), "events": events},
+                          ensure_ascii=False, default=str).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
@@ -0,0 +1,285 @@
+"""
+Micro-benchmarks for the post analysis in post_analyzer.py (also used by
+naver_cafe_automator.py), run over a seeded synthetic corpus (post_corpus.py).
+
+For every benchmark it reports ops/sec, p50/p99 latency per post and peak
+memory allocated during a pass. Campsite-dependent checks are run for each
+requested campsite DB size. Results can be saved as a baseline and later
+compared against it; the run fails (exit code 1) when any benchmark's
+throughput (best of --repeat passes) drops by more than --max-regression;
+benchmarks over the limit are run a second time first, and only fail the
+run if they are still over it (a busy machine can slow a single run down).
+Each report also records the speed of a fixed calibration loop, and
+throughput is compared relative to it, so a run on a machine that is
+slower as a whole (CPU frequency, a noisy neighbour) is not a regression.
+Runs over fewer than MIN_GATE_POSTS posts or MIN_GATE_REPEAT passes are
+too noisy to gate on: regressions are then reported but do not fail the run.
+
+Usage:
+    python analyzer_benchmark.py [--posts 2000] [--match-ratio 0.1] [--db-sizes 10,1000,10000]
+                                 [--repeat 5] [--seed 1234] [--json-out FILE]
+                                 [--save-baseline FILE] [--baseline FILE] [--max-regression 0.15]
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import post_analyzer
+import post_corpus
+from campsite_index import get_campsite_index, invalidate_campsite_index
+from geo import get_spatial_index, invalidate_spatial_index
+from text_normalizer import normalize_text
+
+# Suwon target used by the automator's example configuration
+TARGET_LAT = 37.291938
+TARGET_LON = 126.990794
+MAX_DISTANCE_KM = 150
+
+# Smallest run whose throughput is stable enough for the regression gate to fail on
+MIN_GATE_POSTS = 1000
+MIN_GATE_REPEAT = 3
+# A timed pass goes over the corpus as many times as needed to last at least this long
+MIN_PASS_SECONDS = 0.2
+CALIBRATION_LOOP = 200_000  # Iterations of the machine-speed calibration loop
+
+
+def benchmark_definitions():
+    """
+    Returns [(name, needs_db, make_check), ...]; make_check(campsite_db)
+    returns a callable taking the post text.
+    """
+    definitions = [
+        ("text_normalizer.normalize_text", False, lambda db: normalize_text),
+        ("post_analyzer.check_dates", False, lambda db: post_analyzer.check_dates),
+        ("post_analyzer.check_keyword", False, lambda db: post_analyzer.check_keyword),
+        ("post_analyzer.check_location", True,
+         lambda db: lambda text: post_analyzer.check_location(text, TARGET_LAT, TARGET_LON, db, MAX_DISTANCE_KM)),
+        ("post_analyzer.check_feed_region", True,
+         lambda db: lambda text: post_analyzer.check_feed_region(text, db)),
+        ("post_analyzer.analyze_post", True,
+         lambda db: lambda text: post_analyzer.analyze_post(text, TARGET_LAT, TARGET_LON, db, MAX_DISTANCE_KM)),
+        ("post_analyzer.analyze_post[feed]", True,
+         lambda db: lambda text: post_analyzer.analyze_post(text, TARGET_LAT, TARGET_LON, db, MAX_DISTANCE_KM, url_type="feed")),
+        ("post_analyzer.analyze_post[board]", False,
+         lambda db: lambda text: post_analyzer.analyze_post(text, TARGET_LAT, TARGET_LON, db, MAX_DISTANCE_KM, url_type="board")),
+    ]
+    return definitions
+
+
+def _calibration_pass():
+    total = 0
+    for i in range(CALIBRATION_LOOP):
+        total += i * i % 7
+    return total
+
+
+def calibrate(repeat=5):
+    """Speed of this machine right now: best-of-repeat passes per second of a fixed pure-Python loop."""
+    best = math.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _calibration_pass()
+        best = min(best, time.perf_counter() - started)
+    return 1.0 / best
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_benchmark(check, posts, repeat):
+    """
+    Times `repeat` passes of check over posts (after one warm-up pass, which
+    also sets how many times a pass goes over posts to last MIN_PASS_SECONDS)
+    and measures peak traced memory over one more pass.
+    Returns a dict with ops_per_sec (best pass: the least disturbed by the
+    rest of the machine), median_ops_per_sec, p50_us, p99_us and peak_kib.
+    """
+    warmup_started = time.perf_counter()
+    for text in posts:
+        check(text)
+    loops = max(1, math.ceil(MIN_PASS_SECONDS / max(time.perf_counter() - warmup_started, 1e-9)))
+
+    pass_rates = []
+    samples = []
+    for _ in range(repeat):
+        pass_started = time.perf_counter()
+        for _ in range(loops):
+            for text in posts:
+                started = time.perf_counter_ns()
+                check(text)
+                samples.append(time.perf_counter_ns() - started)
+        pass_rates.append(len(posts) * loops / (time.perf_counter() - pass_started))
+
+    tracemalloc.start()
+    for text in posts:
+        check(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    samples.sort()
+    return {
+        "ops_per_sec": max(pass_rates),
+        "median_ops_per_sec": statistics.median(pass_rates),
+        "p50_us": _percentile(samples, 0.50) / 1000,
+        "p99_us": _percentile(samples, 0.99) / 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def _build_indexes(campsite_db):
+    invalidate_campsite_index()
+    invalidate_spatial_index()
+    get_campsite_index(campsite_db)
+    get_spatial_index(campsite_db, [(TARGET_LAT, TARGET_LON)])
+
+
+def measure_index_build(campsite_db, repeat=5):
+    """
+    Time and memory to build the campsite name index and the spatial index
+    for campsite_db. One untimed build comes first (it pays for one-off work
+    such as importing numpy); build_ms is the median of `repeat` timed builds.
+    """
+    _build_indexes(campsite_db)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _build_indexes(campsite_db)
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    _build_indexes(campsite_db)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"build_ms": statistics.median(timings) * 1000, "best_ms": min(timings) * 1000, "peak_kib": peak / 1024}
+
+
+def run_suite(post_count=2000, match_ratio=0.1, db_sizes=(10, 1000, 10000), repeat=5, seed=1234, only=None):
+    """
+    Runs every benchmark (or only the ones named in `only`, without the index
+    builds) and returns {"config": ..., "results": {name: stats}, "index_builds": {...}}.
+    """
+    results = {}
+    index_builds = {}
+    definitions = benchmark_definitions()
+    calibration = calibrate()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        # DB-independent checks run once, on a corpus built against the smallest DB
+        smallest_db = post_corpus.generate_campsite_db(min(db_sizes), seed)
+        posts = post_corpus.generate_posts(post_count, match_ratio, seed, smallest_db)
+        for name, needs_db, make_check in definitions:
+            if not needs_db and (only is None or name in only):
+                results[name] = run_benchmark(make_check(smallest_db), posts, repeat)
+
+        for size in db_sizes:
+            sized_names = {f"{name}@db={size}" for name, needs_db, _ in definitions if needs_db}
+            if only is not None and not sized_names & set(only):
+                continue
+            campsite_db = post_corpus.generate_campsite_db(size, seed)
+            posts = post_corpus.generate_posts(post_count, match_ratio, seed, campsite_db)
+            if only is None:
+                index_builds[f"db={size}"] = measure_index_build(campsite_db, repeat)
+            for name, needs_db, make_check in definitions:
+                if needs_db and (only is None or f"{name}@db={size}" in only):
+                    results[f"{name}@db={size}"] = run_benchmark(make_check(campsite_db), posts, repeat)
+
+    return {
+        "config": {"posts": post_count, "match_ratio": match_ratio, "db_sizes": list(db_sizes),
+                   "repeat": repeat, "seed": seed, "python": sys.version.split()[0]},
+        # Mean of the machine speed before and after, as it can drift during a run
+        "calibration": (calibration + calibrate()) / 2,
+        "results": results,
+        "index_builds": index_builds,
+    }
+
+
+def find_regressions(report, baseline, max_regression):
+    """
+    Returns [(name, baseline_ops, current_ops), ...] for benchmarks slower
+    than allowed. When both reports carry a calibration, current_ops is
+    scaled to the baseline machine's speed.
+    """
+    speedup = 1.0
+    if report.get("calibration") and baseline.get("calibration"):
+        speedup = baseline["calibration"] / report["calibration"]
+    regressions = []
+    for name, stats in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        current_ops = stats["ops_per_sec"] * speedup
+        if base and current_ops < base["ops_per_sec"] * (1 - max_regression):
+            regressions.append((name, base["ops_per_sec"], current_ops))
+    return regressions
+
+
+def gate_is_reliable(report):
+    """True if the run is large enough for a throughput regression to fail it (see MIN_GATE_POSTS)."""
+    return report["config"]["posts"] >= MIN_GATE_POSTS and report["config"]["repeat"] >= MIN_GATE_REPEAT
+
+
+def print_report(report):
+    print(f"\n=== Analyzer benchmark ({report['config']['posts']} posts, "
+          f"match ratio {report['config']['match_ratio']}, seed {report['config']['seed']}) ===")
+    print(f"{'benchmark':<48}{'ops/sec':>12}{'p50 us':>10}{'p99 us':>10}{'peak KiB':>10}")
+    for name, stats in report["results"].items():
+        print(f"{name:<48}{stats['ops_per_sec']:>12.0f}{stats['p50_us']:>10.1f}"
+              f"{stats['p99_us']:>10.1f}{stats['peak_kib']:>10.1f}")
+    print(f"\n{'index build':<48}{'median ms':>12}{'best ms':>10}{'peak KiB':>10}")
+    for name, stats in report["index_builds"].items():
+        print(f"{name:<48}{stats['build_ms']:>12.1f}{stats['best_ms']:>10.1f}{stats['peak_kib']:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the post analyzers on a synthetic corpus.")
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--match-ratio", type=float, default=0.1)
+    parser.add_argument("--db-sizes", default="10,1000,10000", help="Comma-separated campsite DB sizes (up to 100000)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--json-out", help="Write the report as JSON to this file")
+    parser.add_argument("--save-baseline", help="Write the report to this file for later comparison")
+    parser.add_argument("--baseline", help="Compare against a report saved with --save-baseline")
+    parser.add_argument("--max-regression", type=float, default=0.15,
+                        help="Allowed fractional ops/sec drop versus the baseline (default 0.15)")
+    args = parser.parse_args()
+
+    db_sizes = [int(size) for size in args.db_sizes.split(",")]
+    suite_report = run_suite(args.posts, args.match_ratio, db_sizes, args.repeat, args.seed)
+    print_report(suite_report)
+
+    for path in (args.json_out, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(suite_report, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline_report = json.load(f)
+        baseline_corpus = {key: baseline_report.get("config", {}).get(key) for key in ("posts", "match_ratio", "seed")}
+        if any(value != suite_report["config"][key] for key, value in baseline_corpus.items()):
+            print(f"\nWARNING: {args.baseline} was measured on a different corpus "
+                  f"({', '.join(f'{key}={value}' for key, value in baseline_corpus.items())}).")
+        regressions = find_regressions(suite_report, baseline_report, args.max_regression)
+        if regressions:
+            # Confirm with a second run of the regressed benchmarks, keeping each one's better result
+            rerun = run_suite(args.posts, args.match_ratio, db_sizes, args.repeat, args.seed,
+                              only={name for name, _, _ in regressions})
+            for name, stats in rerun["results"].items():
+                if stats["ops_per_sec"] > suite_report["results"][name]["ops_per_sec"]:
+                    suite_report["results"][name] = stats
+            regressions = find_regressions(suite_report, baseline_report, args.max_regression)
+        if regressions:
+            reliable = gate_is_reliable(suite_report)
+            print(f"\n{'FAILED' if reliable else 'WARNING'}: {len(regressions)} benchmark(s) regressed by more than "
+                  f"{args.max_regression:.0%}:")
+            for name, base_ops, current_ops in regressions:
+                print(f"  {name}: {base_ops:.0f} -> {current_ops:.0f} ops/sec")
+            if reliable:
+                sys.exit(1)
+            print(f"Not failing: runs under {MIN_GATE_POSTS} posts or {MIN_GATE_REPEAT} repeats are too noisy to gate on.")
+        else:
+            print(f"\nNo throughput regressions beyond {args.max_regression:.0%} versus {args.baseline}.")
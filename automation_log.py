@@ -0,0 +1,67 @@
+"""
+Logging setup for the automator: a leveled console handler plus an optional
+JSON-lines file sink for machine-readable records.
+
+Modules log through the standard library (`logging.getLogger(__name__)`) with
+%-style arguments, so messages below the configured level are never formatted.
+Structured data goes in `extra={"fields": {...}}`; the JSON sink writes those
+fields as top-level keys next to the timestamp, level, logger and message.
+"""
+import json
+import logging
+import os
+import sys
+import time
+
+CONSOLE_FORMAT = "%(asctime)s %(levelname)-7s %(message)s"
+CONSOLE_DATE_FORMAT = "%H:%M:%S"
+
+_installed_handlers = []
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level="INFO", json_path=None, console=True):
+    """
+    Installs the console handler (stdout) and, if json_path is given, a
+    JSON-lines file handler on the root logger. level is a name such as
+    "DEBUG", "INFO" or "WARNING". Calling it again replaces the handlers
+    installed by the previous call.
+    """
+    root = logging.getLogger()
+    for handler in _installed_handlers:
+        root.removeHandler(handler)
+        handler.close()
+    _installed_handlers.clear()
+
+    if console:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT, CONSOLE_DATE_FORMAT))
+        _installed_handlers.append(console_handler)
+    if json_path:
+        directory = os.path.dirname(json_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        json_handler = logging.FileHandler(json_path, encoding="utf-8")
+        json_handler.setFormatter(JsonLinesFormatter())
+        _installed_handlers.append(json_handler)
+
+    for handler in _installed_handlers:
+        root.addHandler(handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
@@ -0,0 +1,93 @@
+import time
+
+# Until a rule has been measured, assume it costs this many seconds per post.
+DEFAULT_RULE_COST_SECONDS = 1e-5
+
+
+class RuleStats:
+    """Counters for one analysis rule: posts evaluated, posts rejected and time spent."""
+
+    def __init__(self, name):
+        self.name = name
+        self.evaluated = 0
+        self.rejected = 0
+        self.seconds = 0.0
+
+    def rejection_rate(self):
+        # Laplace-smoothed so an unmeasured rule starts at 0.5.
+        return (self.rejected + 1) / (self.evaluated + 2)
+
+    def mean_cost(self):
+        if not self.evaluated:
+            return DEFAULT_RULE_COST_SECONDS
+        return self.seconds / self.evaluated
+
+    def rank(self):
+        """Expected cost per rejection; rules with the lowest rank should run first."""
+        return self.mean_cost() / self.rejection_rate()
+
+    def __repr__(self):
+        return (f"RuleStats({self.name!r}, evaluated={self.evaluated}, rejected={self.rejected}, "
+                f"seconds={self.seconds:.6f})")
+
+
+def post_text_of(post):
+    """Accepts either a scraped post dict ({"text", "link", "id"}) or the post text itself."""
+    return post["text"] if isinstance(post, dict) else post
+
+
+def run_rule_chain(posts, rules, rule_stats=None, rejected_by=None, prepare=None):
+    """
+    Evaluates a chain of rules over a batch of posts, stopping at the first
+    rule that rejects each post.
+
+    rules is a list of (name, predicate) pairs, where predicate(post_text)
+    returns True when the post passes. If prepare is given, each post text
+    is passed through it once and every predicate receives the result (e.g.
+    a normalized view of the post) instead. Before each post the rules are
+    ordered by measured cost per rejection, so cheap, selective rules run
+    first; the given order only breaks ties before anything has been
+    measured.
+
+    rule_stats maps rule name -> RuleStats and is updated in place; pass the
+    same dict across calls to keep the learned ordering.
+    If rejected_by is a list, the name of the rule that rejected each post
+    (None for posts that passed) is appended to it, in post order.
+    Returns (results, rule_stats), where results[i] is True if posts[i]
+    passed every rule.
+    """
+    if rule_stats is None:
+        rule_stats = {}
+    for name, _ in rules:
+        rule_stats.setdefault(name, RuleStats(name))
+
+    results = []
+    for post in posts:
+        post_text = post_text_of(post)
+        if prepare is not None:
+            post_text = prepare(post_text)
+        rejecting_rule = None
+        ordered_rules = sorted(rules, key=lambda rule: rule_stats[rule[0]].rank())
+        for name, predicate in ordered_rules:
+            stats = rule_stats[name]
+            started = time.perf_counter()
+            ok = predicate(post_text)
+            stats.seconds += time.perf_counter() - started
+            stats.evaluated += 1
+            if not ok:
+                stats.rejected += 1
+                rejecting_rule = name
+                break
+        results.append(rejecting_rule is None)
+        if rejected_by is not None:
+            rejected_by.append(rejecting_rule)
+    return results, rule_stats
+
+
+def format_rule_stats(rule_stats):
+    """One-line summary of rule counters, e.g. for the end of an automation cycle."""
+    parts = []
+    for stats in sorted(rule_stats.values(), key=RuleStats.rank):
+        parts.append(f"{stats.name}: {stats.rejected}/{stats.evaluated} rejected, "
+                     f"{stats.seconds * 1000:.2f} ms")
+    return "; ".join(parts) if parts else "no rules evaluated"
@@ -0,0 +1,346 @@
+import math
+import re
+from bisect import bisect_right
+from collections import deque, namedtuple
+from difflib import SequenceMatcher
+
+from campsite_store import CampsiteStore
+from text_normalizer import normalize_text
+
+# One campsite mention found in a post: the CAMPSITE_DB key and its [start, end) offsets.
+CampsiteMatch = namedtuple("CampsiteMatch", ["name", "start", "end"])
+
+# Fuzzy matching: minimum similarity (difflib ratio of the space-free spellings) for a mention.
+DEFAULT_FUZZY_THRESHOLD = 0.8
+# Posts are compared in windows of up to this many consecutive words (names may be split by spaces).
+FUZZY_MAX_WINDOW_WORDS = 3
+# A candidate must share at least this fraction of a spelling's distinctive bigrams.
+FUZZY_MIN_SHARED_GRAMS = 0.5
+# Bigrams found in more than this fraction of spellings (e.g. "캠핑", "핑장") are too common to select
+# candidates and are not looked up (only when the index holds more than FUZZY_COMMON_GRAM_MIN_SPELLINGS).
+FUZZY_COMMON_GRAM_FRACTION = 0.05
+FUZZY_COMMON_GRAM_MIN_SPELLINGS = 50
+# Generic endings shared by many campsite names. Fuzzy scores also require the rest of the name (its
+# stem) to be similar on its own, so "별빛캠핑장" is not taken for "달빛캠핑장". A fixed list, since a
+# small database has no bigram frequent enough to be marked common. Longest first.
+GENERIC_SUFFIXES = ("오토캠핑리조트", "자연휴양림", "오토캠핑장", "캠핑리조트", "글램핑장", "카라반",
+                    "캠핑장", "휴양림", "야영장", "글램핑", "리조트", "캠핑", "캠프")
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _compact(text):
+    """Spelling used for fuzzy comparison: no spaces."""
+    return text.replace(" ", "")
+
+
+def _bigrams(text):
+    return {text[i:i + 2] for i in range(len(text) - 1)} if len(text) > 1 else {text}
+
+
+def _split_generic_suffix(text):
+    """(stem, generic suffix) of a space-free spelling; the suffix is "" if it has none of GENERIC_SUFFIXES."""
+    for suffix in GENERIC_SUFFIXES:
+        if text.endswith(suffix):
+            return text[:-len(suffix)], suffix
+    return text, ""
+
+
+def _group_by_first_char(grams):
+    groups = {}
+    for gram in grams:
+        groups.setdefault(gram[0], []).append(gram)
+    return sorted(groups.items())
+
+
+class CampsiteIndex:
+    """
+    Aho-Corasick automaton over campsite names.
+    Built once per campsite database; find_all() then reports every mentioned
+    campsite in a single pass over the post text, independent of how many
+    campsites the database holds.
+
+    Besides its name, each campsite is matched under its aliases (aliases maps
+    name -> [alias, ...]) and under its name written without spaces
+    ("자라섬캠핑장" for "자라섬 캠핑장"; only at the start of a word, so that
+    "사라캠핑장" is not found inside "카사라캠핑장"); matches always report the
+    name.
+
+    If normalize is given (e.g. text_normalizer.normalize_text), the automaton
+    is built over the normalized names, for matching against normalized post
+    text; matches still report the original names.
+
+    find_fuzzy() additionally finds misspelled mentions through a bigram index
+    over the same spellings (built on first use).
+    """
+
+    def __init__(self, names, normalize=None, aliases=None):
+        self.names = [name for name in dict.fromkeys(names) if name]
+        aliases = aliases or {}
+        self._patterns = []    # (spelling, index into self.names, whether it must start a word)
+        for name_idx, name in enumerate(self.names):
+            spellings = [name] + list(aliases.get(name, ()))
+            if normalize:
+                spellings = [normalize(spelling) for spelling in spellings]
+            spellings = [spelling for spelling in dict.fromkeys(spellings) if spelling]
+            compact = [_compact(spelling) for spelling in spellings]
+            self._patterns.extend((spelling, name_idx, False) for spelling in spellings)
+            self._patterns.extend((spelling, name_idx, True) for spelling in dict.fromkeys(compact)
+                                  if spelling and spelling not in spellings)
+        self._goto = [{}]      # state -> {char: next_state}
+        self._fail = [0]       # state -> fallback state
+        self._output = [()]    # state -> indexes into self._patterns ending here
+        self._gram_index = None
+
+        for pattern_idx, (pattern, _, _) in enumerate(self._patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] += (pattern_idx,)
+
+        # Breadth-first pass to wire failure links and merge outputs.
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def __len__(self):
+        return len(self.names)
+
+    def find_all(self, text):
+        """
+        Returns a CampsiteMatch for every occurrence of every indexed name in
+        text, ordered by end offset. Overlapping names (e.g. "자라섬" and
+        "자라섬 캠핑장") are all reported; a name found under several spellings
+        at the same place is reported once per spelling.
+        """
+        goto, fail, output, names, patterns = self._goto, self._fail, self._output, self.names, self._patterns
+        matches = []
+        state = 0
+        for pos, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_idx in output[state]:
+                pattern, name_idx, word_start = patterns[pattern_idx]
+                start = pos + 1 - len(pattern)
+                if word_start and start and text[start - 1].isalnum():
+                    continue
+                matches.append(CampsiteMatch(names[name_idx], start, pos + 1))
+        return matches
+
+    def mentioned_names(self, text, fuzzy_threshold=None):
+        """
+        Returns the distinct campsite names mentioned in text, in order of first
+        appearance. With fuzzy_threshold, when no name matches exactly, the
+        fuzzy matches (see find_fuzzy) are returned instead, best first.
+        """
+        names = list(dict.fromkeys(match.name for match in self.find_all(text)))
+        if not names and fuzzy_threshold is not None:
+            names = [name for name, _ in self.find_fuzzy(text, fuzzy_threshold)]
+        return names
+
+    def _build_gram_index(self):
+        # Space-free spellings, once per campsite ("자라섬 캠핑장" and "자라섬캠핑장" are the same spelling)
+        spellings = list(dict.fromkeys((_compact(pattern), name_idx) for pattern, name_idx, _ in self._patterns))
+        grams = [_bigrams(spelling) for spelling, _ in spellings]
+        frequency = {}
+        for spelling_grams in grams:
+            for gram in spelling_grams:
+                frequency[gram] = frequency.get(gram, 0) + 1
+        common_limit = max(FUZZY_COMMON_GRAM_MIN_SPELLINGS, len(spellings) * FUZZY_COMMON_GRAM_FRACTION)
+
+        # Prefix filtering: a window sharing `required` of a spelling's distinctive bigrams shares at
+        # least one of its (count - required + 1) rarest ones, so only those are indexed.
+        postings = {}  # bigram -> [spelling index, ...]
+        distinctive, required = [], []
+        for spelling_idx, spelling_grams in enumerate(grams):
+            kept = sorted((gram for gram in spelling_grams if frequency[gram] <= common_limit),
+                          key=lambda gram: (frequency[gram], gram))
+            needed = max(1, math.ceil(len(kept) * FUZZY_MIN_SHARED_GRAMS))
+            for gram in kept[:len(kept) - needed + 1]:
+                postings.setdefault(gram, []).append(spelling_idx)
+            distinctive.append(frozenset(kept))
+            required.append(needed)
+        self._gram_index = {
+            "postings": postings,
+            "spellings": [spelling for spelling, _ in spellings],
+            "name_indexes": [name_idx for _, name_idx in spellings],
+            "lengths": [len(spelling) for spelling, _ in spellings],
+            "max_length": max((len(spelling) for spelling, _ in spellings), default=0),
+            "distinctive": distinctive,
+            "required": required,
+            "stems": [_split_generic_suffix(spelling) for spelling, _ in spellings],
+            # Finds every indexed bigram (overlapping) in one C-level scan, to skip windows without candidates
+            "gram_re": re.compile("(?=(?:" + "|".join(
+                re.escape(first) + "[" + "".join(re.escape(gram[1]) for gram in sorted(group)) + "]"
+                for first, group in _group_by_first_char(postings)) + "))") if postings else None,
+        }
+
+    def find_fuzzy(self, text, threshold=DEFAULT_FUZZY_THRESHOLD):
+        """
+        Returns [(name, score), ...] for campsites whose name or alias is
+        written approximately in text (spacing differences, a wrong or missing
+        syllable, a trailing particle), best first, with score >= threshold.
+
+        Candidates come from a bigram index over the space-free spellings:
+        only spellings sharing enough distinctive bigrams with a window of up
+        to FUZZY_MAX_WINDOW_WORDS words are scored (difflib ratio), so the
+        cost depends on the candidates, not on the size of the database.
+        For spellings ending in a generic suffix (GENERIC_SUFFIXES), the
+        score is the lower of the whole spelling's ratio and its stem's ratio
+        against the window without its (possibly misspelled) suffix; a
+        spelling that is only a generic suffix is never matched approximately.
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError(f"Fuzzy threshold must be in (0, 1], got {threshold!r}")
+        if self._gram_index is None:
+            self._build_gram_index()
+        index = self._gram_index
+        postings, spellings, lengths = index["postings"], index["spellings"], index["lengths"]
+        distinctive, required, stems = index["distinctive"], index["required"], index["stems"]
+        if index["gram_re"] is None:
+            return []
+        words = _WORD_RE.findall(text)
+        # Words touched by an indexed bigram of the space-free text; windows without one have no candidates
+        joined = "".join(words)
+        word_starts = []
+        offset = 0
+        for word in words:
+            word_starts.append(offset)
+            offset += len(word)
+        hit_words = set()
+        for match in index["gram_re"].finditer(joined):
+            hit_words.add(bisect_right(word_starts, match.start()) - 1)
+            hit_words.add(bisect_right(word_starts, match.start() + 1) - 1)
+        if not hit_words:
+            return []
+
+        # ratio() <= 2 * min(len_a, len_b) / (len_a + len_b): other lengths cannot reach threshold
+        length_factor = threshold / (2.0 - threshold)
+        max_window_length = index["max_length"] / length_factor
+        matcher = SequenceMatcher(None, autojunk=False)
+        best = {}  # name index -> score
+        for start in range(max(0, min(hit_words) - FUZZY_MAX_WINDOW_WORDS + 1), max(hit_words) + 1):
+            window = ""
+            has_hit = False
+            for end in range(start, min(start + FUZZY_MAX_WINDOW_WORDS, len(words))):
+                window += words[end]
+                if len(window) > max_window_length:
+                    break
+                has_hit = has_hit or end in hit_words
+                if not has_hit:
+                    continue
+                window_grams = _bigrams(window)
+                candidates = set()
+                for gram in window_grams:
+                    candidates.update(postings.get(gram, ()))
+                if not candidates:
+                    continue
+                min_length, max_length = len(window) * length_factor, len(window) / length_factor
+                for spelling_idx in candidates:
+                    if not min_length <= lengths[spelling_idx] <= max_length:
+                        continue
+                    if len(window_grams & distinctive[spelling_idx]) < required[spelling_idx]:
+                        continue
+                    if matcher.b != window:
+                        matcher.set_seq2(window)  # difflib indexes the window once for all its candidates
+                    matcher.set_seq1(spellings[spelling_idx])
+                    if matcher.quick_ratio() < threshold:
+                        continue
+                    score = matcher.ratio()
+                    if score < threshold:
+                        continue
+                    stem, suffix = stems[spelling_idx]
+                    if suffix:
+                        score = min(score, _stem_ratio(window, stem, suffix))
+                    name_idx = index["name_indexes"][spelling_idx]
+                    if score >= threshold and score > best.get(name_idx, 0.0):
+                        best[name_idx] = score
+        ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.names[name_idx], score) for name_idx, score in ranked]
+
+
+def _stem_ratio(window, stem, suffix):
+    """Similarity of stem to window without its generic suffix (or, if it has none, its last len(suffix) characters)."""
+    if not stem:
+        return 0.0
+    window_stem, window_suffix = _split_generic_suffix(window)
+    if not window_suffix:
+        window_stem = window[:-len(suffix)]
+    return SequenceMatcher(None, window_stem, stem, autojunk=False).ratio()
+
+
+# Cache of the index for the campsite database currently in use:
+# (database object, number of entries when built, CampsiteIndex)
+_index_cache = None
+
+
+def get_campsite_index(campsite_db):
+    """
+    Returns the CampsiteIndex for campsite_db, building it on first use.
+    Names (and the "aliases" list of each entry, if any) are indexed in
+    normalized form (see text_normalizer), so the index is meant for
+    normalized post text.
+    The index is reused as long as the same database object is passed in and
+    its size is unchanged; replacing the database or adding/removing entries
+    triggers a rebuild. Call invalidate_campsite_index() after renaming keys
+    or editing aliases in place.
+    """
+    global _index_cache
+    if _index_cache is not None:
+        cached_db, cached_size, index = _index_cache
+        if cached_db is campsite_db and cached_size == len(campsite_db):
+            return index
+    if isinstance(campsite_db, CampsiteStore):
+        aliases = campsite_db.aliases()
+    else:
+        aliases = {name: info["aliases"] for name, info in campsite_db.items() if isinstance(info, dict) and info.get("aliases")}
+    index = CampsiteIndex(campsite_db.keys(), normalize_text, aliases)
+    _index_cache = (campsite_db, len(campsite_db), index)
+    return index
+
+
+def invalidate_campsite_index():
+    """Forces the next get_campsite_index() call to rebuild the index."""
+    global _index_cache
+    _index_cache = None
+
+
+if __name__ == "__main__":
+    # Self-checks: (post text, the campsite mentioned_names() should settle on, or None)
+    index = CampsiteIndex(["자라섬 캠핑장", "달빛캠핑장", "난지캠핑장", "유명산 자연휴양림", "해피캠핑장"], normalize_text)
+    cases = [
+        ("자라섬 캠핑장 양도합니다", "자라섬 캠핑장"),
+        ("자라섬 캠핑징 양도합니다", "자라섬 캠핑장"),    # Typo in the suffix
+        ("자라섬 오토캠핑장 양도", "자라섬 캠핑장"),      # A different generic suffix
+        ("난지캠핑징 주말 양도", "난지캠핑장"),
+        ("유명산 휴양림 자리 양도", "유명산 자연휴양림"),
+        ("달빛캠핑 양도합니다", "달빛캠핑장"),
+        ("해피 캠핑 양도", "해피캠핑장"),
+        ("별빛캠핑장 양도합니다", None),                  # Only the generic suffix is shared
+        ("달빛 좋은 캠핑장 양도", None),
+        ("근처 캠핑장 아무데나", None),
+    ]
+    failures = 0
+    for text, expected in cases:
+        names = index.mentioned_names(normalize_text(text), DEFAULT_FUZZY_THRESHOLD)
+        result = names[0] if names else None
+        print(f"{'ok  ' if result == expected else 'FAIL'} {text!r}: {result} (expected {expected})")
+        failures += result != expected
+    print(f"{len(cases) - failures}/{len(cases)} campsite match checks passed.")
+    raise SystemExit(1 if failures else 0)
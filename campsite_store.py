@@ -0,0 +1,275 @@
+"""
+Campsite database loaded from a data file into a compact, array-backed store.
+
+A CampsiteStore holds one entry per campsite in parallel arrays (latitude and
+longitude as float64, an interned region id as int32) plus a name -> index
+map, instead of one dict per campsite. It is a read-only mapping with the
+same interface as the CAMPSITE_DB dict ({name: {"lat", "lon", "region",
+"aliases"}}), so it can be passed anywhere a campsite_db is expected.
+
+load_campsite_store() reads CSV, JSON or SQLite files and keeps a binary
+snapshot next to the source file; later loads read the snapshot (a few bulk
+copies) as long as the source file is unchanged.
+
+Source formats (aliases are optional; in CSV and SQLite they are separated by "|"):
+- CSV with a header row: name,lat,lon,region,aliases
+- JSON: a CAMPSITE_DB-style object {name: {"lat", "lon", "region", "aliases"}},
+  or a list of objects with a "name" key
+- SQLite (.sqlite, .sqlite3, .db): a `campsites` table with the CSV columns
+"""
+import csv
+import json
+import logging
+import os
+import sqlite3
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SUFFIX = ".snapshot"  # Snapshot file written next to the source file
+SQLITE_TABLE = "campsites"
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+ALIAS_SEPARATOR = "|"
+NO_REGION = -1  # Region id of campsites without a region
+
+_SNAPSHOT_MAGIC = b"CAMPSTO1"
+# magic, byte order, entry count, source file size, source file mtime (ns), then 6 section lengths
+_SNAPSHOT_HEADER = struct.Struct("<8sc3xIqq6Q")
+
+
+class CampsiteStore(Mapping):
+    """
+    names[i] has coordinates lats[i], lons[i] and region regions[region_ids[i]]
+    (NO_REGION if it has none). positions maps each name to its index.
+    Mapping access (store[name], .items(), ...) builds the entry dict on
+    demand; region_of() and coordinates() avoid that for hot paths.
+    """
+
+    def __init__(self, names, lats, lons, region_ids, regions, aliases=None):
+        self.names = list(names)
+        self.positions = {name: idx for idx, name in enumerate(self.names)}
+        self.lats = lats if isinstance(lats, array) else array("d", lats)
+        self.lons = lons if isinstance(lons, array) else array("d", lons)
+        self.region_ids = region_ids if isinstance(region_ids, array) else array("i", region_ids)
+        self.regions = list(regions)
+        self._aliases = dict(aliases or {})  # index -> tuple of aliases (only campsites that have some)
+        if len(self.positions) != len(self.names):
+            raise ValueError("Campsite names must be unique")
+        if not len(self.names) == len(self.lats) == len(self.lons) == len(self.region_ids):
+            raise ValueError("Campsite arrays must all have one entry per name")
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Builds a store from (name, lat, lon, region, aliases) tuples; region
+        may be None and aliases empty. A repeated name keeps its first
+        position and its last values, like dict assignment.
+        """
+        names, positions = [], {}
+        lats, lons, region_ids = array("d"), array("d"), array("i")
+        regions, region_index = [], {}
+        aliases = {}
+        for name, lat, lon, region, name_aliases in records:
+            if region:
+                region_id = region_index.get(region)
+                if region_id is None:
+                    region_id = region_index[region] = len(regions)
+                    regions.append(region)
+            else:
+                region_id = NO_REGION
+            idx = positions.get(name)
+            if idx is None:
+                idx = positions[name] = len(names)
+                names.append(name)
+                lats.append(float(lat))
+                lons.append(float(lon))
+                region_ids.append(region_id)
+            else:
+                lats[idx], lons[idx], region_ids[idx] = float(lat), float(lon), region_id
+            if name_aliases:
+                aliases[idx] = tuple(name_aliases)
+            else:
+                aliases.pop(idx, None)
+        return cls(names, lats, lons, region_ids, regions, aliases)
+
+    @classmethod
+    def from_dict(cls, campsite_db):
+        """Builds a store from a CAMPSITE_DB-style dict."""
+        return cls.from_records((name, info["lat"], info["lon"], info.get("region"), info.get("aliases"))
+                                for name, info in campsite_db.items())
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __contains__(self, name):
+        return name in self.positions
+
+    def __getitem__(self, name):
+        idx = self.positions[name]
+        entry = {"lat": self.lats[idx], "lon": self.lons[idx]}
+        if self.region_ids[idx] != NO_REGION:
+            entry["region"] = self.regions[self.region_ids[idx]]
+        if idx in self._aliases:
+            entry["aliases"] = list(self._aliases[idx])
+        return entry
+
+    def region_of(self, name):
+        """Region of the campsite, or None (also for unknown names)."""
+        idx = self.positions.get(name)
+        if idx is None or self.region_ids[idx] == NO_REGION:
+            return None
+        return self.regions[self.region_ids[idx]]
+
+    def coordinates(self, name):
+        """(lat, lon) of the campsite; KeyError for unknown names."""
+        idx = self.positions[name]
+        return self.lats[idx], self.lons[idx]
+
+    def aliases(self):
+        """{name: [alias, ...]} for the campsites that have aliases."""
+        return {self.names[idx]: list(name_aliases) for idx, name_aliases in self._aliases.items()}
+
+    def __repr__(self):
+        return f"CampsiteStore({len(self.names)} campsites, {len(self.regions)} regions)"
+
+    # --- Binary snapshot ---
+
+    def write_snapshot(self, path, source_size=0, source_mtime_ns=0):
+        """
+        Writes the store to path (atomically, through a temporary file).
+        source_size/source_mtime_ns identify the source file the snapshot
+        was built from (see read_snapshot).
+        """
+        sections = [
+            self.lats.tobytes(),
+            self.lons.tobytes(),
+            self.region_ids.tobytes(),
+            "\0".join(self.names).encode("utf-8"),
+            "\0".join(self.regions).encode("utf-8"),
+            json.dumps({str(idx): name_aliases for idx, name_aliases in self._aliases.items()},
+                       ensure_ascii=False).encode("utf-8"),
+        ]
+        header = _SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, sys.byteorder[0].encode(), len(self.names),
+                                       source_size, source_mtime_ns, *(len(section) for section in sections))
+        temp_path = f"{path}.tmp{os.getpid()}"
+        with open(temp_path, "wb") as snapshot_file:
+            snapshot_file.write(header)
+            for section in sections:
+                snapshot_file.write(section)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def read_snapshot(cls, path, source_size=None, source_mtime_ns=None):
+        """
+        Loads a store written by write_snapshot. Returns None if the file is
+        not a snapshot in this format and byte order, or was built from a
+        source file of another size or modification time (when given).
+        """
+        with open(path, "rb") as snapshot_file:
+            data = snapshot_file.read()
+        if len(data) < _SNAPSHOT_HEADER.size:
+            return None
+        magic, byte_order, count, size, mtime_ns, *lengths = _SNAPSHOT_HEADER.unpack_from(data)
+        if magic != _SNAPSHOT_MAGIC or byte_order != sys.byteorder[0].encode():
+            return None
+        if (source_size is not None and size != source_size) or \
+                (source_mtime_ns is not None and mtime_ns != source_mtime_ns):
+            return None
+        if _SNAPSHOT_HEADER.size + sum(lengths) != len(data):
+            return None
+        view = memoryview(data)
+        sections, offset = [], _SNAPSHOT_HEADER.size
+        for length in lengths:
+            sections.append(view[offset:offset + length])
+            offset += length
+        lats, lons, region_ids = array("d"), array("d"), array("i")
+        lats.frombytes(sections[0])
+        lons.frombytes(sections[1])
+        region_ids.frombytes(sections[2])
+        names = str(sections[3], "utf-8").split("\0") if count else []
+        regions = str(sections[4], "utf-8").split("\0") if len(sections[4]) else []
+        aliases = {int(idx): tuple(name_aliases) for idx, name_aliases in json.loads(str(sections[5], "utf-8")).items()}
+        if len(names) != count:
+            return None
+        return cls(names, lats, lons, region_ids, regions, aliases)
+
+
+def _split_aliases(value):
+    if not value:
+        return ()
+    if isinstance(value, (list, tuple)):
+        return tuple(alias for alias in value if alias)
+    return tuple(alias.strip() for alias in str(value).split(ALIAS_SEPARATOR) if alias.strip())
+
+
+def _record(row, source):
+    """(name, lat, lon, region, aliases) from a row dict; ValueError naming source for bad rows."""
+    name = (row.get("name") or "").strip()
+    try:
+        if not name:
+            raise ValueError("missing name")
+        return (name, float(row["lat"]), float(row["lon"]), (row.get("region") or "").strip() or None,
+                _split_aliases(row.get("aliases")))
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid campsite entry {name or row!r} in {source}: {e}") from None
+
+
+def read_campsite_records(path):
+    """Yields (name, lat, lon, region, aliases) for every campsite in a CSV, JSON or SQLite file."""
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as csv_file:
+            for row in csv.DictReader(csv_file):
+                yield _record(row, path)
+    elif suffix == ".json":
+        with open(path, encoding="utf-8") as json_file:
+            data = json.load(json_file)
+        rows = [dict(info, name=name) for name, info in data.items()] if isinstance(data, dict) else data
+        for row in rows:
+            yield _record(row, path)
+    elif suffix in SQLITE_SUFFIXES:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            conn.row_factory = sqlite3.Row
+            for row in conn.execute(f"SELECT * FROM {SQLITE_TABLE}"):
+                yield _record(dict(row), path)
+        finally:
+            conn.close()
+    else:
+        raise ValueError(f"Unsupported campsite file type {suffix!r} (expected .csv, .json or {', '.join(SQLITE_SUFFIXES)})")
+
+
+def load_campsite_store(path, snapshot_path=None, use_snapshot=True):
+    """
+    Loads the campsite database in path (CSV, JSON or SQLite) as a
+    CampsiteStore. With use_snapshot, the store is read from snapshot_path
+    (default: path + SNAPSHOT_SUFFIX) when that snapshot was built from the
+    current version of path, and the snapshot is (re)written otherwise.
+    A snapshot that cannot be written only logs a warning.
+    """
+    stat = os.stat(path)
+    snapshot_path = snapshot_path or path + SNAPSHOT_SUFFIX
+    if use_snapshot and os.path.exists(snapshot_path):
+        try:
+            store = CampsiteStore.read_snapshot(snapshot_path, stat.st_size, stat.st_mtime_ns)
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning("Could not read campsite snapshot %s (%s); reloading %s.", snapshot_path, e, path)
+            store = None
+        if store is not None:
+            logger.debug("Loaded %d campsite(s) from snapshot %s.", len(store), snapshot_path)
+            return store
+
+    store = CampsiteStore.from_records(read_campsite_records(path))
+    logger.debug("Loaded %d campsite(s) from %s.", len(store), path)
+    if use_snapshot:
+        try:
+            store.write_snapshot(snapshot_path, stat.st_size, stat.st_mtime_ns)
+        except OSError as e:
+            logger.warning("Could not write campsite snapshot %s: %s", snapshot_path, e)
+    return store
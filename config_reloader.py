@@ -0,0 +1,135 @@
+"""
+Settings kept in a JSON file outside the script and reloaded while it runs.
+
+A ConfigWatcher compares the file's modification time and size on every
+poll() and, when it changed, reads and converts every setting before
+returning any of them: a file that is unreadable, not JSON, or has an
+unknown key or a bad value changes nothing (the caller keeps its current
+settings). A key removed from the file goes back to its default.
+
+The watcher also tracks data files (e.g. the campsite list) through
+track()/changed(), so the caller can reload them when they are edited.
+"""
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def file_fingerprint(path):
+    """(modification time in ns, size) of path, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# --- Converters for JSON values (JSON has no tuples and no None-or-value types) ---
+
+def date_window(value):
+    """((start_month, start_day), (end_month, end_day)) from a nested JSON list."""
+    (start_month, start_day), (end_month, end_day) = value
+    return ((int(start_month), int(start_day)), (int(end_month), int(end_day)))
+
+
+def string_list(value):
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ValueError("expected a list of strings")
+    return list(value)
+
+
+def json_object(value):
+    if not isinstance(value, dict):
+        raise ValueError("expected an object")
+    return value
+
+
+def json_list(value):
+    if not isinstance(value, list):
+        raise ValueError("expected a list")
+    return value
+
+
+def optional(convert):
+    """Converter accepting null (None) as well as what convert accepts."""
+    return lambda value: None if value is None else convert(value)
+
+
+class ConfigWatcher:
+    """
+    path is the JSON settings file (None: no file, poll() never reports
+    changes). converters maps each setting the file may contain to the
+    function converting its JSON value (raising ValueError/TypeError for bad
+    values); defaults holds the value of every setting when the file does
+    not set it. settings holds the values currently in effect.
+    """
+
+    def __init__(self, path, converters, defaults):
+        self.path = path
+        self.converters = dict(converters)
+        self.defaults = {name: defaults[name] for name in self.converters}
+        self.settings = dict(self.defaults)
+        self._fingerprints = {}  # path -> fingerprint when last checked
+
+    def track(self, path):
+        """Records path's current state; changed(path) then reports later changes."""
+        self._fingerprints[path] = file_fingerprint(path)
+
+    def changed(self, path):
+        """True if path was modified, created or deleted since the last track/changed call for it."""
+        fingerprint = file_fingerprint(path)
+        if path in self._fingerprints and self._fingerprints[path] == fingerprint:
+            return False
+        self._fingerprints[path] = fingerprint
+        return True
+
+    def load(self):
+        """
+        Reads the settings file and returns {name: converted value} for the
+        settings it sets. Raises OSError or ValueError (naming the setting).
+        """
+        with open(self.path, encoding="utf-8") as config_file:
+            data = json.load(config_file)
+        if not isinstance(data, dict):
+            raise ValueError("the settings file must hold a JSON object")
+        settings = {}
+        for name, value in data.items():
+            convert = self.converters.get(name)
+            if convert is None:
+                raise ValueError(f"{name} is not a setting that can be changed while running "
+                                 f"(allowed: {', '.join(sorted(self.converters))})")
+            try:
+                settings[name] = convert(value)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"invalid value for {name}: {e}") from None
+        return settings
+
+    def poll(self):
+        """
+        Returns {name: new value} for the settings whose value changed since
+        the last poll (all at once, or none if the file is invalid). The
+        first poll reports the file's settings that differ from the defaults.
+        """
+        if not self.path or not self.changed(self.path):
+            return {}
+        try:
+            loaded = self.load() if os.path.exists(self.path) else {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring settings file %s: %s. Current settings are kept.", self.path, e)
+            return {}
+        settings = dict(self.defaults, **loaded)
+        changes = {name: value for name, value in settings.items() if self.settings[name] != value}
+        self.settings = settings
+        return changes
+
+    def rollback(self, settings, paths=()):
+        """
+        Undoes a poll whose changes the caller could not apply: settings (the
+        values before that poll) are back in effect, and the settings file and
+        the tracked paths count as changed again, so the next poll retries them.
+        """
+        self.settings = dict(settings)
+        for path in (self.path, *paths):
+            self._fingerprints.pop(path, None)
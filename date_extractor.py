@@ -0,0 +1,182 @@
+import re
+from collections import namedtuple
+from datetime import date, timedelta
+
+# A stay mentioned in a post: first day, last day and number of nights.
+DateRange = namedtuple("DateRange", ["start", "end", "nights"])
+
+# Default target window as ((start_month, start_day), (end_month, end_day)).
+DEFAULT_TARGET_WINDOW = ((6, 6), (6, 8))
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_EN_MONTH = (r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?"
+             r"|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)")
+_EN_SUFFIX = r"(?:st|nd|rd|th)?"
+
+# One alternation covering every notation the old per-pattern checks handled:
+#   "6월 6일 ~ 6월 8일", "6월 6일부터 8일까지", "6월 6일에서 8일까지", "6월 6,7,8일",
+#   "6/6 ~ 6/8", "6/6, 7, 8", "June 6 to June 8", "June 6th ~ 8th", "June 6,7,8",
+# plus the "2박 3일" nights marker used to turn a lone start date into a range.
+# A number followed by one of these is a price, headcount, time or night count, not a day
+# ("6월 6일, 8만원", "6/6, 8명").
+_NOT_A_DAY = r"(?!\s*(?:만|천|원|명|시|박|인))"
+
+_DATE_TOKEN_RE = re.compile(
+    # Korean 월/일 with an optional range or comma-list tail
+    r"(?<!\d)(?P<km>\d{1,2})\s*월\s*(?P<kd>\d{1,2})(?!\d)\s*일?"
+    r"(?:\s*(?:~|부터|에서)\s*(?:(?P<kem>\d{1,2})\s*월\s*)?(?P<ked>\d{1,2})(?!\d|\s*박)\s*일?(?:\s*까지)?"
+    # (a list ends in 일: "6월 6,7,8일", "6월 6일, 7일, 8일")
+    r"|(?P<kl>(?:\s*,\s*\d{1,2}(?!\d)" + _NOT_A_DAY + r"(?:\s*일)?)*\s*,\s*\d{1,2}(?!\d)\s*일))?"
+    # m/d with an optional range or comma-list tail
+    r"|(?<![\d/])(?P<sm>\d{1,2})/(?P<sd>\d{1,2})(?![\d/])"
+    r"(?:\s*~\s*(?:(?P<sem>\d{1,2})/)?(?P<sed>\d{1,2})(?![\d/])"
+    r"|(?P<sl>(?:\s*,\s*\d{1,2}(?![\d/])" + _NOT_A_DAY + r")+))?"
+    # English month names with an optional range or comma-list tail
+    r"|\b(?P<em>" + _EN_MONTH + r")\.?\s*(?P<ed>\d{1,2})" + _EN_SUFFIX + r"(?!\d)"
+    r"(?:\s*(?:~|to)\s*(?:(?P<eem>" + _EN_MONTH + r")\.?\s*)?(?P<eed>\d{1,2})" + _EN_SUFFIX + r"(?!\d)"
+    r"|(?P<el>(?:\s*,\s*\d{1,2}" + _EN_SUFFIX + r"(?!\d))+))?"
+    # "2박 3일" / "2박3일"
+    r"|(?<!\d)(?P<nights>\d{1,2})\s*박\s*\d{1,2}\s*일",
+    re.IGNORECASE,
+)
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def _month_number(name):
+    return _MONTHS[name[:3].lower()]
+
+
+def _make_range(year, start_month, start_day, end_month, end_day):
+    """
+    Builds a DateRange, or returns None for impossible dates.
+    An end date before the start date is only accepted when the end month
+    was written explicitly (e.g. "12/30 ~ 1/1"), in which case it rolls over
+    into the next year.
+    """
+    explicit_end_month = end_month is not None
+    if not explicit_end_month:
+        end_month = start_month
+    try:
+        start = date(year, start_month, start_day)
+        end = date(year, end_month, end_day)
+    except ValueError:
+        return None
+    if end < start:
+        if not explicit_end_month:
+            return None
+        try:
+            end = date(year + 1, end_month, end_day)
+        except ValueError:
+            return None
+    return DateRange(start, end, (end - start).days)
+
+
+def _list_range(year, month, first_day, list_tail):
+    """The stay covered by a list of consecutive days ("6, 7, 8"), or None if they are not consecutive."""
+    days = [first_day] + [int(d) for d in _DIGITS_RE.findall(list_tail)]
+    if any(b != a + 1 for a, b in zip(days, days[1:])):
+        return None
+    return _make_range(year, month, days[0], None, days[-1])
+
+
+def extract_date_ranges(post_text, year=None):
+    """
+    Scans post_text once and returns every stay it mentions as a list of
+    DateRange(start, end, nights) tuples, in order of appearance.
+
+    Explicit ranges and comma lists are returned as written. A lone date is
+    only turned into a range when the post also carries an "N박 M일" marker,
+    in which case it is taken as the first day of an N-night stay.
+    Dates are placed in `year` (default: the current year).
+    """
+    if year is None:
+        year = date.today().year
+
+    ranges = []
+    single_starts = []
+    nights_marker = None
+
+    for match in _DATE_TOKEN_RE.finditer(post_text):
+        groups = match.groupdict()
+        if groups["nights"] is not None:
+            if nights_marker is None:
+                nights_marker = int(groups["nights"])
+            continue
+
+        if groups["km"] is not None:
+            month, day = int(groups["km"]), int(groups["kd"])
+            end_month, end_day, list_tail = groups["kem"], groups["ked"], groups["kl"]
+        elif groups["sm"] is not None:
+            month, day = int(groups["sm"]), int(groups["sd"])
+            end_month, end_day, list_tail = groups["sem"], groups["sed"], groups["sl"]
+        else:
+            month, day = _month_number(groups["em"]), int(groups["ed"])
+            end_month, end_day, list_tail = groups["eem"], groups["eed"], groups["el"]
+            if end_month is not None:
+                end_month = _month_number(end_month)
+
+        if end_day is not None:
+            date_range = _make_range(year, month, day,
+                                     int(end_month) if end_month is not None else None,
+                                     int(end_day))
+        elif list_tail is not None:
+            date_range = _list_range(year, month, day, list_tail)
+        else:
+            try:
+                single_starts.append(date(year, month, day))
+            except ValueError:
+                pass
+            continue
+
+        if date_range is not None:
+            ranges.append(date_range)
+
+    if nights_marker is not None:
+        for start in single_starts:
+            ranges.append(DateRange(start, start + timedelta(days=nights_marker), nights_marker))
+
+    return ranges
+
+
+def range_matches_window(date_range, target_window=DEFAULT_TARGET_WINDOW):
+    """
+    Returns True if date_range starts and ends exactly on the (month, day)
+    pairs of target_window, e.g. ((6, 6), (6, 8)) for June 6th to June 8th.
+    """
+    (start_month, start_day), (end_month, end_day) = target_window
+    return (date_range.start.month == start_month and date_range.start.day == start_day and
+            date_range.end.month == end_month and date_range.end.day == end_day)
+
+
+if __name__ == "__main__":
+    # Self-checks: (post text, whether it mentions a June 6th to June 8th stay)
+    cases = [
+        ("6월 6일 ~ 6월 8일", True),
+        ("6월6일~6월8일", True),
+        ("6월 6일 부터 8일까지", True),
+        ("6월 6일에서 8일까지", True),
+        ("6월 6,7,8일", True),
+        ("6월 6일, 7일, 8일", True),
+        ("6월 6, 7, 8일 8만원", True),
+        ("6/6 ~ 6/8", True),
+        ("6/6, 7, 8", True),
+        ("June 6,7,8", True),
+        ("June 6th ~ 8th", True),
+        ("6월 6일 2박 3일", True),
+        ("6월 6일 양도", False),             # A single night
+        ("6월 6일, 8만원에 양도", False),    # A price, not a day
+        ("6/6, 8명 가능", False),            # A headcount, not a day
+        ("6월 6일, 8일", False),             # Days not consecutive
+        ("6/6, 8", False),
+        ("6월 5일 ~ 6월 7일", False),        # Other dates
+    ]
+    failures = 0
+    for text, expected in cases:
+        result = any(range_matches_window(date_range) for date_range in extract_date_ranges(text))
+        print(f"{'ok  ' if result == expected else 'FAIL'} {text!r}: {result} (expected {expected})")
+        failures += result != expected
+    print(f"{len(cases) - failures}/{len(cases)} date checks passed.")
+    raise SystemExit(1 if failures else 0)
@@ -0,0 +1,209 @@
+import math
+from collections import defaultdict
+
+from campsite_store import CampsiteStore
+
+_numpy_module = None  # NumPy, False if it is not installed, None until first needed
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE_LAT = 111.195  # EARTH_RADIUS_KM * pi / 180
+GRID_CELL_DEG = 0.5          # Grid cell size for CampsiteSpatialIndex (~55 km of latitude)
+# haversine_many/haversine_matrix use the same float64 formula as haversine;
+# results agree with the scalar function to within this many kilometers.
+HAVERSINE_BATCH_TOLERANCE_KM = 1e-6
+
+
+def _numpy():
+    """
+    Imports NumPy on first use, so importing this module stays cheap for
+    callers that never compute distance tables. Returns None when NumPy is
+    not installed; the batch functions then fall back to plain Python loops.
+    """
+    global _numpy_module
+    if _numpy_module is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy_module = numpy
+    return _numpy_module or None
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    Calculates the distance in kilometers between two points given their
+    latitudes and longitudes using the Haversine formula.
+    """
+    lat1_rad = math.radians(lat1)
+    lon1_rad = math.radians(lon1)
+    lat2_rad = math.radians(lat2)
+    lon2_rad = math.radians(lon2)
+
+    dlon = lon2_rad - lon1_rad
+    dlat = lat2_rad - lat1_rad
+
+    a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    return EARTH_RADIUS_KM * c
+
+
+def haversine_many(lat, lon, lats, lons):
+    """
+    Distances in kilometers from one point (lat, lon) to many points given as
+    parallel sequences lats/lons. Returns a NumPy array when NumPy is
+    installed, otherwise a list. Matches haversine() to within
+    HAVERSINE_BATCH_TOLERANCE_KM.
+    """
+    np = _numpy()
+    if np is None:
+        return [haversine(lat, lon, lat2, lon2) for lat2, lon2 in zip(lats, lons)]
+
+    lat1_rad = np.radians(lat)
+    lon1_rad = np.radians(lon)
+    lat2_rad = np.radians(np.asarray(lats, dtype=np.float64))
+    lon2_rad = np.radians(np.asarray(lons, dtype=np.float64))
+
+    a = np.sin((lat2_rad - lat1_rad) / 2)**2 + \
+        np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin((lon2_rad - lon1_rad) / 2)**2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def haversine_matrix(target_lats, target_lons, lats, lons):
+    """
+    Pairwise distances in kilometers between many targets and many points
+    (e.g. home addresses x campsites). Row i holds the distances from target i
+    to every point. Returns a 2-D NumPy array when NumPy is installed,
+    otherwise a list of lists. Matches haversine() to within
+    HAVERSINE_BATCH_TOLERANCE_KM.
+    """
+    np = _numpy()
+    if np is None:
+        return [haversine_many(target_lat, target_lon, lats, lons)
+                for target_lat, target_lon in zip(target_lats, target_lons)]
+
+    target_lat_rad = np.radians(np.asarray(target_lats, dtype=np.float64))[:, np.newaxis]
+    target_lon_rad = np.radians(np.asarray(target_lons, dtype=np.float64))[:, np.newaxis]
+    lat_rad = np.radians(np.asarray(lats, dtype=np.float64))[np.newaxis, :]
+    lon_rad = np.radians(np.asarray(lons, dtype=np.float64))[np.newaxis, :]
+
+    a = np.sin((lat_rad - target_lat_rad) / 2)**2 + \
+        np.cos(target_lat_rad) * np.cos(lat_rad) * np.sin((lon_rad - target_lon_rad) / 2)**2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+class CampsiteSpatialIndex:
+    """
+    Distances from every campsite to a fixed set of target points, computed once.
+
+    - distance_to_target(name): nearest-target distance, a dict lookup.
+    - is_eligible(name, max_distance_km): constant-time bit test against an
+      eligibility bitmap built once per distinct max_distance_km.
+    - within(lat, lon, radius_km): campsites near an arbitrary point, answered
+      from a lat/lon grid so only nearby cells are examined.
+    """
+
+    def __init__(self, campsite_db, targets, cell_size_deg=GRID_CELL_DEG):
+        self.targets = tuple(targets)
+        self.cell_size_deg = cell_size_deg
+        if isinstance(campsite_db, CampsiteStore):
+            # Shares the store's name map and coordinate arrays
+            self.names, self.positions = campsite_db.names, campsite_db.positions
+            self.lats, self.lons = campsite_db.lats, campsite_db.lons
+        else:
+            self.names = list(campsite_db)
+            self.positions = {name: idx for idx, name in enumerate(self.names)}
+            self.lats = [campsite_db[name]['lat'] for name in self.names]
+            self.lons = [campsite_db[name]['lon'] for name in self.names]
+
+        # distances[target_idx][campsite_idx]
+        distance_table = haversine_matrix([lat for lat, _ in self.targets], [lon for _, lon in self.targets],
+                                          self.lats, self.lons)
+        self.distances = distance_table if isinstance(distance_table, list) else distance_table.tolist()
+        self.min_distances = [min(column) for column in zip(*self.distances)] if self.targets else \
+            [math.inf] * len(self.names)
+
+        self._bitmaps = {}  # max_distance_km -> bytearray, one bit per campsite
+        self._grid = defaultdict(list)  # (lat_cell, lon_cell) -> [campsite_idx, ...]
+        for idx, (lat, lon) in enumerate(zip(self.lats, self.lons)):
+            self._grid[self._cell(lat, lon)].append(idx)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_size_deg), math.floor(lon / self.cell_size_deg))
+
+    def distance_to_target(self, name):
+        """Distance (km) from the campsite to the nearest target point, or None if unknown."""
+        idx = self.positions.get(name)
+        return None if idx is None else self.min_distances[idx]
+
+    def eligibility_bitmap(self, max_distance_km):
+        """Returns (building on first use) the bitmap of campsites within max_distance_km of any target."""
+        bitmap = self._bitmaps.get(max_distance_km)
+        if bitmap is None:
+            bitmap = bytearray((len(self.names) + 7) // 8)
+            for idx, distance in enumerate(self.min_distances):
+                if distance <= max_distance_km:
+                    bitmap[idx >> 3] |= 1 << (idx & 7)
+            self._bitmaps[max_distance_km] = bitmap
+        return bitmap
+
+    def is_eligible(self, name, max_distance_km):
+        """True if the campsite is within max_distance_km of any target point."""
+        idx = self.positions.get(name)
+        if idx is None:
+            return False
+        return bool(self.eligibility_bitmap(max_distance_km)[idx >> 3] & (1 << (idx & 7)))
+
+    def within(self, lat, lon, radius_km):
+        """
+        Returns [(name, distance_km), ...] for campsites within radius_km of
+        (lat, lon), nearest first. Only grid cells overlapping the search
+        box are examined.
+        """
+        lat_span = radius_km / KM_PER_DEGREE_LAT
+        cos_lat = math.cos(math.radians(min(abs(lat) + lat_span, 89.9)))
+        lon_span = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+        min_cell = self._cell(lat - lat_span, lon - lon_span)
+        max_cell = self._cell(lat + lat_span, lon + lon_span)
+
+        found = []
+        for lat_cell in range(min_cell[0], max_cell[0] + 1):
+            for lon_cell in range(min_cell[1], max_cell[1] + 1):
+                for idx in self._grid.get((lat_cell, lon_cell), ()):
+                    distance = haversine(lat, lon, self.lats[idx], self.lons[idx])
+                    if distance <= radius_km:
+                        found.append((self.names[idx], distance))
+        found.sort(key=lambda item: item[1])
+        return found
+
+
+# Cache of the spatial index currently in use:
+# (database object, number of entries when built, targets, CampsiteSpatialIndex)
+_spatial_cache = None
+
+
+def get_spatial_index(campsite_db, targets):
+    """
+    Returns the CampsiteSpatialIndex for campsite_db and the given target
+    points [(lat, lon), ...], building it on first use. Like
+    campsite_index.get_campsite_index, the index is rebuilt only when the
+    database object, its size or the targets change.
+    """
+    global _spatial_cache
+    targets = tuple((float(lat), float(lon)) for lat, lon in targets)
+    if _spatial_cache is not None:
+        cached_db, cached_size, cached_targets, index = _spatial_cache
+        if cached_db is campsite_db and cached_size == len(campsite_db) and cached_targets == targets:
+            return index
+    index = CampsiteSpatialIndex(campsite_db, targets)
+    _spatial_cache = (campsite_db, len(campsite_db), targets, index)
+    return index
+
+
+def invalidate_spatial_index():
+    """Forces the next get_spatial_index() call to rebuild the index."""
+    global _spatial_cache
+    _spatial_cache = None
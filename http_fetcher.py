@@ -0,0 +1,404 @@
+"""
+Browserless fetching of Naver Cafe list and article pages.
+
+CafeHttpFetcher reuses the logged-in session cookies (and user agent) of a
+WebDriver session and fetches pages over pooled keep-alive connections
+(http.client); parse_post_list turns a list page into the same
+{"text", "link", "id", "article_id"} records that scrape_cafe_posts returns
+(parse_post_rows gives every row, with its title, e.g. to fingerprint the
+page). Only the standard library is used.
+
+Pages are not rendered: content must be present in the HTML (or in an
+iframe whose src is in the HTML, which is followed), not built by scripts.
+
+Selectors are a small CSS subset: comma-separated compound selectors made
+of an optional tag name plus any of .class, #id, [attr], [attr=v],
+[attr*=v], [attr^=v] and [attr$=v]. Combinators are not supported.
+"""
+import gzip
+import http.client
+import re
+import threading
+import zlib
+from html.parser import HTMLParser
+from http.cookies import SimpleCookie
+from urllib.parse import urljoin, urlsplit
+
+from seen_store import article_id_from_link
+
+DEFAULT_TIMEOUT_SECONDS = 15
+MAX_REDIRECTS = 5
+MAX_IDLE_CONNECTIONS_PER_HOST = 4
+
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+_SKIPPED_TEXT_TAGS = {"script", "style", "template", "noscript"}
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionResetError,
+                            BrokenPipeError, ConnectionAbortedError)
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w-]+)""", re.IGNORECASE)
+_SELECTOR_PART_RE = re.compile(
+    r"""\.(?P<cls>[\w-]+)|\#(?P<id>[\w-]+)|\[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[*^$]?=)\s*(?P<quote>['"]?)(?P<value>.*?)(?P=quote)\s*)?\]"""
+)
+
+
+class HttpFetchError(Exception):
+    """Raised for HTTP error statuses and redirect loops."""
+
+    def __init__(self, message, status=None, url=None):
+        super().__init__(message)
+        self.status = status
+        self.url = url
+
+
+# --- Selectors ---
+
+class _CompoundSelector:
+    def __init__(self, text):
+        match = re.match(r"[\w-]+|\*", text)
+        self.tag = match.group(0).lower() if match and match.group(0) != "*" else None
+        position = match.end() if match else 0
+        self.classes, self.id, self.attributes = [], None, []
+        while position < len(text):
+            part = _SELECTOR_PART_RE.match(text, position)
+            if not part:
+                raise ValueError(f"Unsupported selector syntax: {text!r}")
+            if part.group("cls"):
+                self.classes.append(part.group("cls"))
+            elif part.group("id"):
+                self.id = part.group("id")
+            else:
+                self.attributes.append((part.group("attr").lower(), part.group("op"), part.group("value")))
+            position = part.end()
+
+    def matches(self, tag, attrs):
+        if self.tag is not None and tag != self.tag:
+            return False
+        if self.id is not None and attrs.get("id") != self.id:
+            return False
+        if self.classes:
+            element_classes = attrs.get("class", "").split()
+            if any(cls not in element_classes for cls in self.classes):
+                return False
+        for name, op, value in self.attributes:
+            actual = attrs.get(name)
+            if actual is None:
+                return False
+            if (op == "=" and actual != value) or (op == "*=" and value not in actual) or \
+                    (op == "^=" and not actual.startswith(value)) or (op == "$=" and not actual.endswith(value)):
+                return False
+        return True
+
+
+def compile_selector(selector):
+    """Compiles a selector (see module docstring) into a predicate taking (tag, attrs dict)."""
+    compounds = []
+    for part in selector.split(","):
+        part = part.strip()
+        if not part or re.search(r"\s|[>+~]", re.sub(r"\[.*?\]", "", part)):
+            raise ValueError(f"Unsupported selector (combinators are not supported): {part!r}")
+        compounds.append(_CompoundSelector(part))
+    return lambda tag, attrs: any(compound.matches(tag, attrs) for compound in compounds)
+
+
+# --- Parsing ---
+
+class _ElementTextParser(HTMLParser):
+    """
+    Collects, for every element matching element_matcher (outside another
+    match), its text and the href and raw text (like textContent) of its
+    first descendant matching link_matcher. Also records the src of every
+    iframe by id.
+    """
+
+    def __init__(self, element_matcher, link_matcher=None):
+        super().__init__(convert_charrefs=True)
+        self.element_matcher = element_matcher
+        self.link_matcher = link_matcher
+        self.records = []       # [(text, href or None, link text or None), ...]
+        self.iframe_srcs = {}   # iframe id -> src
+        self._stack = []
+        self._current = None    # [text chunks, href, link text chunks] of the element being collected
+        self._current_depth = 0
+        self._link_depth = None # Inside the link of the element being collected
+        self._skip_depth = None # Inside <script>/<style>: text is ignored
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: value or "" for name, value in attrs}
+        if tag == "iframe" and attrs.get("id"):
+            self.iframe_srcs[attrs["id"]] = attrs.get("src", "")
+        if self._current is None:
+            if tag not in _VOID_TAGS and self.element_matcher(tag, attrs):
+                self._current = [[], None, []]
+                self._current_depth = len(self._stack) + 1
+        elif self._current[1] is None and self.link_matcher is not None and attrs.get("href") \
+                and self.link_matcher(tag, attrs):
+            self._current[1] = attrs["href"]
+            if tag not in _VOID_TAGS:
+                self._link_depth = len(self._stack) + 1
+        if self._current is not None and tag in ("br", "p", "div", "li", "tr"):
+            self._current[0].append("\n")
+        if tag in _VOID_TAGS:
+            return
+        self._stack.append(tag)
+        if tag in _SKIPPED_TEXT_TAGS and self._skip_depth is None:
+            self._skip_depth = len(self._stack)
+
+    def handle_endtag(self, tag):
+        if tag in _VOID_TAGS or tag not in self._stack:
+            return # Stray end tag
+        while self._stack:
+            popped = self._stack.pop()
+            if self._skip_depth is not None and len(self._stack) < self._skip_depth:
+                self._skip_depth = None
+            if self._link_depth is not None and len(self._stack) < self._link_depth:
+                self._link_depth = None
+            if self._current is not None and len(self._stack) < self._current_depth:
+                self._finish_current()
+            if popped == tag:
+                break
+
+    def handle_data(self, data):
+        if self._current is not None and self._skip_depth is None:
+            self._current[0].append(data)
+            if self._link_depth is not None:
+                self._current[2].append(data)
+
+    def close(self):
+        super().close()
+        if self._current is not None: # Unclosed element at end of document
+            self._finish_current()
+
+    def _finish_current(self):
+        chunks, href, link_chunks = self._current
+        lines = (" ".join(line.split()) for line in "".join(chunks).split("\n"))
+        self.records.append(("\n".join(line for line in lines if line), href, "".join(link_chunks) if href else None))
+        self._current = None
+        self._link_depth = None
+
+
+def find_iframe_src(html, iframe_id, base_url):
+    """Absolute src of the iframe with the given id, or None."""
+    parser = _ElementTextParser(lambda tag, attrs: False)
+    parser.feed(html)
+    parser.close()
+    src = parser.iframe_srcs.get(iframe_id)
+    return urljoin(base_url, src) if src else None
+
+
+def parse_post_rows(html, base_url, post_selector, link_selector):
+    """
+    Every post element of a list page, in page order, as (text, link,
+    article id or None, title) tuples: text is the element's text, link the
+    absolute href of its first element matching link_selector, and title
+    that link's text (the element's text if it has no link).
+    """
+    parser = _ElementTextParser(compile_selector(post_selector), compile_selector(link_selector))
+    parser.feed(html)
+    parser.close()
+    rows = []
+    for text, href, link_text in parser.records:
+        link = urljoin(base_url, href) if href else ""
+        rows.append((text, link, article_id_from_link(link), text if link_text is None else link_text))
+    return rows
+
+
+def parse_post_list(html, base_url, post_selector, link_selector, high_water_mark=None, rows=None):
+    """
+    Parses a list page into [{"text", "link", "id", "article_id"}, ...] in page order, like
+    scrape_cafe_posts (from rows, if the page's parse_post_rows() are already
+    at hand). If high_water_mark is given, parsing stops at the first post
+    whose article id is at or below it, except before the first newer post
+    (pinned notices), where such posts are skipped.
+    """
+    if rows is None:
+        rows = parse_post_rows(html, base_url, post_selector, link_selector)
+    posts = []
+    found_new = False
+    for index, (text, link, article_id, _) in enumerate(rows):
+        if high_water_mark is not None and article_id is not None and int(article_id) <= high_water_mark:
+            if found_new:
+                break
+            continue
+        if article_id is not None:
+            found_new = True
+        posts.append({"text": text, "link": link, "id": link or f"post_index_{index}", "article_id": article_id})
+    return posts
+
+
+def parse_element_text(html, selector):
+    """Text of the first element matching selector (e.g. an article body), or None."""
+    parser = _ElementTextParser(compile_selector(selector))
+    parser.feed(html)
+    parser.close()
+    return parser.records[0][0] if parser.records else None
+
+
+def inflate(body):
+    """
+    Decodes a Content-Encoding: deflate body, which servers send either
+    zlib-wrapped (as the spec says) or as raw deflate data.
+    """
+    try:
+        return zlib.decompress(body)
+    except zlib.error:
+        return zlib.decompress(body, -zlib.MAX_WBITS)
+
+
+def decode_body(body, content_type):
+    """Decodes a response body using the Content-Type charset, a <meta charset>, or UTF-8."""
+    charset = None
+    match = re.search(r"charset=([\w-]+)", content_type or "", re.IGNORECASE)
+    if match:
+        charset = match.group(1)
+    else:
+        meta = _META_CHARSET_RE.search(body[:4096])
+        if meta:
+            charset = meta.group(1).decode("ascii")
+    try:
+        return body.decode(charset or "utf-8", errors="replace")
+    except LookupError: # Unknown charset name
+        return body.decode("utf-8", errors="replace")
+
+
+# --- HTTP ---
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP(S) connections, reused per (scheme, host, port).
+    Safe to share between threads; each request holds a connection exclusively.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT_SECONDS, max_idle_per_host=MAX_IDLE_CONNECTIONS_PER_HOST):
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self.connections_opened = 0
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+            self.connections_opened += 1
+        scheme, host, port = key
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return connection_class(host, port, timeout=self.timeout), False
+
+    def _release(self, key, connection):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def request(self, method, url, headers=None, body=None):
+        """Sends one request and returns (status, response headers, body bytes)."""
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        key = (scheme, parts.hostname, parts.port or (443 if scheme == "https" else 80))
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        while True:
+            connection, reused = self._acquire(key)
+            try:
+                connection.request(method, path, body=body, headers=headers or {})
+                response = connection.getresponse()
+                data = response.read()
+            except _STALE_CONNECTION_ERRORS:
+                connection.close()
+                if reused:
+                    continue # The server closed an idle keep-alive connection; retry on a fresh one
+                raise
+            except Exception:
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(key, connection)
+            return response.status, response.headers, data
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+
+class CafeHttpFetcher:
+    """
+    Fetches pages with the session cookies of a logged-in browser, following
+    redirects and keeping cookies set by responses.
+    cookies is a list of WebDriver cookie dicts ({"name", "value", "domain", ...}).
+    """
+
+    def __init__(self, cookies=(), user_agent=None, pool=None):
+        self.user_agent = user_agent or "Mozilla/5.0"
+        self.pool = pool or ConnectionPool()
+        self._cookies = {} # (domain, name) -> value
+        self._lock = threading.Lock()
+        self.update_cookies(cookies)
+
+    @classmethod
+    def from_driver(cls, driver, pool=None):
+        """Creates a fetcher sharing the driver's current cookies and user agent."""
+        return cls(driver.get_cookies(), driver.execute_script("return navigator.userAgent;"), pool)
+
+    def update_cookies(self, cookies):
+        """Adds or replaces cookies (WebDriver cookie dicts), e.g. after the browser session refreshed them."""
+        with self._lock:
+            for cookie in cookies:
+                domain = (cookie.get("domain") or "").lstrip(".").lower()
+                self._cookies[(domain, cookie["name"])] = cookie["value"]
+
+    def cookie_header(self, host):
+        host = (host or "").lower()
+        with self._lock:
+            pairs = [f"{name}={value}" for (domain, name), value in self._cookies.items()
+                     if not domain or host == domain or host.endswith("." + domain)]
+        return "; ".join(pairs)
+
+    def _store_response_cookies(self, host, headers):
+        for header in headers.get_all("Set-Cookie") or []:
+            parsed = SimpleCookie()
+            try:
+                parsed.load(header)
+            except Exception: # Malformed cookie; the browser session still has the original
+                continue
+            with self._lock:
+                for name, morsel in parsed.items():
+                    domain = (morsel["domain"] or host).lstrip(".").lower()
+                    self._cookies[(domain, name)] = morsel.value
+
+    def get(self, url, referer=None):
+        """
+        GETs url, following redirects. Returns (final_url, decoded HTML).
+        Raises HttpFetchError for 4xx/5xx responses and OSError for network errors.
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            host = urlsplit(url).hostname
+            headers = {"User-Agent": self.user_agent, "Accept": "text/html,*/*;q=0.8",
+                       "Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+            cookie = self.cookie_header(host)
+            if cookie:
+                headers["Cookie"] = cookie
+            if referer:
+                headers["Referer"] = referer
+            status, response_headers, body = self.pool.request("GET", url, headers)
+            self._store_response_cookies(host, response_headers)
+            if status in (301, 302, 303, 307, 308) and response_headers.get("Location"):
+                referer, url = url, urljoin(url, response_headers["Location"])
+                continue
+            if status >= 400:
+                raise HttpFetchError(f"HTTP {status} for {url}", status, url)
+            encoding = (response_headers.get("Content-Encoding") or "").lower()
+            if encoding == "gzip":
+                body = gzip.decompress(body)
+            elif encoding == "deflate":
+                body = inflate(body)
+            return url, decode_body(body, response_headers.get("Content-Type"))
+        raise HttpFetchError(f"Too many redirects for {url}", url=url)
+
+    def close(self):
+        self.pool.close()
@@ -0,0 +1,223 @@
+"""
+In-process counters and latency histograms for the automator, exposed on a
+local HTTP endpoint from a background thread.
+
+    GET /metrics       Prometheus text exposition format (version 0.0.4)
+    GET /metrics.json  the same data as JSON (see MetricsRegistry.snapshot)
+
+Metrics are registered on REGISTRY by default. Every metric may carry labels
+(e.g. stage="page_load"); each distinct label combination is a separate series.
+"""
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; suited to WebDriver calls (milliseconds up to the 10-15 s wait timeouts).
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30, 60)
+
+
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {list(labelnames)}, got {sorted(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key)) + list(extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + "}"
+
+
+def _escape_label_value(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonically increasing count per label combination."""
+
+    metric_type = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(key, value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in self.samples():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+    def snapshot(self):
+        return [{"labels": dict(zip(self.labelnames, key)), "value": value} for key, value in self.samples()]
+
+
+class Histogram:
+    """Observation counts in cumulative buckets, plus sum and count, per label combination."""
+
+    metric_type = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series = {}  # label key -> [bucket counts (non-cumulative), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, upper in enumerate(self.buckets):
+                if value <= upper:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Context manager observing the wall time of its block (also when it raises)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        """[(label key, [(upper bound, cumulative count), ...], sum, count), ...]"""
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        result = []
+        for key, counts, total, count in series:
+            cumulative, running = [], 0
+            for upper, bucket_count in zip(self.buckets, counts):
+                running += bucket_count
+                cumulative.append((upper, running))
+            result.append((key, cumulative, total, count))
+        return result
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, cumulative, total, count in self.samples():
+            for upper, running in cumulative:
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(upper))])
+                lines.append(f"{self.name}_bucket{labels} {running}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def snapshot(self):
+        return [{"labels": dict(zip(self.labelnames, key)), "count": count, "sum": total,
+                 "buckets": {_format_value(upper): running for upper, running in cumulative}}
+                for key, cumulative, total, count in self.samples()]
+
+
+class MetricsRegistry:
+    """Named collection of counters and histograms."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name!r} is already registered with a different type or labels")
+                return existing # Re-registering (e.g. after a module reload) returns the live metric
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render_prometheus(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """{metric name: {"type", "help", "samples": [...]}} with the current values."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: {"type": metric.metric_type, "help": metric.help, "samples": metric.snapshot()}
+                for metric in metrics}
+
+
+REGISTRY = MetricsRegistry()
+
+
+def make_metrics_handler(registry):
+    from http.server import BaseHTTPRequestHandler # Imported here: only needed once the endpoint starts
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass # Scrapes are frequent; keep them out of the automation log
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                body, content_type = registry.render_prometheus(), "text/plain; version=0.0.4; charset=utf-8"
+            elif path == "/metrics.json":
+                body, content_type = json.dumps(registry.snapshot(), ensure_ascii=False), "application/json; charset=utf-8"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return MetricsHandler
+
+
+def start_metrics_server(host="127.0.0.1", port=9108, registry=REGISTRY):
+    """
+    Serves registry on http://host:port/metrics (and /metrics.json) from a
+    daemon thread. port=0 picks a free port (see server.server_address).
+    Returns the server; call server.shutdown() and server.server_close() to stop it.
+    """
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, port), make_metrics_handler(registry))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -16,6 +16,12 @@
 # 4. (Optional) playsound Package for sound alerts: Install using pip: `pip install playsound`
 #    You will also need a sound file (e.g., alert.mp3 or alert.wav) in the same directory as the script,
 #    or you can modify the `SOUND_FILE_PATH` variable.
+# 5. (Optional) numpy Package for fast batch distance tables: `pip install numpy`
+#    Without it, `geo.haversine_many`/`geo.haversine_matrix` fall back to plain Python loops.
+#
+# Selenium and playsound are only imported when the automation starts (see
+# `load_automation_dependencies()`). The post analysis itself lives in `post_analyzer.py`,
+# which has no browser or sound dependencies and can be imported on its own.
 #
 # --- CONFIGURATION (CRITICAL) ---
 # You MUST edit the following variables in this script:
@@ -29,11 +35,52 @@
 #     Values are dictionaries containing "lat", "lon", and optionally "region" (e.g., "경기", "강원", "충청")
 #     for feed-based region filtering. Example:
 #     `CAMPSITE_DB = { "행복캠핑장": {"lat": 37.12345, "lon": 127.54321, "region": "경기"}, ... }`
+#     An entry may also list other names posts use for it, e.g. `"aliases": ["용인휴양림"]`. Names written
+#     without spaces or slightly misspelled are matched too (see `FUZZY_CAMPSITE_THRESHOLD` in post_analyzer.py).
+#   - (Optional) `CAMPSITE_DB_FILE`: Load the campsites from a CSV, JSON or SQLite file instead (columns name, lat, lon,
+#     region, aliases; see `campsite_store.py`). Recommended for long lists: entries are kept in compact arrays and a
+#     binary snapshot written next to the file makes later startups fast (it is rebuilt when the file changes).
+#   - `TARGET_DATE_WINDOW`: The stay to look for as ((start_month, start_day), (end_month, end_day)),
+#     e.g. ((6, 6), (6, 8)) for June 6th to June 8th.
 #   - `MAX_DISTANCE_KM`: Maximum allowed distance from your target address to a campsite (used by original analyze_post logic, less relevant for feed/board split).
 #   - `FEED_URL`, `BOARD_URLS`: Configure at least one of these for the script to know where to look for posts.
+#   - (Optional) `WATCHES`: Several subscriptions at once (e.g. one per family), each with its own date window,
+#     regions, campsites and/or radius around its own location. When set, a post matches if it matches any watch
+#     (see `watch_registry.py`) and the TARGET_* settings above are not used for matching.
 #   - (Optional) `webdriver_path` in `setup_driver()`: Update if your chromedriver is not in PATH.
+#   - (Optional) `LEAN_BROWSER_PROFILE`: Run Chrome headless with images, media and fonts disabled, known ad/tracker
+#     hosts blocked (`LEAN_BLOCKED_URL_PATTERNS`), a small window (`LEAN_WINDOW_SIZE`) and the "eager" page load
+#     strategy. Recommended on small servers; turn it off if you need to watch the browser.
 #   - (Optional) `SOUND_FILE_PATH`, `ENABLE_SOUND_ALERT`: For sound notifications.
+#   - (Optional) `ALERT_SINKS`, `ALERT_COALESCE_SECONDS`, `ALERT_FILE_PATH`, `ALERT_WEBHOOK_URL`: Where "comment posted"
+#     alerts go ("sound", "desktop", "file", "webhook"). Alerts are delivered by a background thread, and a burst of
+#     comments within ALERT_COALESCE_SECONDS produces a single alert.
+#   - (Optional) `PIPELINE_PAGE_QUEUE_SIZE`, `PIPELINE_MATCH_QUEUE_SIZE`: Queue bounds of the scrape -> analysis ->
+#     comment pipeline (analysis of one page runs on a worker thread while the browser loads the next page).
+#   - (Optional) `BULK_EXTRACTION`: Read post lists with one in-page script call (default) or element by element.
+#   - (Optional) `SKIP_UNCHANGED_PAGES`: A fingerprint of each list page (its article ids and titles, hashed in the page)
+#     is compared with the previous visit's; an unchanged page is neither extracted nor analyzed.
+#   - (Optional) `HTTP_FETCH_MODE`: Read post lists over plain HTTP (pooled keep-alive connections, see
+#     `http_fetcher.py`) with the browser's login cookies instead of loading them in Chrome; the browser is then only
+#     used to log in and to comment. Only works for list pages whose posts are in the HTML (classic
+#     `ArticleList.nhn` board URLs), not for pages built by scripts such as the section feed.
+#     `HTTP_ARTICLE_BODY_SELECTOR` additionally fetches each new post's article body in this mode.
+#   - (Optional) `CONFIG_FILE`: A JSON file overriding settings above (the ones listed in `RELOADABLE_SETTINGS`, e.g.
+#     `{"BOARD_URLS": [...], "TARGET_DATE_WINDOW": [[7, 4], [7, 6]], "TARGET_REGIONS_FOR_FEED": ["강원"]}`). It is checked
+#     between cycles while the script runs: edits take effect on the next cycle without restarting the browser or
+#     logging in again, and only the indexes a change affects are rebuilt. Edits to `CAMPSITE_DB_FILE` are picked up
+#     the same way. A file with an error is ignored as a whole (see the log) until it is fixed.
+#   - (Optional) `SEEN_POSTS_DB_PATH`: SQLite file remembering processed posts. Delete it to re-process everything.
+#   - (Optional) `ADAPTIVE_POLLING`: Instead of loading every URL each cycle and resting CYCLE_REST_MIN/MAX_SECONDS,
+#     track how many new posts each URL gets and poll busy boards more often and quiet ones less (between
+#     `POLL_MIN_INTERVAL_SECONDS` and `POLL_MAX_INTERVAL_SECONDS`). The total number of page loads stays within what the
+#     fixed schedule would make with the CYCLE_REST and delay settings, and new posts are found sooner on average.
 #   - (Optional) `CYCLE_REST_MIN_SECONDS`, `CYCLE_REST_MAX_SECONDS`, `SHORT_DELAY_MIN`, `SHORT_DELAY_MAX`, `BOARD_SWITCH_DELAY_MIN`, `BOARD_SWITCH_DELAY_MAX`: For controlling script timing.
+#   - (Optional) `DELAY_SCALE`: Multiplier for all random delays (0 disables them; used by replay_harness.py).
+#   - (Optional) `LOG_LEVEL`, `LOG_JSON_PATH`: Console log level ("DEBUG" shows every per-post check) and the
+#     JSON-lines file receiving one record per analyzed post (None disables the file).
+#   - (Optional) `METRICS_HOST`, `METRICS_PORT`: Local endpoint serving stage latency histograms and post/comment
+#     counters while the script runs (http://127.0.0.1:9108/metrics for Prometheus, /metrics.json). None disables it.
 #
 # --- CUSTOMIZATION (ESSENTIAL FOR FUNCTIONALITY) ---
 # The core challenge of this script is that Naver Cafe's website structure can change,
@@ -51,7 +98,7 @@
 #   - `login_to_naver()`:
 #     - ID/Password fields, Login button.
 #     - Error message elements if login fails.
-#   - `scrape_cafe_posts()`:
+#   - `scrape_cafe_posts()` (the `POST_LIST_*` / `POST_*_SELECTOR` constants, shared with `HTTP_FETCH_MODE`):
 #     - Cafe content iframe ID (e.g., `cafe_main`).
 #     - Selectors for individual post containers/elements.
 #     - Selectors for links within posts.
@@ -60,6 +107,11 @@
 #     - Comment textarea/input field.
 #     - Comment submit button.
 #
+# --- OFFLINE TESTING ---
+# `python replay_harness.py` runs full automation cycles under headless Chrome against a local
+# stand-in server (login page, `cafe_main` board lists, `CommentFrame` comment forms) and reports
+# throughput and per-stage latency. No network access or Naver account is needed.
+#
 # --- RISKS AND WARNINGS ---
 # 1. TERMS OF SERVICE VIOLATION: Automating access to Naver Cafe is likely
 #    AGAINST NAVER'S TERMS OF SERVICE. This can lead to:
@@ -84,18 +136,31 @@
 # Standard library imports
 import time
 import random
-import math
-import re # For functions previously in post_analyzer.py
 import getpass # For hidden password input
-from playsound import playsound # For sound alerts
-
-# Selenium imports
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+import logging
+
+# Local imports
+import post_analyzer
+from alerts import AlertDispatcher, DesktopNotificationSink, FileSink, SoundSink, WebhookSink
+from automation_log import configure_logging
+from http_fetcher import CafeHttpFetcher, find_iframe_src, parse_element_text, parse_post_list, parse_post_rows
+from metrics import REGISTRY, start_metrics_server
+from page_fingerprint import PageFingerprintCache, fingerprint_post_rows
+from pipeline import PageJob, ScrapePipeline
+from poll_scheduler import PollScheduler
+from batch_analysis import format_rule_stats
+from campsite_index import get_campsite_index
+from campsite_store import load_campsite_store
+from config_reloader import ConfigWatcher, date_window, json_list, json_object, optional, string_list
+from geo import get_spatial_index
+from post_analyzer import check_keyword
+from seen_store import STATUS_ANALYZED, STATUS_COMMENTED, STATUS_COMMENTING, STATUS_QUEUED, SeenPostStore, article_id_from_link, post_article_id
+from watch_registry import Watch, WatchRegistry
+
+# Selenium and playsound names, bound by load_automation_dependencies() (called from setup_driver)
+webdriver = ChromeService = By = WebDriverWait = EC = None
+TimeoutException = NoSuchElementException = None
+playsound = None # Stays None if playsound is not installed; sound alerts are then skipped
 
 # --- Configuration Variables (User must fill some, others are prompted at runtime) ---
 NAVER_ID = ""  # Will be prompted at runtime
@@ -106,8 +171,12 @@ NAVER_PW = ""  # Will be prompted at runtime (input will be hidden)
 # The old CAFE_URL is deprecated in favor of FEED_URL and BOARD_URLS.
 # It's commented out to avoid confusion. The main() logic now uses FEED_URL and BOARD_URLS.
 
+TARGET_DATE_WINDOW = ((6, 6), (6, 8)) # ((start_month, start_day), (end_month, end_day)) of the stay to look for.
+
 TARGET_REGIONS_FOR_FEED = ["경기", "강원", "충청"] # Target regions for filtering posts from the FEED_URL. Add more as needed.
+                                                # Cities and counties count too (e.g. "가평" is 경기; see region_gazetteer.py).
 
+NAVER_LOGIN_URL = "https://nid.naver.com/nidlogin.login" # Common Naver login page
 FEED_URL = "https://section.cafe.naver.com/ca-fe/home/feed" # URL for the main feed to check periodically
 BOARD_URLS = [
     "https://cafe.naver.com/f-e/cafes/20486145/menus/128?viewType=L", # User provided URL 1
@@ -130,27 +199,205 @@ CAMPSITE_DB = {
     "먼곳캠핑장": {"lat": 38.5000, "lon": 128.0000, "region": "강원"}, # Example
     # Add more campsites here
 }
+CAMPSITE_DB_FILE = None # Path to a CSV, JSON or SQLite campsite list (see campsite_store.py), e.g. "data/campsites.csv";
+                        # when set, it replaces CAMPSITE_DB at startup
 MAX_DISTANCE_KM = 150  # Original maximum allowed distance (km) for proximity filtering.
                        # Note: With the current 'feed'/'board' specific logic,
                        # this variable is less directly used as 'feed' uses region names
                        # and 'board' skips location filtering.
 
+# Optional subscriptions matched all at once through indexes (see watch_registry.Watch for the keys), e.g.
+#   {"watch_id": "kim", "date_window": ((6, 6), (6, 8)), "regions": ["경기"]},
+#   {"watch_id": "lee", "date_window": ((7, 4), (7, 6)), "target": (37.29, 126.99), "max_distance_km": 50},
+# A watch without location keys matches any location. When this list is empty, TARGET_* settings are used.
+WATCHES = []
+
 SOUND_FILE_PATH = "alert.mp3"  # Placeholder for the sound file. User should place e.g. "alert.mp3" or "alert.wav"
                                  # in the same directory as the script, or provide a full path.
 ENABLE_SOUND_ALERT = True    # Set to False to disable sound alerts
 
+ALERT_SINKS = ["sound"] # Any of "sound", "desktop", "file", "webhook"; delivered off the main loop by alerts.AlertDispatcher
+ALERT_COALESCE_SECONDS = 3 # Alerts arriving within this many seconds of each other are delivered as one
+ALERT_QUEUE_SIZE = 100 # Alerts waiting beyond this are dropped rather than slowing the loop
+ALERT_FILE_PATH = "data/alerts.jsonl" # Used by the "file" sink (one JSON line per delivered alert)
+ALERT_WEBHOOK_URL = None # Used by the "webhook" sink, e.g. "http://127.0.0.1:8000/alert"
+
+PIPELINE_PAGE_QUEUE_SIZE = 2 # Scraped pages waiting for analysis before scraping waits (commenting meanwhile)
+PIPELINE_MATCH_QUEUE_SIZE = 20 # Matches waiting for a comment before analysis waits
+
 CYCLE_REST_MIN_SECONDS = 300  # Minimum seconds for long rest after a full cycle (e.g., 300 = 5 minutes)
 CYCLE_REST_MAX_SECONDS = 900  # Maximum seconds for long rest after a full cycle (e.g., 900 = 15 minutes)
 
+ADAPTIVE_POLLING = False # True: poll each URL as often as its observed new-post rate warrants (see poll_scheduler.py)
+                         # instead of every URL every cycle, with no more page loads in total than the fixed schedule
+POLL_MIN_INTERVAL_SECONDS = 120 # Adaptive polling: busiest URLs are polled at most this often
+POLL_MAX_INTERVAL_SECONDS = 3600 # Adaptive polling: quietest URLs are still polled at least this often (budget permitting)
+
 # Short Delays (can be fine-tuned by user)
 SHORT_DELAY_MIN = 0.5
 SHORT_DELAY_MAX = 1.5
 BOARD_SWITCH_DELAY_MIN = 2
 BOARD_SWITCH_DELAY_MAX = 5
+DELAY_SCALE = 1.0 # Multiplies every human-like delay; 0 disables them (e.g. for the offline replay harness)
+
+BULK_EXTRACTION = True # Read the whole post list with one in-page script call instead of several WebDriver calls per post
+                       # (also skips the per-post reading delay). Set to False to use per-element extraction.
+SKIP_UNCHANGED_PAGES = True # Skip extraction and analysis of list pages whose articles are unchanged since the last visit
+                            # (with BULK_EXTRACTION or HTTP_FETCH_MODE; see page_fingerprint.py)
+PAGE_FINGERPRINT_CACHE_SIZE = 256 # Number of URLs whose last page fingerprint is remembered
+
+# --- Placeholder selectors for post lists (used by scrape_cafe_posts and scrape_cafe_posts_http) ---
+# User MUST replace these with actual values from the target cafe.
+# Examples for post containers: 'li.article', 'div.post_item', 'tr.board_row'
+POST_LIST_IFRAME_ID = "cafe_main" # Main content iframe (VERY COMMON IN NAVER CAFES); 'main-area' is also seen
+POST_ELEMENT_SELECTOR = "div.article" # Placeholder for individual post containers
+POST_LINK_SELECTOR = "a.article_link, a.item_title, a[href*='articleid=']" # Placeholder for links within posts
+
+HTTP_FETCH_MODE = False # True: fetch post lists over HTTP with the browser's cookies (see http_fetcher.py);
+                        # the browser is then only used for login and comments
+HTTP_ARTICLE_BODY_SELECTOR = None # In HTTP mode, also fetch each new post's article page and append the text of
+                                  # this element (e.g. "div.se-main-container"); None analyzes list text only
+
+LEAN_BROWSER_PROFILE = False # True: headless Chrome without images/media/fonts/trackers (see lean_chrome_options)
+LEAN_WINDOW_SIZE = (1024, 768)
+LEAN_BLOCKED_URL_PATTERNS = [ # Chrome DevTools URL patterns ("*" is a wildcard) blocked in the lean profile
+    # Fonts, media and images (images are also disabled by a content setting)
+    "*.woff*", "*.ttf*", "*.otf*", "*.eot*",
+    "*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*", "*.ogg*",
+    "*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.svg*", "*.ico*",
+    # Ads, analytics and trackers
+    "*doubleclick.net*", "*googlesyndication.com*", "*googletagmanager.com*", "*google-analytics.com*",
+    "*googleadservices.com*", "*facebook.net*", "*facebook.com/tr*",
+    "*veta.naver.com*", "*tivan.naver.com*", "*lcs.naver.com*", "*nlog.naver.com*", "*wcs.naver.net*",
+]
+
+SEEN_POSTS_DB_PATH = "data/seen_posts.sqlite3" # Persistent record of processed posts (survives restarts)
+
+CONFIG_FILE = None # JSON file overriding RELOADABLE_SETTINGS, re-read between cycles (e.g. "data/config.json")
+
+LOG_LEVEL = "INFO" # "DEBUG" logs every individual check; "INFO" logs one record per analyzed post
+LOG_JSON_PATH = "data/automation_log.jsonl" # JSON-lines log file (set to None to log to the console only)
+
+METRICS_HOST = "127.0.0.1" # Local only; the endpoint has no authentication
+METRICS_PORT = 9108 # Port for /metrics and /metrics.json (set to None to disable the endpoint)
+
+def _campsite_db(value):
+    for name, info in json_object(value).items():
+        if not isinstance(info, dict) or not all(isinstance(info.get(key), (int, float)) for key in ("lat", "lon")):
+            raise ValueError(f"campsite {name!r} needs a numeric lat and lon")
+    return value
+
+def _watch_configs(value):
+    for config in json_list(value):
+        Watch.from_dict(config) # Rejects the whole file if any watch is invalid
+    return value
+
+# Settings CONFIG_FILE may set, with the conversion applied to their JSON value (see config_reloader.py).
+# Others (credentials, browser and HTTP options, selectors, paths) need a restart.
+RELOADABLE_SETTINGS = {
+    "TARGET_DATE_WINDOW": date_window,
+    "TARGET_REGIONS_FOR_FEED": string_list,
+    "FEED_URL": optional(str),
+    "BOARD_URLS": string_list,
+    "TARGET_LAT": float,
+    "TARGET_LON": float,
+    "MAX_DISTANCE_KM": float,
+    "CAMPSITE_DB": _campsite_db,
+    "CAMPSITE_DB_FILE": optional(str),
+    "WATCHES": _watch_configs,
+    "CYCLE_REST_MIN_SECONDS": float,
+    "CYCLE_REST_MAX_SECONDS": float,
+    "POLL_MIN_INTERVAL_SECONDS": float,
+    "POLL_MAX_INTERVAL_SECONDS": float,
+    "SHORT_DELAY_MIN": float,
+    "SHORT_DELAY_MAX": float,
+    "BOARD_SWITCH_DELAY_MIN": float,
+    "BOARD_SWITCH_DELAY_MAX": float,
+}
+
+logger = logging.getLogger("naver_cafe_automator")
+
+# --- Metrics (served by start_metrics_server, see METRICS_PORT) ---
+# Stages: page_load, iframe_switch, element_wait, extraction, analysis, comment, alert
+STAGE_SECONDS = REGISTRY.histogram("naver_cafe_stage_seconds", "Latency of one automation stage.", ["stage"])
+WAIT_TIMEOUTS = REGISTRY.counter("naver_cafe_wait_timeouts_total", "WebDriverWait timeouts, by stage.", ["stage"])
+URL_CYCLE_SECONDS = REGISTRY.histogram("naver_cafe_url_cycle_seconds", "Time to scrape and process one feed/board URL.",
+                                       ["url"], buckets=(1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600))
+POSTS_SEEN = REGISTRY.counter("naver_cafe_posts_seen_total", "Posts scraped from list pages.", ["url_type"])
+POSTS_MATCHED = REGISTRY.counter("naver_cafe_posts_matched_total", "New posts matching all criteria.", ["url_type"])
+COMMENTS_ATTEMPTED = REGISTRY.counter("naver_cafe_comments_attempted_total", "Comment submissions started.", ["url_type"])
+PAGES_UNCHANGED = REGISTRY.counter("naver_cafe_pages_unchanged_total", "List pages skipped because their fingerprint was unchanged.")
+COMMENTS_SUCCEEDED = REGISTRY.counter("naver_cafe_comments_succeeded_total", "Comment submissions that succeeded.", ["url_type"])
+
+def human_delay(min_seconds, max_seconds):
+    """Sleeps for a random duration in [min_seconds, max_seconds], scaled by DELAY_SCALE."""
+    time.sleep(random.uniform(min_seconds, max_seconds) * DELAY_SCALE)
 
 # --- WebDriver Setup and Teardown ---
-def setup_driver(webdriver_path="chromedriver"): # User might need to provide path to chromedriver
-    """Initializes and returns a Selenium WebDriver instance."""
+def load_automation_dependencies():
+    """
+    Imports Selenium (required) and playsound (optional) into this module.
+    Deferred to the first setup_driver call so that importing this module,
+    e.g. for the analysis functions, does not pay their import cost.
+    """
+    global webdriver, ChromeService, By, WebDriverWait, EC, TimeoutException, NoSuchElementException, playsound
+    if webdriver is not None:
+        return
+    from selenium.webdriver.chrome.service import Service as ChromeService
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException, NoSuchElementException
+    try:
+        from playsound import playsound # For sound alerts
+    except ImportError:
+        logger.info("playsound is not installed; sound alerts will be skipped.")
+    from selenium import webdriver # Bound last: a non-None webdriver means everything above is loaded
+
+def lean_chrome_options(options):
+    """
+    Applies the lean profile to a ChromeOptions object: headless, small
+    window, no images/notifications, muted media, fewer background services,
+    and the "eager" page load strategy (driver.get returns at
+    DOMContentLoaded instead of waiting for every subresource).
+    """
+    options.add_argument("--headless=new")
+    options.add_argument(f"--window-size={LEAN_WINDOW_SIZE[0]},{LEAN_WINDOW_SIZE[1]}")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument("--mute-audio")
+    for argument in ("--disable-extensions", "--disable-gpu", "--disable-dev-shm-usage", "--no-first-run",
+                     "--disable-background-networking", "--disable-component-update", "--disable-sync"):
+        options.add_argument(argument)
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2, # 2 = block
+        "profile.default_content_setting_values.notifications": 2,
+    })
+    options.page_load_strategy = "eager"
+    return options
+
+def block_urls(driver, url_patterns):
+    """
+    Blocks requests matching url_patterns for the whole session through the
+    Chrome DevTools Protocol (fonts, media and third-party hosts cannot be
+    switched off with Chrome options alone). Returns False if the driver
+    does not support it.
+    """
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(url_patterns)})
+        return True
+    except Exception as e: # Not a Chromium driver, or CDP unavailable
+        logger.warning("Could not enable request blocking: %s", e)
+        return False
+
+def setup_driver(webdriver_path="chromedriver", headless=False, lean=None): # User might need to provide path to chromedriver
+    """
+    Initializes and returns a Selenium WebDriver instance (headless Chrome if
+    headless=True). lean (default LEAN_BROWSER_PROFILE) selects the lean
+    headless profile with resource blocking, see lean_chrome_options.
+    """
+    if lean is None:
+        lean = LEAN_BROWSER_PROFILE
     # --- Chromedriver setup ---
     # Option 1: WebDriverManager (recommended for easier setup if user can install it)
     # from webdriver_manager.chrome import ChromeDriverManager
@@ -165,224 +412,185 @@ def setup_driver(webdriver_path="chromedriver"): # User might need to provide pa
         # Attempt to use WebDriverManager if available (conceptual, not installing it here)
         # For this subtask, assume manual path or chromedriver in PATH for simplicity
         # If webdriver_path is just "chromedriver", it implies it's in the system PATH.
+        load_automation_dependencies()
         service = ChromeService(executable_path=webdriver_path)
-        driver = webdriver.Chrome(service=service)
-        print("WebDriver setup successful.")
+        options = webdriver.ChromeOptions()
+        if lean:
+            lean_chrome_options(options)
+        elif headless:
+            options.add_argument("--headless=new")
+        driver = webdriver.Chrome(service=service, options=options)
+        if lean:
+            block_urls(driver, LEAN_BLOCKED_URL_PATTERNS)
+        logger.info("WebDriver setup successful%s.", " (lean profile)" if lean else "")
     except Exception as e:
-        print(f"Error setting up WebDriver: {e}")
-        print("Please ensure you have ChromeDriver installed and it's in your PATH, or provide the correct path.")
-        print("You can download ChromeDriver from: https://chromedriver.chromium.org/downloads")
+        logger.error("Error setting up WebDriver: %s. Please ensure you have ChromeDriver installed and it's in your PATH, "
+                     "or provide the correct path. You can download ChromeDriver from: https://chromedriver.chromium.org/downloads", e)
         return None
     return driver
 
 def teardown_driver(driver):
     """Quits the WebDriver instance."""
     if driver:
-        print("Quitting WebDriver.")
+        logger.info("Quitting WebDriver.")
         driver.quit()
 
 def play_alert_sound(sound_file_path):
-    """Plays a sound alert if enabled and the sound file exists."""
+    """
+    Plays a sound alert if enabled and the sound file exists.
+    Runs on the alert dispatcher thread (see build_alert_dispatcher), so a
+    blocking playsound call does not stall the automation loop.
+    """
     if not ENABLE_SOUND_ALERT:
-        print("Sound alert is disabled.")
+        logger.debug("Sound alert is disabled.")
         return
 
     if not sound_file_path:
-        print("Sound file path is not set. Cannot play alert.")
+        logger.warning("Sound file path is not set. Cannot play alert.")
+        return
+
+    if playsound is None:
+        logger.debug("playsound is not installed. Skipping sound alert.")
         return
 
     try:
-        print(f"Attempting to play sound: {sound_file_path}")
+        logger.debug("Attempting to play sound: %s", sound_file_path)
         # Note: playsound can be blocking or non-blocking depending on the platform and file type.
         # For some platforms/formats, you might need playsound(sound_file_path, block=False)
         # if you want the script to continue immediately. Default is usually blocking.
-        playsound(sound_file_path)
-        print("Sound alert played.")
+        with STAGE_SECONDS.time(stage="alert"):
+            playsound(sound_file_path)
+        logger.debug("Sound alert played.")
     except Exception as e:
         # Catching a broad exception as playsound can have various issues
         # (file not found, unsupported format, platform specific issues like no sound device)
-        print(f"Could not play sound alert: {e}")
-        print("Ensure the sound file exists at the specified path and is a supported format (e.g., WAV, MP3).")
-        print("You might need to install additional codecs for MP3 on some systems (e.g., ffmpeg), or try a WAV file.")
-        print("To install playsound: pip install playsound")
-
-# --- Text Analysis Functions (Previously from post_analyzer.py) ---
-
-def haversine(lat1, lon1, lat2, lon2):
-    """Calculate the great circle distance between two points on the earth (specified in decimal degrees)."""
-    # Convert decimal degrees to radians
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-
-    # Haversine formula
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-    a = math.sin(dlat / 2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    r = 6371  # Radius of earth in kilometers. Use 3956 for miles
-    return c * r
-
-def check_dates(post_text):
-    """
-    Checks for specific June 6-8 date patterns (2 nights, 3 days).
-    Examples: "6월 6일 ~ 6월 8일", "6/6 ~ 6/8", "6월 6,7,8일",
-              "6월 6일부터 6월 8일까지", "6월 6일부터 8일까지".
-    More complex NLP might be needed for wider variations.
-    """
-    # Patterns for "June 6 to June 8" (월 일, 월/일, etc.)
-    # Ensuring 2 nights, 3 days: June 6, 7, 8.
-    patterns = [
-        r"6월\s*6일\s*~\s*6월\s*8일",
-        r"6/6\s*~\s*6/8",
-        r"June\s*6(th)?\s*to\s*June\s*8(th)?",
-        r"6월\s*6일\s*,\s*7일\s*,\s*8일",
-        r"6월\s*6,\s*7,\s*8일",
-        r"6월\s*6일에서\s*8일까지", # "from 6th to 8th"
-        r"6월\s*6일부터\s*6월\s*8일까지",
-        r"6월\s*6일부터\s*8일까지",
-    ]
-    for pattern in patterns:
-        if re.search(pattern, post_text, re.IGNORECASE):
-            return True
-
-    # Check for "2박 3일" explicitly mentioned alongside a "6월 6일" start or "6월 8일" end
-    # This is a simpler check and might need refinement.
-    if ("2박 3일" in post_text or "2박3일" in post_text):
-        if (re.search(r"6월\s*6일", post_text) or \
-            re.search(r"6/6", post_text) or \
-            re.search(r"June\s*6", post_text, re.IGNORECASE)):
-            # If "2박 3일" and a start date of June 6 is mentioned, it implies June 6, 7, 8
-            return True
-        # It's harder to be sure if only the end date is mentioned with "2박 3일"
-        # For now, primarily relying on explicit ranges or start date + "2박 3일".
-
-    return False
-
-def check_keyword(post_text):
-    """
-    Checks if the post text indicates an OFFER of transfer ("양도")
-    and not a REQUEST for transfer.
-    - Must contain "양도".
-    - Must NOT contain "구합니다" or "구해요" (strong exclusion).
-    - If "양도" is present, it must NOT be accompanied by specific seeking phrases
-      like "받아요", "해주세요", "해주실 분".
-    """
-    # Condition 1: "양도" must be present.
-    if "양도" not in post_text:
-        return False
+        logger.warning("Could not play sound alert: %s. Ensure the sound file exists at the specified path and is a supported "
+                       "format (e.g., WAV, MP3); MP3 may need additional codecs (e.g., ffmpeg). To install playsound: pip install playsound", e)
+
+def build_alert_dispatcher():
+    """Creates (but does not start) the AlertDispatcher for the sinks named in ALERT_SINKS."""
+    sinks = []
+    for sink_name in ALERT_SINKS:
+        if sink_name == "sound":
+            sinks.append(SoundSink(play_alert_sound, SOUND_FILE_PATH)) # play_alert_sound honours ENABLE_SOUND_ALERT
+        elif sink_name == "desktop":
+            sinks.append(DesktopNotificationSink())
+        elif sink_name == "file":
+            sinks.append(FileSink(ALERT_FILE_PATH))
+        elif sink_name == "webhook" and ALERT_WEBHOOK_URL:
+            sinks.append(WebhookSink(ALERT_WEBHOOK_URL))
+        else:
+            logger.warning("Ignoring alert sink '%s' (unknown, or ALERT_WEBHOOK_URL is not set).", sink_name)
+    return AlertDispatcher(sinks, max_queue=ALERT_QUEUE_SIZE, coalesce_seconds=ALERT_COALESCE_SECONDS)
 
-    # Condition 2: Strong exclusion keywords - if these exist, always filter out.
-    strong_seeking_keywords = ["구합니다", "구해요"]
-    for keyword in strong_seeking_keywords:
-        if keyword in post_text:
-            return False # Filter out if "구합니다" or "구해요" is present
-
-    # Condition 3: "양도" is present, but check for accompanying seeking phrases.
-    # These phrases only lead to exclusion if "양도" is also present,
-    # implying a request for a transfer someone else is making.
-    accompanying_seeking_phrases = [
-        "받아요",    # e.g., "양도 받아요"
-        "해주세요",  # e.g., "양도 해주세요"
-        "해주실 분"  # e.g., "양도 해주실 분"
-    ]
-    # This check is relevant only if "양도" is already confirmed to be in the post_text.
-    for phrase in accompanying_seeking_phrases:
-        if phrase in post_text:
-            # To be more precise, one might check proximity of "양도" and phrase,
-            # but for now, presence of both is enough to filter.
-            # Example: "양도 ... 받고 싶어요"
-            return False # Filter out if "양도" is present with these seeking phrases
-
-    # If "양도" is present and none of the exclusion conditions were met
-    return True
+def read_campsite_file(path):
+    """Loads the campsites in path as a compact campsite_store.CampsiteStore (raises OSError/ValueError)."""
+    started = time.perf_counter()
+    campsite_db = load_campsite_store(path)
+    logger.info("Loaded %d campsite(s) from %s in %.0f ms.", len(campsite_db), path, (time.perf_counter() - started) * 1000)
+    return campsite_db
 
-def analyze_post(post_text, target_lat, target_lon, campsite_db, max_distance_km, url_type="board"): # Default for safety
+def load_campsite_db():
     """
-    Analyzes the post text based on date, keyword, and location criteria,
-    applying different location/region logic based on url_type ('feed' or 'board').
+    Replaces CAMPSITE_DB with the campsites in CAMPSITE_DB_FILE, if set, as a
+    compact campsite_store.CampsiteStore. Returns CAMPSITE_DB.
     """
-    print(f"Post analysis started for url_type: '{url_type}'")
+    global CAMPSITE_DB
+    if CAMPSITE_DB_FILE:
+        CAMPSITE_DB = read_campsite_file(CAMPSITE_DB_FILE)
+    return CAMPSITE_DB
 
-    if not check_dates(post_text):
-        print("Post analysis: Date criteria not met.")
-        return False
-    print("Post analysis: Date criteria MET.")
+def refresh_configuration(config_watcher, watch_registry):
+    """
+    Applies edits to CONFIG_FILE and CAMPSITE_DB_FILE made since the last
+    call. Meant to run between cycles: the driver and its login are kept,
+    and only what a change affects is rebuilt (the campsite name and spatial
+    indexes for new campsites or a new target, the changed watches for
+    WATCHES). Returns the watch registry to use from now on.
+
+    The new campsites are loaded before anything is applied: if that fails,
+    none of the changes take effect (they are retried on the next call).
+    """
+    global CAMPSITE_DB
+    previous_settings = dict(config_watcher.settings)
+    changes = config_watcher.poll()
+    campsite_file = changes.get("CAMPSITE_DB_FILE", CAMPSITE_DB_FILE)
+    campsites_changed = "CAMPSITE_DB" in changes or "CAMPSITE_DB_FILE" in changes
+    if campsite_file and config_watcher.changed(campsite_file):
+        campsites_changed = True
+    campsite_db = CAMPSITE_DB
+    if campsites_changed:
+        try:
+            campsite_db = read_campsite_file(campsite_file) if campsite_file else config_watcher.settings["CAMPSITE_DB"]
+        except (OSError, ValueError) as e:
+            logger.warning("Could not reload the campsites from %s: %s. Keeping the current settings and campsites; "
+                           "retrying on the next cycle.", campsite_file, e)
+            config_watcher.rollback(previous_settings, [campsite_file])
+            return watch_registry
+        logger.info("Campsite name index rebuilt for %d campsite(s).", len(get_campsite_index(campsite_db)))
+    target = (changes.get("TARGET_LAT", TARGET_LAT), changes.get("TARGET_LON", TARGET_LON))
+    if campsites_changed or "TARGET_LAT" in changes or "TARGET_LON" in changes:
+        get_spatial_index(campsite_db, [target]) # Rebuilt now rather than during the next analysis
+
+    # Everything is built: publish the settings and the campsites together
+    globals().update(changes)
+    CAMPSITE_DB = campsite_db
+    if changes:
+        logger.info("Settings reloaded from %s: %s changed.", CONFIG_FILE, ", ".join(sorted(changes)))
+
+    if not WATCHES:
+        if watch_registry is not None:
+            logger.info("WATCHES is empty; matching with the TARGET_* settings again.")
+        return None
+    watches = [Watch.from_dict(config) for config in WATCHES]
+    if watch_registry is None or campsites_changed:
+        watch_registry = WatchRegistry(CAMPSITE_DB, watches) # Radius watches are resolved against the campsites
+        logger.info("Watch registry built: %d watch(es).", len(watch_registry))
+    elif "WATCHES" in changes:
+        updated, removed = watch_registry.sync(watches)
+        logger.info("Watch registry updated: %d watch(es) added or changed, %d removed.", len(updated), len(removed))
+    return watch_registry
+
+def polled_urls():
+    """The feed and board URLs, in the order the fixed schedule visits them."""
+    return ([FEED_URL] if FEED_URL else []) + list(BOARD_URLS)
+
+def polling_budget(url_count, poll_seconds):
+    """
+    Polls per second allowed to adaptive polling: the rate of the fixed
+    schedule, which loads url_count pages (taking poll_seconds each on
+    average), waits the mean SHORT_DELAY before each load and the mean
+    BOARD_SWITCH_DELAY between them, and then rests for the mean of
+    CYCLE_REST_MIN/MAX_SECONDS. With poll_seconds still unmeasured (0) this
+    is the configured schedule's rate before any load time.
+    """
+    url_count = max(url_count, 1)
+    rest_seconds = (CYCLE_REST_MIN_SECONDS + CYCLE_REST_MAX_SECONDS) / 2
+    delay_seconds = (url_count * (SHORT_DELAY_MIN + SHORT_DELAY_MAX) / 2
+                     + (url_count - 1) * (BOARD_SWITCH_DELAY_MIN + BOARD_SWITCH_DELAY_MAX) / 2)
+    cycle_seconds = (rest_seconds + delay_seconds) * DELAY_SCALE + url_count * poll_seconds
+    return url_count / max(cycle_seconds, 1.0)
 
-    if not check_keyword(post_text): # This check is common for all url_types
-        print("Post analysis: Keyword criteria not met.")
-        return False
-    print("Post analysis: Keyword criteria MET.")
-
-    # --- Location/Region specific logic based on url_type ---
-    if url_type == "board":
-        print("Post analysis: URL type is 'board'. Skipping location/region check as per new requirements.")
-        # For 'board' URLs, location check is skipped. Only date and keyword matter.
-        return True # Date and Keyword checks already passed
-
-    elif url_type == "feed":
-        print("Post analysis: URL type is 'feed'. Applying region-based filtering.")
-
-        # Region Check Logic for 'feed'
-        found_matching_region = False
-        mentioned_campsites_in_db = []
-
-        # 1. Check CAMPSITE_DB for mentioned campsites and their regions
-        for campsite_name, camp_info in campsite_db.items():
-            if campsite_name in post_text:
-                mentioned_campsites_in_db.append(campsite_name)
-                print(f"Post analysis (feed): Found mention of campsite '{campsite_name}' from CAMPSITE_DB.")
-                # Check if camp_info has 'region' and if it's in TARGET_REGIONS_FOR_FEED
-                if "region" in camp_info and camp_info["region"] in TARGET_REGIONS_FOR_FEED:
-                    print(f"Post analysis (feed): Campsite '{campsite_name}' is in a target region: {camp_info['region']}.")
-                    found_matching_region = True
-                    break # Found a match, no need to check other DB entries or text keywords
-                else:
-                    print(f"Post analysis (feed): Campsite '{campsite_name}' region ('{camp_info.get('region', 'N/A')}') is not in target regions.")
-
-        # 2. If no match from CAMPSITE_DB, check post_text for region keywords
-        if not found_matching_region and mentioned_campsites_in_db: # Only if DB campsites were mentioned but regions didn't match
-             print(f"Post analysis (feed): Mentioned campsites from DB ({', '.join(mentioned_campsites_in_db)}) were not in target regions. Now checking post text for region keywords.")
-        elif not found_matching_region: # No DB campsites mentioned, or DB is empty
-             print("Post analysis (feed): No campsites from CAMPSITE_DB matched target regions (or no known campsites mentioned). Checking post text for region keywords...")
-
-
-        if not found_matching_region: # Proceed to text search only if DB search didn't yield a regional match
-            # Define broader region keywords including variations
-            region_keywords_to_check = []
-            for region in TARGET_REGIONS_FOR_FEED:
-                region_keywords_to_check.append(region) # e.g., "경기"
-                if region == "경기":
-                    region_keywords_to_check.append("경기도")
-                elif region == "강원":
-                    region_keywords_to_check.append("강원도")
-                elif region == "충청":
-                    region_keywords_to_check.append("충청남북도") # Covers both
-                    region_keywords_to_check.append("충청남도")
-                    region_keywords_to_check.append("충청북도")
-                    region_keywords_to_check.append("충남")
-                    region_keywords_to_check.append("충북")
-
-            # Remove duplicates just in case, though the above logic shouldn't create them
-            region_keywords_to_check = list(set(region_keywords_to_check))
-            # print(f"Debug: Region keywords to check in text: {region_keywords_to_check}")
-
-
-            for region_keyword in region_keywords_to_check:
-                if region_keyword in post_text:
-                    print(f"Post analysis (feed): Found region keyword '{region_keyword}' in post text.")
-                    found_matching_region = True
-                    break # Found a textual match
-
-        if not found_matching_region:
-            print(f"Post analysis (feed): Region criteria not met. Post does not appear to be in {TARGET_REGIONS_FOR_FEED}.")
-            return False
-
-        print("Post analysis (feed): Region criteria MET.")
-        # Original distance check (haversine) is now disabled for 'feed' type.
-        return True # Date, Keyword, and Region checks passed for 'feed'
+# --- Text Analysis Functions (see post_analyzer.py) ---
+# The checks themselves live in post_analyzer; these wrappers apply this script's
+# configuration (TARGET_DATE_WINDOW, TARGET_REGIONS_FOR_FEED).
 
-    else:
-        print(f"Post analysis: Unknown url_type '{url_type}'. Defaulting to False.")
-        return False # Unknown type, filter out
+def analyze_post(post_text, target_lat, target_lon, campsite_db, max_distance_km, url_type="board"): # Default for safety
+    """
+    Analyzes the post text based on date, keyword, and location criteria,
+    applying different location/region logic based on url_type ('feed' or 'board'):
+    board posts need the dates and keyword only, feed posts also a target region.
+    """
+    return post_analyzer.analyze_post(post_text, target_lat, target_lon, campsite_db, max_distance_km, url_type,
+                                      TARGET_DATE_WINDOW, TARGET_REGIONS_FOR_FEED)
+
+def analyze_posts(posts, target_lat, target_lon, campsite_db, max_distance_km, url_type="board", rule_stats=None, rejected_by=None):
+    """
+    Batch version of analyze_post for a whole scraped page (see
+    post_analyzer.analyze_posts). Returns (results, rule_stats).
+    """
+    return post_analyzer.analyze_posts(posts, target_lat, target_lon, campsite_db, max_distance_km, url_type,
+                                       rule_stats, rejected_by, TARGET_DATE_WINDOW, TARGET_REGIONS_FOR_FEED)
 
 # --- Automation Functions ---
 
@@ -393,37 +601,37 @@ def login_to_naver(driver, username, password):
                after inspecting the actual Naver login page.
                This function does not handle CAPTCHAs or 2FA.
     """
-    login_url = "https://nid.naver.com/nidlogin.login" # Common Naver login page
+    login_url = NAVER_LOGIN_URL
 
     try:
-        print(f"Navigating to Naver login page: {login_url}")
+        logger.info("Navigating to Naver login page: %s", login_url)
         driver.get(login_url)
         WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "id"))) # Wait for ID field
 
-        print("Entering username...")
+        logger.debug("Entering username...")
         id_field = driver.find_element(By.ID, "id")
         for char in username:
             id_field.send_keys(char)
-            time.sleep(random.uniform(0.05, 0.2)) # Simulate human typing
+            human_delay(0.05, 0.2) # Simulate human typing
 
-        print("Entering password...")
+        logger.debug("Entering password...")
         pw_field = driver.find_element(By.ID, "pw")
         for char in password:
             pw_field.send_keys(char)
-            time.sleep(random.uniform(0.05, 0.2)) # Simulate human typing
+            human_delay(0.05, 0.2) # Simulate human typing
 
         # Optional: Brief pause before clicking login
-        time.sleep(random.uniform(0.5, 1.0))
+        human_delay(0.5, 1.0)
 
-        print("Clicking login button...")
+        logger.debug("Clicking login button...")
         # Naver's login button ID is often 'log.login' but can change.
         login_button = driver.find_element(By.ID, "log.login")
         login_button.click()
 
         # Wait for a moment to allow page to process login (e.g., redirect)
         # A more robust check would be to wait for a specific element on the post-login page.
-        print("Login submitted. Waiting briefly for page load...")
-        time.sleep(random.uniform(3, 5))
+        logger.debug("Login submitted. Waiting briefly for page load...")
+        human_delay(3, 5)
 
         # Check if login was successful (very basic check: are we still on a login page?)
         # A more reliable check would be to look for an element specific to a logged-in state
@@ -433,71 +641,157 @@ def login_to_naver(driver, username, password):
             try:
                 error_message_element = driver.find_element(By.CSS_SELECTOR, ".error_message, .error, #err_common") # Common error selectors
                 if error_message_element.is_displayed():
-                    print(f"Login may have failed. Error message found: {error_message_element.text}")
+                    logger.warning("Login may have failed. Error message found: %s", error_message_element.text)
                     return False
             except NoSuchElementException:
                 # No obvious error message, but still on login page - could be other issues
-                print("Login may have failed. Still on a login-related page without obvious error message.")
+                logger.warning("Login may have failed. Still on a login-related page without obvious error message.")
                 return False
 
-        print("Login appears to be successful (or at least, not obviously failed on the login page).")
+        logger.info("Login appears to be successful (or at least, not obviously failed on the login page).")
         return True
 
     except TimeoutException:
-        print("Login failed: Timeout waiting for login page elements.")
-        print("Possible reasons: incorrect URL, slow network, or Naver page structure changed.")
+        logger.error("Login failed: Timeout waiting for login page elements. "
+                     "Possible reasons: incorrect URL, slow network, or Naver page structure changed.")
         return False
     except NoSuchElementException as e:
-        print(f"Login failed: Could not find an element (e.g., ID/PW field or login button). Selector needs update: {e}")
+        logger.error("Login failed: Could not find an element (e.g., ID/PW field or login button). Selector needs update: %s", e)
         return False
     except Exception as e:
-        print(f"An unexpected error occurred during login: {e}")
+        logger.error("An unexpected error occurred during login: %s", e)
         return False
 
-def scrape_cafe_posts(driver, cafe_url):
+# Runs inside the page (in the current frame). Arguments: post selector, link selector,
+# high-water mark (or null), fingerprint of the previous visit (or null).
+# Returns {fingerprint, records}: the page's fingerprint (row count and FNV-1a hash of each row's
+# article id and title from the newest article down, see page_fingerprint.py) and [{text, link, articleId}, ...] in page
+# order, stopping at the first article at or below the high-water mark that follows a newer one
+# (older pinned notices above the new posts are skipped). records is null when the
+# fingerprint equals the previous one: the post texts (innerText, which needs layout) are not read.
+BULK_EXTRACT_POSTS_SCRIPT = """
+const [postSelector, linkSelector, highWaterMark, previousFingerprint] = arguments;
+const posts = [];
+let hash = 0x811c9dc5;
+const addToHash = (text) => {
+    for (let i = 0; i < text.length; i++) {
+        hash = Math.imul(hash ^ text.charCodeAt(i), 0x01000193) >>> 0;
+    }
+};
+let start = 0, newest = -1; // Rows above the newest article (pinned notices) are not fingerprinted
+for (const el of document.querySelectorAll(postSelector)) {
+    const linkEl = el.querySelector(linkSelector);
+    const link = linkEl ? linkEl.href : "";
+    const idMatch = link.match(/(?:articleid=|\\/articles\\/)(\\d+)/i);
+    const articleId = idMatch ? idMatch[1] : null;
+    if (articleId !== null && Number(articleId) > newest) {
+        start = posts.length;
+        newest = Number(articleId);
+    }
+    posts.push([el, link, articleId, (linkEl || el).textContent.replace(/\\s+/g, " ").trim()]);
+}
+for (const [el, link, articleId, title] of posts.slice(start)) {
+    addToHash((articleId || link) + "\\u0001" + title + "\\u0002");
+}
+const fingerprint = (posts.length - start) + ":" + hash.toString(16).padStart(8, "0");
+if (fingerprint === previousFingerprint) {
+    return {fingerprint: fingerprint, records: null};
+}
+const records = [];
+let foundNew = false;
+for (const [el, link, articleId] of posts) {
+    if (highWaterMark !== null && articleId !== null && Number(articleId) <= highWaterMark) {
+        if (foundNew) {
+            break;
+        }
+        continue;
+    }
+    if (articleId !== null) {
+        foundNew = true;
+    }
+    records.push({text: el.innerText, link: link, articleId: articleId});
+}
+return {fingerprint: fingerprint, records: records};
+"""
+
+def extract_posts_bulk(driver, post_element_selector, post_link_selector, high_water_mark=None, previous_fingerprint=None):
+    """
+    Collects text, link and article id for every post element in a single
+    execute_script round-trip (instead of .text / find_element / get_attribute
+    per post). Returns (records in the same format as scrape_cafe_posts, with
+    the article id found in the page as "article_id",
+    page fingerprint); records is None when the fingerprint equals
+    previous_fingerprint (the page is unchanged and was not extracted).
+    """
+    result = driver.execute_script(BULK_EXTRACT_POSTS_SCRIPT, post_element_selector, post_link_selector, high_water_mark,
+                                   previous_fingerprint) or {}
+    records = result.get("records")
+    if records is None and result.get("fingerprint") is not None:
+        return None, result["fingerprint"]
+    records = records or []
+    logger.debug("Bulk-extracted %d post(s) in one script call.", len(records))
+    scraped_posts_data = []
+    for index, record in enumerate(records):
+        post_link = record.get("link") or f"No link found for post {index+1} with common selectors"
+        scraped_posts_data.append({"text": record.get("text") or "", "link": post_link, "id": post_link or f"post_index_{index}",
+                                   "article_id": record.get("articleId")})
+    return scraped_posts_data, result.get("fingerprint")
+
+def scrape_cafe_posts(driver, cafe_url, high_water_mark=None, fingerprints=None):
     """
     Attempts to navigate to the cafe and extract text from posts.
     VERY CONCEPTUAL AND LIKELY TO FAIL WITHOUT USER MODIFICATION.
     User MUST inspect the Naver Cafe's HTML structure and update selectors
     for post containers, iframes, and content elements.
+
+    If high_water_mark (the highest article id already seen on this board) is
+    given, the list is assumed to be newest-first and reading stops at the
+    first article whose id is at or below the mark, so only the new posts
+    are returned. Such articles before the first new one (pinned notices at
+    the top of the board) are skipped instead. Posts whose link carries no
+    article id never stop the scan.
+
+    With a page_fingerprint.PageFingerprintCache (and BULK_EXTRACTION), a
+    page whose articles and titles are unchanged since the last fully
+    processed visit is not extracted, and no posts are returned. The new
+    fingerprint is only proposed; the caller confirms it once the page is
+    processed.
     """
     try:
-        print(f"Navigating to Cafe URL: {cafe_url}")
-        driver.get(cafe_url)
+        logger.debug("Navigating to Cafe URL: %s", cafe_url)
+        with STAGE_SECONDS.time(stage="page_load"):
+            driver.get(cafe_url)
         # Wait for page to load - a more specific wait for a known element is better
-        time.sleep(random.uniform(3, 5))
+        human_delay(3, 5)
 
         # --- Attempt to switch to the main content iframe (VERY COMMON IN NAVER CAFES) ---
-        # User MUST find the correct iframe ID or name if one is used.
-        # Common iframe IDs include 'cafe_main', 'main-area', etc.
+        # User MUST find the correct iframe ID or name if one is used (POST_LIST_IFRAME_ID).
         # If no iframe, this part should be removed.
-        iframe_id_placeholder = "cafe_main" # Placeholder - user must verify
+        iframe_id_placeholder = POST_LIST_IFRAME_ID
         try:
-            print(f"Attempting to switch to iframe: {iframe_id_placeholder}...")
-            WebDriverWait(driver, 10).until(EC.frame_to_be_available_and_switch_to_it((By.ID, iframe_id_placeholder)))
-            print("Successfully switched to iframe.")
+            with STAGE_SECONDS.time(stage="iframe_switch"):
+                WebDriverWait(driver, 10).until(EC.frame_to_be_available_and_switch_to_it((By.ID, iframe_id_placeholder)))
+            logger.debug("Switched to iframe '%s'.", iframe_id_placeholder)
             # If you need to switch back to default content later: driver.switch_to.default_content()
         except TimeoutException:
-            print(f"Could not switch to iframe '{iframe_id_placeholder}'. Assuming content is not in an iframe, or iframe ID is incorrect.")
+            WAIT_TIMEOUTS.inc(stage="iframe_switch")
+            logger.info("Could not switch to iframe '%s'. Assuming content is not in an iframe, or iframe ID is incorrect.", iframe_id_placeholder)
             # Continue, hoping content is in the main document
 
-        # --- Placeholder selectors for post elements ---
-        # User MUST replace these with actual selectors from the target cafe.
-        # Examples: 'li.article', 'div.post_item', 'tr.board_row'
-        # It's often better to find a list of posts first.
-        post_element_selector = "div.article" # Placeholder for individual post containers
+        # --- Placeholder selectors for post elements (see POST_ELEMENT_SELECTOR / POST_LINK_SELECTOR) ---
+        post_element_selector = POST_ELEMENT_SELECTOR
+        post_link_selector = POST_LINK_SELECTOR
 
-        print(f"Looking for post elements using selector: '{post_element_selector}'")
         # It's good practice to wait for at least one post element to be present
         try:
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, post_element_selector))
-            )
-            post_elements = driver.find_elements(By.CSS_SELECTOR, post_element_selector)
-            print(f"Found {len(post_elements)} potential post element(s).")
+            with STAGE_SECONDS.time(stage="element_wait"):
+                WebDriverWait(driver, 15).until(
+                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, post_element_selector))
+                )
         except TimeoutException:
-            print(f"No post elements found using selector '{post_element_selector}' after waiting.")
-            print("Please check the Cafe page structure and update the selector.")
+            WAIT_TIMEOUTS.inc(stage="element_wait")
+            logger.warning("No post elements found on %s using selector '%s' after waiting. "
+                           "Please check the Cafe page structure and update the selector.", cafe_url, post_element_selector)
             # If switched to iframe, switch back before returning
             try:
                 driver.switch_to.default_content() # Switch back if you were in an iframe
@@ -505,53 +799,150 @@ def scrape_cafe_posts(driver, cafe_url):
                 pass
             return [] # Return empty list if no posts found
 
-        scraped_posts_data = []
-        for index, post_el in enumerate(post_elements):
-            # This is a very basic text extraction. User might need to find specific
-            # sub-elements for title, body, author, date, etc.
-            try:
-                # Try to get the full text of the post element.
-                # This might include more than just the desired post content.
-                post_text = post_el.text
-
-                # Conceptual: try to get a link to the post if available
-                post_link = ""
+        if BULK_EXTRACTION:
+            # One script execution reads text, link and article id for the whole list
+            with STAGE_SECONDS.time(stage="extraction"):
+                previous_fingerprint = fingerprints.get(cafe_url) if fingerprints is not None else None
+                scraped_posts_data, fingerprint = extract_posts_bulk(driver, post_element_selector, post_link_selector,
+                                                                     high_water_mark, previous_fingerprint)
+            if scraped_posts_data is None:
+                PAGES_UNCHANGED.inc()
+                logger.info("Page unchanged since the last visit (fingerprint %s): %s", fingerprint, cafe_url)
+                scraped_posts_data = []
+            elif fingerprints is not None and fingerprint is not None:
+                fingerprints.propose(cafe_url, fingerprint)
+        else:
+            extraction_started = time.perf_counter()
+            reading_delay_seconds = 0.0 # Excluded from the extraction stage time
+            post_elements = driver.find_elements(By.CSS_SELECTOR, post_element_selector)
+            logger.debug("Found %d potential post element(s).", len(post_elements))
+            scraped_posts_data = []
+            found_new = False # Old articles before the first new one are pinned notices, not the end of the new posts
+            for index, post_el in enumerate(post_elements):
+                # This is a very basic text extraction. User might need to find specific
+                # sub-elements for title, body, author, date, etc.
                 try:
-                    # Posts often have an <a> tag with a link. This is a common pattern.
-                    link_element = post_el.find_element(By.CSS_SELECTOR, "a.article_link, a.item_title, a[href*='articleid=']") # Placeholder
-                    post_link = link_element.get_attribute('href')
-                except NoSuchElementException:
-                    post_link = f"No link found for post {index+1} with common selectors"
-
-                print(f"--- Post {index + 1} ---")
-                print(f"Link (conceptual): {post_link}")
-                # print(f"Raw Text: {post_text[:200]}...") # Print a snippet
-
-                scraped_posts_data.append({"text": post_text, "link": post_link, "id": post_link or f"post_index_{index}"})
-
-                # Add a small delay to mimic human reading/browsing
-                time.sleep(random.uniform(0.5, 1.5))
-
-            except Exception as e:
-                print(f"Error processing post element {index + 1}: {e}")
+                    # Conceptual: try to get a link to the post if available
+                    post_link = ""
+                    try:
+                        # Posts often have an <a> tag with a link. This is a common pattern.
+                        link_element = post_el.find_element(By.CSS_SELECTOR, post_link_selector)
+                        post_link = link_element.get_attribute('href')
+                    except NoSuchElementException:
+                        post_link = f"No link found for post {index+1} with common selectors"
+
+                    # Stop at the first already-seen article (checked before reading the text)
+                    article_id = article_id_from_link(post_link)
+                    if high_water_mark is not None and article_id is not None and int(article_id) <= high_water_mark:
+                        if not found_new:
+                            logger.debug("Skipping article %s above the new posts (pinned notice).", article_id)
+                            continue
+                        logger.debug("Reached article %s at or below the high-water mark (%s). Skipping the remaining %d element(s).",
+                                     article_id, high_water_mark, len(post_elements) - index)
+                        break
+                    if article_id is not None:
+                        found_new = True
+
+                    # Try to get the full text of the post element.
+                    # This might include more than just the desired post content.
+                    post_text = post_el.text
+
+                    scraped_posts_data.append({"text": post_text, "link": post_link, "id": post_link or f"post_index_{index}",
+                                               "article_id": article_id})
+
+                    # Add a small delay to mimic human reading/browsing
+                    delay_started = time.perf_counter()
+                    human_delay(0.5, 1.5)
+                    reading_delay_seconds += time.perf_counter() - delay_started
+
+                except Exception as e:
+                    logger.warning("Error processing post element %d on %s: %s", index + 1, cafe_url, e)
+            STAGE_SECONDS.observe(time.perf_counter() - extraction_started - reading_delay_seconds, stage="extraction")
 
         # Switch back to default content if you were in an iframe
         # This is important if further actions need to be taken on the main page
         try:
-            print("Switching back to default content from iframe (if applicable).")
             driver.switch_to.default_content()
         except Exception as e:
             # Might fail if never switched, or already switched. Not critical here.
-            # print(f"Note: Could not switch to default_content: {e}")
-            pass
+            logger.debug("Could not switch to default_content: %s", e)
 
+        logger.debug("Scraped %d post(s) from %s.", len(scraped_posts_data), cafe_url)
         return scraped_posts_data
 
     except TimeoutException:
-        print("General timeout while trying to navigate cafe or find initial elements.")
+        logger.error("General timeout while trying to navigate %s or find initial elements.", cafe_url)
         return []
     except Exception as e:
-        print(f"An unexpected error occurred during cafe scraping: {e}")
+        logger.error("An unexpected error occurred during cafe scraping of %s: %s", cafe_url, e)
+        return []
+
+def fetch_content_page(fetcher, url):
+    """
+    GETs url with the HTTP fetcher and, if the page embeds the POST_LIST_IFRAME_ID
+    iframe, the iframe's page as well. Returns (page url, HTML) of the content.
+    """
+    with STAGE_SECONDS.time(stage="page_load"):
+        page_url, page_html = fetcher.get(url)
+    frame_url = find_iframe_src(page_html, POST_LIST_IFRAME_ID, page_url)
+    if frame_url:
+        with STAGE_SECONDS.time(stage="iframe_switch"):
+            page_url, page_html = fetcher.get(frame_url, referer=page_url)
+    return page_url, page_html
+
+def scrape_cafe_posts_http(fetcher, cafe_url, high_water_mark=None, seen_store=None, fingerprints=None):
+    """
+    HTTP_FETCH_MODE counterpart of scrape_cafe_posts: fetches the list page
+    (following the content iframe) with an http_fetcher.CafeHttpFetcher and
+    parses it with the same selectors and high-water-mark rule, returning the
+    same {"text", "link", "id", "article_id"} records. No browser round-trips are made.
+
+    With HTTP_ARTICLE_BODY_SELECTOR set, the article page of every post not
+    already in seen_store is fetched too and its body text appended.
+    With a page_fingerprint.PageFingerprintCache, a page listing the same
+    articles and titles as on the last fully processed visit is not
+    analyzed, and no posts are returned (the new fingerprint is only
+    proposed, as above).
+    """
+    try:
+        logger.debug("Fetching Cafe URL over HTTP: %s", cafe_url)
+        page_url, page_html = fetch_content_page(fetcher, cafe_url)
+        with STAGE_SECONDS.time(stage="extraction"):
+            rows = parse_post_rows(page_html, page_url, POST_ELEMENT_SELECTOR, POST_LINK_SELECTOR)
+        fingerprint = None
+        if fingerprints is not None:
+            fingerprint = fingerprint_post_rows([(article_id, link, title) for _, link, article_id, title in rows])
+            if fingerprints.is_unchanged(cafe_url, fingerprint):
+                PAGES_UNCHANGED.inc()
+                logger.info("Page unchanged since the last visit (fingerprint %s): %s", fingerprint, cafe_url)
+                return []
+        scraped_posts_data = parse_post_list(page_html, page_url, POST_ELEMENT_SELECTOR, POST_LINK_SELECTOR, high_water_mark,
+                                             rows=rows)
+        if fingerprint is not None:
+            fingerprints.propose(cafe_url, fingerprint)
+        if not scraped_posts_data:
+            if high_water_mark is None:
+                logger.warning("No post elements found on %s using selector '%s'. "
+                               "Please check the Cafe page structure and update the selector.", cafe_url, POST_ELEMENT_SELECTOR)
+            else:
+                logger.debug("No posts above the high-water mark (%s) on %s.", high_water_mark, cafe_url)
+            return []
+        for post in scraped_posts_data:
+            if not HTTP_ARTICLE_BODY_SELECTOR or not post["link"] or (seen_store is not None and post in seen_store):
+                continue
+            try:
+                article_url, article_html = fetch_content_page(fetcher, post["link"])
+                with STAGE_SECONDS.time(stage="extraction"):
+                    body_text = parse_element_text(article_html, HTTP_ARTICLE_BODY_SELECTOR)
+            except Exception as e:
+                logger.warning("Could not fetch the article body of %s: %s", post["link"], e)
+                continue
+            if body_text:
+                post["text"] = f"{post['text']}\n{body_text}"
+        logger.debug("Fetched %d post(s) from %s over HTTP.", len(scraped_posts_data), cafe_url)
+        return scraped_posts_data
+    except Exception as e:
+        logger.error("An unexpected error occurred during HTTP fetching of %s: %s", cafe_url, e)
         return []
 
 def post_comment(driver, post_identifier, comment_text="저요"):
@@ -564,29 +955,32 @@ def post_comment(driver, post_identifier, comment_text="저요"):
         # If post_identifier is a URL and we are not already on it:
         if isinstance(post_identifier, str) and post_identifier.startswith("http"):
             if driver.current_url != post_identifier:
-                print(f"Navigating to post page: {post_identifier}")
-                driver.get(post_identifier)
-                time.sleep(random.uniform(2, 4)) # Wait for post page to load
+                logger.debug("Navigating to post page: %s", post_identifier)
+                with STAGE_SECONDS.time(stage="page_load"):
+                    driver.get(post_identifier)
+                human_delay(2, 4) # Wait for post page to load
             else:
-                print(f"Already on post page: {post_identifier}")
+                logger.debug("Already on post page: %s", post_identifier)
         else:
             # If post_identifier is not a URL, we assume driver is already on the correct page,
             # or it's an ID that needs to be handled differently (e.g. clicking a link first).
             # This part might need more sophisticated handling by the user.
-            print(f"Assuming driver is on the correct post page for identifier: {post_identifier}")
+            logger.debug("Assuming driver is on the correct post page for identifier: %s", post_identifier)
 
         # --- Attempt to switch to a comment iframe (VERY COMMON) ---
         # User MUST find the correct iframe ID or name if one is used for comments.
         # Common iframe IDs: 'CommentFrame', 'comment_iframe', etc.
         comment_iframe_id_placeholder = "CommentFrame" # Placeholder - user must verify
         try:
-            print(f"Attempting to switch to comment iframe: {comment_iframe_id_placeholder}...")
-            WebDriverWait(driver, 10).until(
-                EC.frame_to_be_available_and_switch_to_it((By.ID, comment_iframe_id_placeholder))
-            )
-            print("Successfully switched to comment iframe.")
+            with STAGE_SECONDS.time(stage="iframe_switch"):
+                WebDriverWait(driver, 10).until(
+                    EC.frame_to_be_available_and_switch_to_it((By.ID, comment_iframe_id_placeholder))
+                )
+            logger.debug("Switched to comment iframe '%s'.", comment_iframe_id_placeholder)
         except TimeoutException:
-            print(f"Could not switch to comment iframe '{comment_iframe_id_placeholder}'. Assuming comment area is not in a separate iframe, or ID is incorrect.")
+            WAIT_TIMEOUTS.inc(stage="iframe_switch")
+            logger.info("Could not switch to comment iframe '%s'. Assuming comment area is not in a separate iframe, or ID is incorrect.",
+                        comment_iframe_id_placeholder)
             # Continue, hoping comment area is in the current document context (main or cafe_main iframe)
 
         # --- Placeholder selectors for comment elements ---
@@ -594,69 +988,165 @@ def post_comment(driver, post_identifier, comment_text="저요"):
         comment_textarea_selector = "textarea.comment_textarea, textarea[name='comment'], #comment_editor_textarea" # Placeholder
         comment_submit_button_selector = "button.btn_register, a.btn_comment_submit, input[type='submit'][value='등록']" # Placeholder
 
-        print("Looking for comment textarea...")
         comment_field = WebDriverWait(driver, 10).until(
             EC.element_to_be_clickable((By.CSS_SELECTOR, comment_textarea_selector))
         )
 
-        print(f"Entering comment: '{comment_text}'")
+        logger.debug("Entering comment: '%s'", comment_text)
         # comment_field.click() # Sometimes helpful to focus
         # comment_field.clear() # Clear if there's any default text
         for char in comment_text:
             comment_field.send_keys(char)
-            time.sleep(random.uniform(0.05, 0.15))
+            human_delay(0.05, 0.15)
 
-        time.sleep(random.uniform(0.5, 1.0)) # Pause before submitting
+        human_delay(0.5, 1.0) # Pause before submitting
 
-        print("Looking for comment submit button...")
         submit_button = WebDriverWait(driver, 10).until(
             EC.element_to_be_clickable((By.CSS_SELECTOR, comment_submit_button_selector))
         )
 
-        print("Clicking comment submit button...")
         submit_button.click()
-
-        print("Comment submitted. Waiting briefly...")
-        time.sleep(random.uniform(2, 4)) # Wait for comment to process / page to update
-
-        # --- Play sound alert on successful submission ---
-        play_alert_sound(SOUND_FILE_PATH) # Call the new sound playing function
-        # --- End of sound alert ---
+        logger.debug("Comment submitted. Waiting briefly...")
+        human_delay(2, 4) # Wait for comment to process / page to update
+        # The "comment posted" alert is queued by the caller (comment_on_post) on success.
 
         # Switch back to the previous context (e.g., default content or 'cafe_main' iframe)
         # If coming from 'cafe_main', we might need to switch to default_content, then back to 'cafe_main'.
         # For simplicity, this stub switches to default_content. User needs to manage iframe context.
         try:
-            print("Switching back to default content from comment iframe (if applicable).")
             driver.switch_to.default_content()
             # If the main post content was in 'cafe_main', you might need to re-enter it here
             # if further actions on the post list are needed.
             # Example: driver.switch_to.frame("cafe_main")
         except Exception as e:
-            print(f"Note: Could not switch to default_content: {e}")
+            logger.debug("Could not switch to default_content: %s", e)
 
-        print("Comment posting attempt finished.")
         return True
 
     except TimeoutException:
-        print("Comment posting failed: Timeout waiting for comment elements.")
-        print("Possible reasons: incorrect URL, page not loaded, or selectors for comment elements need update.")
+        WAIT_TIMEOUTS.inc(stage="comment")
+        logger.error("Comment posting failed: Timeout waiting for comment elements. "
+                     "Possible reasons: incorrect URL, page not loaded, or selectors for comment elements need update.")
         # Attempt to switch out of iframe in case of error
         try: driver.switch_to.default_content()
         except: pass
         return False
     except NoSuchElementException as e:
-        print(f"Comment posting failed: Could not find an element. Selector needs update: {e}")
+        logger.error("Comment posting failed: Could not find an element. Selector needs update: %s", e)
         try: driver.switch_to.default_content()
         except: pass
         return False
     except Exception as e:
-        print(f"An unexpected error occurred during comment posting: {e}")
+        logger.error("An unexpected error occurred during comment posting: %s", e)
         try: driver.switch_to.default_content()
         except: pass
         return False
 
 # --- Main Orchestration ---
+def log_post_decision(url_type, source_url, post, decision, reason=None):
+    """
+    Emits the single INFO record for an analyzed post: the decision
+    ("rejected", "commented", "comment_failed" or "matched_not_logged_in")
+    and, for rejections, the rule that rejected it. Posts matched through
+    WATCHES also carry the ids of the watches they matched.
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    post_id = post.get("id", "N/A")
+    logger.info("%s post %s: %s%s", url_type, post_id, decision, f" ({reason})" if reason else "",
+                extra={"fields": {"event": "post", "url_type": url_type, "source_url": source_url,
+                                  "post_id": post_id, "article_id": post_article_id(post),
+                                  "decision": decision, "reason": reason, "watch_ids": post.get("watch_ids")}})
+
+def analyze_scraped_page(posts, url_type, source_url, seen_store, logged_in_successfully, rule_stats, watch_registry=None):
+    """
+    Analysis stage for one scraped page (runs on the pipeline's analysis
+    thread): drops posts already recorded in seen_store, analyzes the rest in
+    one batch and records every non-match. Returns the matches to comment on,
+    recorded as 'queued' so the same article on another page (feed and board)
+    is not queued a second time before its comment runs.
+    With a watch_registry, a post matches when it matches any watch, and the
+    matched watch ids are stored in the post's "watch_ids".
+    When not logged in, matches are recorded as analyzed instead and nothing
+    is returned. Each analyzed post produces one log record (see log_post_decision).
+    """
+    POSTS_SEEN.inc(len(posts), url_type=url_type)
+    new_posts = seen_store.filter_new(posts)
+    skipped = len(posts) - len(new_posts)
+    if not new_posts:
+        logger.info("No new posts to analyze from %s URL %s (%d already processed).", url_type, source_url, skipped)
+        return []
+
+    rejected_by = []
+    with STAGE_SECONDS.time(stage="analysis"):
+        if watch_registry is not None:
+            results = []
+            for p_data in new_posts:
+                watch_ids = watch_registry.match(p_data)
+                if watch_ids:
+                    p_data["watch_ids"] = watch_ids
+                results.append(bool(watch_ids))
+                rejected_by.append(None if watch_ids else "watches")
+        else:
+            results, rule_stats = analyze_posts(new_posts, TARGET_LAT, TARGET_LON, CAMPSITE_DB, MAX_DISTANCE_KM,
+                                                url_type=url_type, rule_stats=rule_stats, rejected_by=rejected_by)
+    POSTS_MATCHED.inc(sum(results), url_type=url_type)
+    if watch_registry is not None:
+        logger.info("%s analysis of %s: %d/%d new post(s) matched %d watch(es), %d already processed.",
+                    url_type, source_url, sum(results), len(new_posts), len(watch_registry), skipped)
+    else:
+        logger.info("%s analysis of %s: %d/%d new post(s) matched, %d already processed. Rule stats: %s",
+                    url_type, source_url, sum(results), len(new_posts), skipped, format_rule_stats(rule_stats))
+
+    matches = []
+    for p_data, matched, rejecting_rule in zip(new_posts, results, rejected_by):
+        if not matched:
+            seen_store.mark(p_data, STATUS_ANALYZED)
+            log_post_decision(url_type, source_url, p_data, "rejected", rejecting_rule)
+        elif logged_in_successfully:
+            seen_store.mark(p_data, STATUS_QUEUED)
+            matches.append(p_data)
+        else:
+            seen_store.mark(p_data, STATUS_ANALYZED)
+            log_post_decision(url_type, source_url, p_data, "matched_not_logged_in")
+    return matches
+
+def comment_on_post(driver, p_data, url_type, source_url, seen_store, alert_dispatcher=None):
+    """
+    Comment stage for one matching post (runs on the thread that owns the driver).
+    The post is recorded as 'commenting' before the comment is submitted, so a
+    crash mid-comment never leads to a second comment after a restart; a failed
+    comment is forgotten so the post is retried next cycle. Successful comments
+    are reported to alert_dispatcher, which delivers the alert in the background.
+    A post already being commented on or commented on is skipped.
+    Returns False if the comment failed, True otherwise.
+    """
+    if seen_store.status(p_data) in (STATUS_COMMENTING, STATUS_COMMENTED):
+        logger.debug("Skipping post %s: already commented on.", p_data.get("id", "N/A"))
+        return True
+    pre_comment_delay = random.uniform(1, 3) * DELAY_SCALE # Shorter pre-comment delay for speed
+    logger.debug("Waiting for %.2f seconds before attempting to comment...", pre_comment_delay)
+    time.sleep(pre_comment_delay)
+    seen_store.mark(p_data, STATUS_COMMENTING)
+    COMMENTS_ATTEMPTED.inc(url_type=url_type)
+    with STAGE_SECONDS.time(stage="comment"):
+        commented = post_comment(driver, p_data.get('link') or p_data.get('id'), "저요")
+    if commented:
+        COMMENTS_SUCCEEDED.inc(url_type=url_type)
+        seen_store.mark(p_data, STATUS_COMMENTED)
+        log_post_decision(url_type, source_url, p_data, "commented")
+        if alert_dispatcher is not None:
+            alert_dispatcher.notify({"event": "commented", "url_type": url_type, "source_url": source_url,
+                                     "post_id": p_data.get("id"), "link": p_data.get("link"),
+                                     "watch_ids": p_data.get("watch_ids")})
+        human_delay(5, 10) # Shorter post-comment delay
+    else:
+        seen_store.forget(p_data) # Not submitted; retry on the next cycle
+        log_post_decision(url_type, source_url, p_data, "comment_failed")
+        human_delay(SHORT_DELAY_MIN, SHORT_DELAY_MAX)
+    human_delay(SHORT_DELAY_MIN, SHORT_DELAY_MAX) # Delay between processed matches
+    return bool(commented)
+
 def main():
     """Main orchestration function for Naver Cafe automation."""
 
@@ -668,127 +1158,230 @@ def main():
     if not local_naver_id or not local_naver_pw:
         print("아이디 또는 비밀번호가 입력되지 않았습니다. 로그인을 시도할 수 없습니다.")
 
-    print("Starting Naver Cafe Automation Script...")
-    driver = setup_driver()
+    run_automation(local_naver_id, local_naver_pw)
+
+def run_automation(local_naver_id, local_naver_pw, max_cycles=None, headless=False):
+    """
+    Sets up the driver, logs in and runs automation cycles over FEED_URL and
+    BOARD_URLS. Runs forever unless max_cycles is given (the offline replay
+    harness runs a single cycle with headless=True).
+    """
+    configure_logging(LOG_LEVEL, LOG_JSON_PATH)
+    logger.info("Starting Naver Cafe Automation Script...")
+    config_watcher = ConfigWatcher(CONFIG_FILE, RELOADABLE_SETTINGS, globals())
+    initial_settings = config_watcher.poll() # Settings from CONFIG_FILE apply from the first cycle
+    globals().update(initial_settings)
+    if initial_settings:
+        logger.info("Settings from %s: %s.", CONFIG_FILE, ", ".join(sorted(initial_settings)))
+    load_campsite_db()
+    if CAMPSITE_DB_FILE:
+        config_watcher.track(CAMPSITE_DB_FILE)
+    campsite_index = get_campsite_index(CAMPSITE_DB) # Built once here; reused by every analyze_post call
+    logger.info("Campsite name index built for %d campsite(s).", len(campsite_index))
+    spatial_index = get_spatial_index(CAMPSITE_DB, [(TARGET_LAT, TARGET_LON)]) # Distances to the target computed once
+    eligible_count = sum(spatial_index.is_eligible(name, MAX_DISTANCE_KM) for name in spatial_index.names)
+    logger.info("Spatial index built: %d campsite(s) within %s km of the target location.", eligible_count, MAX_DISTANCE_KM)
+    watch_registry = None
+    if WATCHES:
+        watch_registry = WatchRegistry(CAMPSITE_DB, [Watch.from_dict(config) for config in WATCHES])
+        logger.info("Watch registry built: %d watch(es); posts are matched against every watch.", len(watch_registry))
+    seen_store = SeenPostStore(SEEN_POSTS_DB_PATH) # Survives restarts; already processed posts are never re-analyzed
+    logger.info("Seen-post store loaded from %s: %d post(s) already processed.", SEEN_POSTS_DB_PATH, len(seen_store))
+    driver = setup_driver(headless=headless)
 
     if not driver:
-        print("Failed to initialize WebDriver. Exiting.")
+        logger.error("Failed to initialize WebDriver. Exiting.")
+        seen_store.close()
         return
 
     logged_in_successfully = False
     if local_naver_id and local_naver_pw:
-        print("\nAttempting to log into Naver...")
-        time.sleep(random.uniform(SHORT_DELAY_MIN, SHORT_DELAY_MAX))
+        logger.info("Attempting to log into Naver...")
+        human_delay(SHORT_DELAY_MIN, SHORT_DELAY_MAX)
         if login_to_naver(driver, local_naver_id, local_naver_pw):
             if "login" not in driver.current_url.lower() and "nidlogin" not in driver.current_url.lower():
                  logged_in_successfully = True
-                 print("Verified: Not on a login page after login attempt. Assuming success.")
+                 logger.info("Verified: Not on a login page after login attempt. Assuming success.")
             else:
-                 print("Warning: Still on a login-related page after login attempt. Assuming failure for safety.")
+                 logger.warning("Still on a login-related page after login attempt. Assuming failure for safety.")
                  logged_in_successfully = False
         else:
-            print("Login attempt finished with failure indication from login_to_naver.")
+            logger.warning("Login attempt finished with failure indication from login_to_naver.")
             logged_in_successfully = False
-        time.sleep(random.uniform(BOARD_SWITCH_DELAY_MIN, BOARD_SWITCH_DELAY_MAX)) # Delay after login attempt
+        human_delay(BOARD_SWITCH_DELAY_MIN, BOARD_SWITCH_DELAY_MAX) # Delay after login attempt
     else:
-        print("\nNaver ID or Password not entered. Proceeding without login.")
+        logger.warning("Naver ID or Password not entered. Proceeding without login. "
+                       "Scraping and commenting capabilities may be limited or impossible without login.")
         logged_in_successfully = False
-        print("Note: Scraping and commenting capabilities may be limited or impossible without login.")
-        time.sleep(random.uniform(SHORT_DELAY_MIN, SHORT_DELAY_MAX))
+        human_delay(SHORT_DELAY_MIN, SHORT_DELAY_MAX)
+
+    http_fetcher = None
+    if HTTP_FETCH_MODE:
+        try:
+            http_fetcher = CafeHttpFetcher.from_driver(driver) # Reuses the session cookies set by the login
+            logger.info("HTTP fetch mode: post lists are fetched without the browser.")
+        except Exception as e:
+            logger.warning("Could not set up HTTP fetching (%s); scraping with the browser instead.", e)
+
+    page_fingerprints = PageFingerprintCache(PAGE_FINGERPRINT_CACHE_SIZE) if SKIP_UNCHANGED_PAGES else None
+
+    def scrape(url, high_water_mark=None):
+        if http_fetcher is not None:
+            return scrape_cafe_posts_http(http_fetcher, url, high_water_mark, seen_store, page_fingerprints)
+        return scrape_cafe_posts(driver, url, high_water_mark=high_water_mark, fingerprints=page_fingerprints)
+
+    alert_dispatcher = build_alert_dispatcher().start()
+
+    # Scraping and commenting stay on this thread (it owns the driver); analysis runs on a worker thread.
+    def analyze_job(job):
+        return analyze_scraped_page(job.posts, job.url_type, job.source_url, seen_store, logged_in_successfully,
+                                    job.rule_stats, watch_registry)
+
+    def comment_job(job, p_data):
+        return comment_on_post(driver, p_data, job.url_type, job.source_url, seen_store, alert_dispatcher)
+
+    def page_done(job):
+        if job.url_type == "board" and job.error is None:
+            seen_store.update_high_water_mark(job.source_url, job.posts) # Advanced only after the posts were processed
+        if page_fingerprints is not None:
+            if job.error is None and not job.failed_comments:
+                page_fingerprints.confirm(job.source_url) # Skipped on the next visit if unchanged
+            else:
+                page_fingerprints.forget(job.source_url) # Processed in full on the next visit, so failed comments are retried
+        URL_CYCLE_SECONDS.observe(time.perf_counter() - job.started, url=job.source_url)
+
+    pipeline = ScrapePipeline(analyze_job, comment_job, page_done,
+                              page_queue_size=PIPELINE_PAGE_QUEUE_SIZE, match_queue_size=PIPELINE_MATCH_QUEUE_SIZE).start()
+
+    metrics_server = None
+    if METRICS_PORT is not None:
+        try:
+            metrics_server = start_metrics_server(METRICS_HOST, METRICS_PORT)
+            logger.info("Metrics endpoint: http://%s:%d/metrics (JSON: /metrics.json)", *metrics_server.server_address[:2])
+        except OSError as e:
+            logger.warning("Could not start the metrics endpoint on %s:%s: %s", METRICS_HOST, METRICS_PORT, e)
+
+    scheduler = None
+    poll_seconds = 0.0 # Average time to load one URL (adaptive polling budget)
+    if ADAPTIVE_POLLING:
+        scheduler = PollScheduler(polled_urls(), polling_budget(len(polled_urls()), poll_seconds),
+                                  POLL_MIN_INTERVAL_SECONDS, POLL_MAX_INTERVAL_SECONDS)
+        logger.info("Adaptive polling: up to %.1f page load(s) per hour over %d URL(s).",
+                    scheduler.budget_per_second * 3600, len(scheduler.urls))
+
+    def record_poll(url, posts, started):
+        nonlocal poll_seconds
+        if scheduler is None:
+            return
+        elapsed = time.perf_counter() - started
+        poll_seconds = elapsed if not poll_seconds else 0.8 * poll_seconds + 0.2 * elapsed
+        scheduler.observe(url, sum(1 for p_data in posts or () if not seen_store.is_seen(p_data)))
 
     # --- Main Automation Loop ---
     try:
-        while True: # Continuous loop
-            print("\n--- Starting new automation cycle ---")
+        cycle_count = 0
+        while max_cycles is None or cycle_count < max_cycles: # Continuous loop unless max_cycles is set
+            cycle_count += 1
+            if cycle_count > 1:
+                # Between cycles nothing is being analyzed, so settings and indexes can be swapped at once
+                watch_registry = refresh_configuration(config_watcher, watch_registry)
+            logger.info("--- Starting automation cycle %d ---", cycle_count)
+            # Fresh per-cycle rule counters (evaluated / rejected / time spent) for analyze_posts
+            feed_rule_stats = {}
+            board_rule_stats = {}
+            if http_fetcher is not None:
+                http_fetcher.update_cookies(driver.get_cookies()) # Pick up cookies the browser refreshed since
+
+            due_urls = None # Every URL is polled, unless adaptive polling says otherwise
+            if scheduler is not None:
+                urls = polled_urls()
+                if scheduler.urls != urls:
+                    scheduler.set_urls(urls)
+                scheduler.set_limits(polling_budget(len(urls), poll_seconds), POLL_MIN_INTERVAL_SECONDS, POLL_MAX_INTERVAL_SECONDS)
+                due_urls = set(scheduler.due())
+                logger.info("Adaptive polling: %d of %d URL(s) due.", len(due_urls), len(urls))
+                for url, posts_per_hour, interval in scheduler.summary():
+                    logger.debug("Adaptive polling: %s ~%.2f new post(s)/h, polled every %.0f s.", url, posts_per_hour, interval)
 
             # 1. Process FEED_URL
-            if FEED_URL:
-                print(f"\nProcessing FEED_URL: {FEED_URL}")
-                time.sleep(random.uniform(SHORT_DELAY_MIN, SHORT_DELAY_MAX))
-                posts_feed = scrape_cafe_posts(driver, FEED_URL)
+            if FEED_URL and due_urls is not None and FEED_URL not in due_urls:
+                logger.debug("FEED_URL is not due yet.")
+            elif FEED_URL:
+                logger.debug("Processing FEED_URL: %s", FEED_URL)
+                human_delay(SHORT_DELAY_MIN, SHORT_DELAY_MAX)
+                started = time.perf_counter()
+                posts_feed = scrape(FEED_URL)
+                record_poll(FEED_URL, posts_feed, started)
                 if posts_feed:
-                    print(f"Found {len(posts_feed)} post(s) from FEED_URL. Analyzing...")
-                    time.sleep(random.uniform(SHORT_DELAY_MIN, SHORT_DELAY_MAX))
-                    for i, p_data in enumerate(posts_feed):
-                        print(f"--- Processing FEED Post {i+1}/{len(posts_feed)} (ID: {p_data.get('id', 'N/A')}) ---")
-                        time.sleep(random.uniform(SHORT_DELAY_MIN, SHORT_DELAY_MAX)) # Small delay before analyzing each post
-                        if analyze_post(p_data['text'], TARGET_LAT, TARGET_LON, CAMPSITE_DB, MAX_DISTANCE_KM, url_type="feed"):
-                            print(f"FEED POST {i+1} (ID: {p_data.get('id', 'N/A')}) MATCHES ALL CRITERIA!")
-                            pre_comment_delay = random.uniform(1, 3) # Shorter pre-comment delay for speed
-                            print(f"Waiting for {pre_comment_delay:.2f} seconds before attempting to comment...")
-                            time.sleep(pre_comment_delay)
-                            if logged_in_successfully:
-                                if post_comment(driver, p_data.get('link') or p_data.get('id'), "저요"):
-                                    print(f"Successfully attempted to comment on FEED post {p_data.get('id', 'N/A')}.")
-                                    time.sleep(random.uniform(5, 10)) # Shorter post-comment delay
-                                else:
-                                    print(f"Failed to comment on FEED post {p_data.get('id', 'N/A')}.")
-                                    time.sleep(random.uniform(SHORT_DELAY_MIN, SHORT_DELAY_MAX))
-                            else:
-                                print("Skipping comment: Not logged in or login failed.")
-                                time.sleep(random.uniform(SHORT_DELAY_MIN, SHORT_DELAY_MAX))
-                        else:
-                            print(f"FEED Post {i+1} (ID: {p_data.get('id', 'N/A')}) does not match all criteria.")
-                        print("-" * 40)
-                        time.sleep(random.uniform(SHORT_DELAY_MIN, SHORT_DELAY_MAX)) # Delay between processing posts
+                    pipeline.submit(PageJob("feed", FEED_URL, posts_feed, feed_rule_stats, started))
                 else:
-                    print(f"No posts found or returned from FEED_URL: {FEED_URL}")
-                time.sleep(random.uniform(BOARD_SWITCH_DELAY_MIN, BOARD_SWITCH_DELAY_MAX)) # Delay before moving to boards
+                    if page_fingerprints is not None:
+                        page_fingerprints.confirm(FEED_URL) # Nothing to process
+                    logger.info("No posts found or returned from FEED_URL: %s", FEED_URL)
+                    URL_CYCLE_SECONDS.observe(time.perf_counter() - started, url=FEED_URL)
+                pipeline.service_comments() # Matches from earlier pages, while this one is analyzed
+                human_delay(BOARD_SWITCH_DELAY_MIN, BOARD_SWITCH_DELAY_MAX) # Delay before moving to boards
             else:
-                print("FEED_URL is not set. Skipping feed check.")
+                logger.info("FEED_URL is not set. Skipping feed check.")
 
             # 2. Process BOARD_URLS
             if BOARD_URLS:
-                for board_idx, board_url in enumerate(BOARD_URLS):
-                    print(f"\nProcessing BOARD_URL {board_idx+1}/{len(BOARD_URLS)}: {board_url}")
-                    time.sleep(random.uniform(SHORT_DELAY_MIN, SHORT_DELAY_MAX))
-                    posts_board = scrape_cafe_posts(driver, board_url)
+                due_boards = [board_url for board_url in BOARD_URLS if due_urls is None or board_url in due_urls]
+                for board_idx, board_url in enumerate(due_boards):
+                    logger.debug("Processing BOARD_URL %d/%d: %s", board_idx + 1, len(due_boards), board_url)
+                    human_delay(SHORT_DELAY_MIN, SHORT_DELAY_MAX)
+                    # Article ids are only comparable within one cafe board, so the
+                    # high-water mark is tracked per board URL (not for the multi-cafe feed).
+                    board_high_water_mark = seen_store.get_high_water_mark(board_url)
+                    started = time.perf_counter()
+                    posts_board = scrape(board_url, high_water_mark=board_high_water_mark)
+                    record_poll(board_url, posts_board, started)
                     if posts_board:
-                        print(f"Found {len(posts_board)} post(s) from BOARD_URL: {board_url}. Analyzing...")
-                        time.sleep(random.uniform(SHORT_DELAY_MIN, SHORT_DELAY_MAX))
-                        for i, p_data in enumerate(posts_board):
-                            print(f"--- Processing BOARD Post {i+1}/{len(posts_board)} (ID: {p_data.get('id', 'N/A')}) from {board_url} ---")
-                            time.sleep(random.uniform(SHORT_DELAY_MIN, SHORT_DELAY_MAX))
-                            if analyze_post(p_data['text'], TARGET_LAT, TARGET_LON, CAMPSITE_DB, MAX_DISTANCE_KM, url_type="board"):
-                                print(f"BOARD POST {i+1} (ID: {p_data.get('id', 'N/A')}) MATCHES ALL CRITERIA!")
-                                pre_comment_delay = random.uniform(1, 3) # Shorter pre-comment delay
-                                print(f"Waiting for {pre_comment_delay:.2f} seconds before attempting to comment...")
-                                time.sleep(pre_comment_delay)
-                                if logged_in_successfully:
-                                    if post_comment(driver, p_data.get('link') or p_data.get('id'), "저요"):
-                                        print(f"Successfully attempted to comment on BOARD post {p_data.get('id', 'N/A')}.")
-                                        time.sleep(random.uniform(5, 10)) # Shorter post-comment delay
-                                    else:
-                                        print(f"Failed to comment on BOARD post {p_data.get('id', 'N/A')}.")
-                                        time.sleep(random.uniform(SHORT_DELAY_MIN, SHORT_DELAY_MAX))
-                                else:
-                                    print("Skipping comment: Not logged in or login failed.")
-                                    time.sleep(random.uniform(SHORT_DELAY_MIN, SHORT_DELAY_MAX))
-                            else:
-                                print(f"BOARD Post {i+1} (ID: {p_data.get('id', 'N/A')}) does not match all criteria.")
-                            print("-" * 40)
-                            time.sleep(random.uniform(SHORT_DELAY_MIN, SHORT_DELAY_MAX)) # Delay between posts
+                        # The high-water mark is advanced by page_done, once the page's matches are commented on
+                        pipeline.submit(PageJob("board", board_url, posts_board, board_rule_stats, started))
                     else:
-                        print(f"No posts found or returned from BOARD_URL: {board_url}")
-
-                    if board_idx < len(BOARD_URLS) - 1: # If not the last board URL
-                        print(f"Waiting before switching to next board URL...")
-                        time.sleep(random.uniform(BOARD_SWITCH_DELAY_MIN, BOARD_SWITCH_DELAY_MAX))
+                        if page_fingerprints is not None:
+                            page_fingerprints.confirm(board_url) # Nothing to process
+                        logger.info("No posts found or returned from BOARD_URL: %s", board_url)
+                        URL_CYCLE_SECONDS.observe(time.perf_counter() - started, url=board_url)
+                    pipeline.service_comments()
+
+                    if board_idx < len(due_boards) - 1: # If not the last board URL
+                        human_delay(BOARD_SWITCH_DELAY_MIN, BOARD_SWITCH_DELAY_MAX)
             else:
-                print("BOARD_URLS list is empty. Skipping board checks.")
-
-            # 3. Long Rest Period
-            rest_duration = random.uniform(CYCLE_REST_MIN_SECONDS, CYCLE_REST_MAX_SECONDS)
-            print(f"--- Automation cycle finished. Resting for {rest_duration/60:.2f} minutes. ---")
+                logger.info("BOARD_URLS list is empty. Skipping board checks.")
+
+            # 3. Finish this cycle's analysis and comments before resting
+            pipeline.drain()
+
+            # 4. Long Rest Period
+            if max_cycles is not None and cycle_count >= max_cycles:
+                logger.info("--- Automation cycle %d finished. Reached max_cycles. ---", cycle_count)
+                break
+            if scheduler is not None:
+                # Now that this cycle's loads are timed (the first cycle's budget could not include them)
+                scheduler.set_limits(polling_budget(len(scheduler.urls), poll_seconds), POLL_MIN_INTERVAL_SECONDS, POLL_MAX_INTERVAL_SECONDS)
+                rest_duration = scheduler.seconds_until_next() # Until the next URL is due
+            else:
+                rest_duration = random.uniform(CYCLE_REST_MIN_SECONDS, CYCLE_REST_MAX_SECONDS) * DELAY_SCALE
+            logger.info("--- Automation cycle %d finished. Resting for %.2f minutes. ---", cycle_count, rest_duration / 60)
             time.sleep(rest_duration)
 
     except KeyboardInterrupt:
-        print("\nScript interrupted by user (Ctrl+C).")
+        logger.info("Script interrupted by user (Ctrl+C).")
     except Exception as e:
-        print(f"An unexpected error occurred in the main loop: {e}")
+        logger.exception("An unexpected error occurred in the main loop: %s", e)
     finally:
+        pipeline.stop()
+        if http_fetcher is not None:
+            http_fetcher.close()
         teardown_driver(driver)
-        print("Naver Cafe Automation Script finished.")
+        seen_store.close()
+        alert_dispatcher.stop() # Delivers alerts still waiting to be coalesced
+        if metrics_server is not None:
+            metrics_server.shutdown()
+            metrics_server.server_close()
+        logger.info("Naver Cafe Automation Script finished.")
 
 if __name__ == "__main__":
     # --- Direct tests for check_keyword ---
@@ -0,0 +1,111 @@
+"""
+Fingerprints of post list pages, so a page that has not changed since the
+last visit skips extraction and analysis.
+
+A fingerprint is "<row count>:<32-bit FNV-1a hash>" over the article id
+and title of each post row, from the newest article down (pinned notices
+above it are left out), not over view or comment counts, which change
+without new posts. In the browser the hash is computed by the page itself
+(see BULK_EXTRACT_POSTS_SCRIPT in naver_cafe_automator.py); for pages
+fetched over HTTP, fingerprint_post_rows() computes the same hash from the
+parsed rows.
+
+A fingerprint seen by the scraper is only proposed; it is confirmed once
+the page has been fully processed (every match commented on), so a page
+whose processing failed is processed again on the next visit even if it
+has not changed.
+"""
+import threading
+from collections import OrderedDict
+
+_FNV_OFFSET_BASIS = 0x811C9DC5
+_FNV_PRIME = 0x01000193
+
+
+def fnv1a_32(text, value=_FNV_OFFSET_BASIS):
+    """32-bit FNV-1a hash of text's UTF-16 code units (like JavaScript's charCodeAt), continuing from value."""
+    data = text.encode("utf-16-le")
+    for index in range(0, len(data), 2):
+        value = ((value ^ (data[index] | data[index + 1] << 8)) * _FNV_PRIME) & 0xFFFFFFFF
+    return value
+
+
+def fingerprint_post_rows(rows):
+    """
+    Fingerprint of a list page's post rows, [(article id or None, link, title), ...]
+    in page order. Rows above the first row holding the newest article id
+    (pinned notices) are left out, and runs of whitespace in titles count
+    as one space.
+    """
+    start, newest = 0, -1
+    for index, (article_id, _, _) in enumerate(rows):
+        if article_id is not None and int(article_id) > newest:
+            start, newest = index, int(article_id)
+    value = _FNV_OFFSET_BASIS
+    for article_id, link, title in rows[start:]:
+        value = fnv1a_32(f"{article_id or link}\x01{' '.join(title.split())}\x02", value)
+    return f"{len(rows) - start}:{value:08x}"
+
+
+class PageFingerprintCache:
+    """
+    The fingerprint of each URL's last fully processed visit, keeping the
+    max_entries most recently used URLs (PAGE_FINGERPRINT_CACHE_SIZE in
+    naver_cafe_automator.py). Thread-safe: the scraper proposes fingerprints
+    while the analysis thread confirms or forgets earlier pages.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._fingerprints = OrderedDict()  # url -> fingerprint, least recently used first
+        self._proposed = OrderedDict()      # url -> fingerprint of a visit still being processed
+
+    def __len__(self):
+        with self._lock:
+            return len(self._fingerprints)
+
+    def get(self, url):
+        with self._lock:
+            fingerprint = self._fingerprints.get(url)
+            if fingerprint is not None:
+                self._fingerprints.move_to_end(url)
+            return fingerprint
+
+    def is_unchanged(self, url, fingerprint):
+        """True if fingerprint is the one recorded for url."""
+        return fingerprint is not None and self.get(url) == fingerprint
+
+    def put(self, url, fingerprint):
+        with self._lock:
+            self._put(url, fingerprint)
+
+    def _put(self, url, fingerprint):
+        self._fingerprints[url] = fingerprint
+        self._fingerprints.move_to_end(url)
+        while len(self._fingerprints) > self.max_entries:
+            self._fingerprints.popitem(last=False)
+
+    def propose(self, url, fingerprint):
+        """Records the fingerprint of a visit to url; it takes effect when confirm(url) is called."""
+        with self._lock:
+            self._proposed[url] = fingerprint
+            self._proposed.move_to_end(url)
+            while len(self._proposed) > self.max_entries:
+                self._proposed.popitem(last=False)
+
+    def confirm(self, url):
+        """url's proposed fingerprint becomes the one its next visit is compared with."""
+        with self._lock:
+            fingerprint = self._proposed.pop(url, None)
+            if fingerprint is not None:
+                self._put(url, fingerprint)
+
+    def forget(self, url):
+        """
+        Drops url's fingerprints, so its next visit is processed in full
+        (e.g. after a failed analysis or comment).
+        """
+        with self._lock:
+            self._fingerprints.pop(url, None)
+            self._proposed.pop(url, None)
@@ -0,0 +1,174 @@
+"""
+Producer/consumer pipeline for one automation session:
+
+    driver thread --pages--> analysis thread --matches--> driver thread
+    (scrape)                 (analyze, record)             (comment)
+
+A WebDriver session is not thread-safe, so the thread that owns it both
+scrapes and comments; analysis runs on a worker thread. While the driver
+loads page N+1, page N is being analyzed, and its matches are commented on
+the next time the driver thread services the match queue.
+
+Both queues are bounded. When the analysis thread falls behind, submit()
+keeps the driver thread busy commenting until there is room for the page;
+when comments fall behind, the analysis thread waits for room in the match
+queue. The driver thread always drains matches while it waits, so the two
+bounds cannot deadlock.
+"""
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+_POLL_SECONDS = 0.1
+
+
+class PageJob:
+    """One scraped page moving through the pipeline."""
+
+    def __init__(self, url_type, source_url, posts, rule_stats=None, started=None):
+        self.url_type = url_type
+        self.source_url = source_url
+        self.posts = posts
+        self.rule_stats = rule_stats if rule_stats is not None else {}
+        self.started = started if started is not None else time.perf_counter()
+        self.matches = None # Set by the analysis stage
+        self.error = None   # Exception raised by the analysis stage, if any
+        self.failed_comments = 0 # Matches whose comment stage returned False or raised
+        self._pending = 0   # Matches not yet commented on
+
+    def __repr__(self):
+        return f"PageJob({self.url_type!r}, {self.source_url!r}, {len(self.posts)} post(s))"
+
+
+class ScrapePipeline:
+    """
+    analyze(job) runs on the analysis thread and returns the posts that
+    should be commented on. comment(job, post) runs on the driver thread
+    (inside submit, service_comments and drain) and returns False if the
+    comment failed (counted in job.failed_comments). on_page_done(job), if
+    given, runs once every match of the page has been commented on (or
+    right after analysis when there are none, or when analysis failed).
+    """
+
+    def __init__(self, analyze, comment, on_page_done=None, page_queue_size=2, match_queue_size=20):
+        self.analyze = analyze
+        self.comment = comment
+        self.on_page_done = on_page_done
+        self._pages = queue.Queue(maxsize=page_queue_size)
+        self._matches = queue.Queue(maxsize=match_queue_size)
+        self._outstanding = 0 # Submitted pages not yet done
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._analysis_worker, name="analysis-worker", daemon=True)
+            self._thread.start()
+        return self
+
+    # --- Driver thread ---
+
+    def submit(self, job):
+        """Queues a scraped page for analysis, commenting on queued matches while the page queue is full."""
+        with self._lock:
+            self._outstanding += 1
+        while True:
+            try:
+                self._pages.put(job, timeout=_POLL_SECONDS)
+                return
+            except queue.Full:
+                self.service_comments()
+
+    def service_comments(self, timeout=0):
+        """
+        Comments on every match queued so far. With timeout > 0, waits up to
+        that long for the first match. Returns the number of matches handled.
+        """
+        handled = 0
+        while True:
+            try:
+                job, post = self._matches.get(timeout=timeout) if timeout and not handled else self._matches.get_nowait()
+            except queue.Empty:
+                return handled
+            try:
+                commented = self.comment(job, post)
+            except Exception:
+                logger.exception("Comment stage failed for a post from %s", job.source_url)
+                commented = False
+            handled += 1
+            with self._lock:
+                if commented is False:
+                    job.failed_comments += 1
+                job._pending -= 1
+                done = job._pending == 0
+            if done:
+                self._page_done(job)
+
+    def drain(self):
+        """Waits until every submitted page is analyzed and all of its matches are commented on."""
+        while True:
+            with self._lock:
+                if self._outstanding == 0:
+                    return
+            self.service_comments(timeout=_POLL_SECONDS)
+
+    def stop(self, timeout=10):
+        """
+        Stops the analysis thread. Pages and matches still queued are
+        abandoned; posts are only recorded as processed by the stages, so
+        anything abandoned is picked up again on the next run.
+        """
+        if self._thread is None:
+            return
+        while True:
+            try:
+                self._pages.get_nowait()
+            except queue.Empty:
+                break
+        while True:
+            try:
+                self._matches.get_nowait()
+            except queue.Empty:
+                break
+        try:
+            self._pages.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    # --- Analysis thread ---
+
+    def _analysis_worker(self):
+        while True:
+            job = self._pages.get()
+            if job is _STOP:
+                return
+            try:
+                job.matches = list(self.analyze(job))
+            except Exception as e:
+                logger.exception("Analysis stage failed for %s", job.source_url)
+                job.error = e
+                job.matches = []
+            with self._lock:
+                job._pending = len(job.matches)
+            if not job.matches:
+                self._page_done(job)
+                continue
+            for post in job.matches:
+                # Blocks while the match queue is full; the driver thread drains it
+                self._matches.put((job, post))
+
+    def _page_done(self, job):
+        try:
+            if self.on_page_done is not None:
+                self.on_page_done(job)
+        except Exception:
+            logger.exception("Page completion handler failed for %s", job.source_url)
+        finally:
+            with self._lock:
+                self._outstanding -= 1
@@ -0,0 +1,167 @@
+"""
+Adaptive polling of the feed and board URLs.
+
+Each URL's new-post arrival rate is estimated from what its polls found
+(posts per second, exponentially decayed so the estimate follows the time of
+day, with a weak prior so an unpolled URL starts at PRIOR_POSTS_PER_HOUR).
+The poll budget is shared out in proportion to the square root of the rates:
+for Poisson arrivals this minimizes the mean time from posting to detection
+over all posts (a post waits half a poll interval on average, and the
+interval of a URL polled f times per second is 1/f). Busy boards are polled
+more often, quiet ones less, within [min_interval, max_interval].
+
+The total poll rate never exceeds the budget: polls are taken from a token
+bucket refilled at budget polls per second (holding at most one token per
+URL, so a first full round is possible), and the per-URL frequencies add up
+to at most the budget.
+"""
+import math
+import random
+import time
+
+PRIOR_POSTS_PER_HOUR = 1.0   # Rate assumed for a URL before its polls say otherwise
+PRIOR_WEIGHT_SECONDS = 3600  # How much observation time the prior is worth
+RATE_HALF_LIFE_SECONDS = 6 * 3600  # Observations lose half their weight after this long
+
+
+class PollScheduler:
+    """
+    urls are polled at most budget_per_second times per second in total.
+    Call due() to get the URLs to poll now, observe() after each poll with
+    the number of new posts it found, and seconds_until_next() for how long
+    to wait before the next one is due. jitter (0.15: +/-15%) randomizes each
+    interval so polls do not fall on a fixed beat.
+    """
+
+    def __init__(self, urls, budget_per_second, min_interval=60.0, max_interval=3600.0, jitter=0.15,
+                 rng=None, now=None):
+        now = time.monotonic() if now is None else now
+        self.jitter = jitter
+        self._rng = rng or random.Random()
+        self._tokens = 0.0
+        self._token_time = now
+        self._states = {}  # url -> {"posts", "seconds", "last_poll", "jitter"}
+        self.set_limits(budget_per_second, min_interval, max_interval)
+        self.set_urls(urls)
+        self._tokens = float(len(self._states))
+
+    def set_limits(self, budget_per_second, min_interval, max_interval):
+        """Changes the total poll budget (polls per second) and the per-URL interval bounds."""
+        if budget_per_second <= 0:
+            raise ValueError("budget_per_second must be positive")
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("Need 0 < min_interval <= max_interval")
+        self.budget_per_second = budget_per_second
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._intervals = None
+
+    def set_urls(self, urls):
+        """Replaces the polled URLs; URLs already known keep their rate estimate."""
+        urls = list(dict.fromkeys(urls))
+        self._states = {url: self._states.get(url) or {"posts": 0.0, "seconds": 0.0, "last_poll": None, "jitter": 1.0}
+                        for url in urls}
+        self._intervals = None
+
+    @property
+    def urls(self):
+        return list(self._states)
+
+    def rate(self, url):
+        """Estimated new posts per second at url."""
+        state = self._states[url]
+        return (state["posts"] + PRIOR_POSTS_PER_HOUR * PRIOR_WEIGHT_SECONDS / 3600) / \
+            (state["seconds"] + PRIOR_WEIGHT_SECONDS)
+
+    def intervals(self):
+        """{url: target seconds between polls}, from the current rate estimates."""
+        if self._intervals is None:
+            self._intervals = self._allocate()
+        return self._intervals
+
+    def _allocate(self):
+        urls = list(self._states)
+        if not urls:
+            return {}
+        weights = {url: math.sqrt(self.rate(url)) for url in urls}
+        low, high = 1.0 / self.max_interval, 1.0 / self.min_interval
+        if low * len(urls) >= self.budget_per_second:
+            # Not even every URL at max_interval fits the budget: the budget wins
+            return {url: len(urls) / self.budget_per_second for url in urls}
+        # Water-filling: frequencies proportional to the weights, clamped to [low, high];
+        # clamped URLs are fixed and the rest of the budget is shared again.
+        frequencies, free, budget = {}, set(urls), self.budget_per_second
+        while free:
+            total_weight = sum(weights[url] for url in free)
+            scale = budget / total_weight
+            clamped = {url: min(max(weights[url] * scale, low), high) for url in free}
+            fixed = [url for url in free if clamped[url] != weights[url] * scale]
+            if not fixed:
+                frequencies.update(clamped)
+                break
+            for url in fixed:
+                frequencies[url] = clamped[url]
+                budget -= clamped[url]
+                free.discard(url)
+            if budget <= 0:
+                frequencies.update((url, low) for url in free)
+                break
+        return {url: 1.0 / frequency for url, frequency in frequencies.items()}
+
+    def _refill(self, now):
+        self._tokens = min(float(len(self._states)),
+                           self._tokens + (now - self._token_time) * self.budget_per_second)
+        self._token_time = now
+
+    def _next_due(self, url):
+        state = self._states[url]
+        if state["last_poll"] is None:
+            return -math.inf
+        return state["last_poll"] + self.intervals()[url] * state["jitter"]
+
+    def due(self, now=None):
+        """
+        URLs to poll now, most overdue first (never-polled URLs first, in
+        their configured order), limited by the poll budget. Each returned
+        URL uses up one poll of the budget.
+        """
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        overdue = sorted((url for url in self._states if self._next_due(url) <= now), key=self._next_due)
+        selected = overdue[:int(self._tokens)]
+        self._tokens -= len(selected)
+        return selected
+
+    def seconds_until_next(self, now=None):
+        """Seconds until due() can return a URL (0 if one is due and the budget allows it now)."""
+        if not self._states:
+            return math.inf
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        wait_due = min(self._next_due(url) for url in self._states) - now
+        wait_budget = (1.0 - self._tokens) / self.budget_per_second if self._tokens < 1.0 else 0.0
+        return max(wait_due, wait_budget, 0.0)
+
+    def observe(self, url, new_posts, now=None):
+        """
+        Records a poll of url that found new_posts posts not seen before.
+        The first poll of a URL only starts its clock (its new posts may have
+        accumulated for any length of time).
+        """
+        state = self._states.get(url)
+        if state is None:
+            return
+        now = time.monotonic() if now is None else now
+        if state["last_poll"] is not None:
+            elapsed = max(now - state["last_poll"], 0.0)
+            decay = 0.5 ** (elapsed / RATE_HALF_LIFE_SECONDS)
+            state["posts"] = state["posts"] * decay + new_posts
+            state["seconds"] = state["seconds"] * decay + elapsed
+            self._intervals = None
+        state["last_poll"] = now
+        state["jitter"] = self._rng.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+
+    def summary(self):
+        """[(url, posts per hour, seconds between polls), ...] in polling order."""
+        intervals = self.intervals()
+        return [(url, self.rate(url) * 3600, intervals[url]) for url in self._states]
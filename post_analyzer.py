@@ -1,106 +1,238 @@
-import math
-import re
-
-def haversine(lat1, lon1, lat2, lon2):
-    """
-    Calculates the distance in kilometers between two points given their
-    latitudes and longitudes using the Haversine formula.
-    """
-    R = 6371  # Radius of Earth in kilometers
-
-    lat1_rad = math.radians(lat1)
-    lon1_rad = math.radians(lon1)
-    lat2_rad = math.radians(lat2)
-    lon2_rad = math.radians(lon2)
-
-    dlon = lon2_rad - lon1_rad
-    dlat = lat2_rad - lat1_rad
-
-    a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-    distance = R * c
-    return distance
-
-def check_dates(post_text):
-    """
-    Searches for dates like "6월 6일", "6/6", "June 6" etc. and checks for a
-    2-night, 3-day pattern (e.g., "6월 6일 ~ 6월 8일", "6/6 ~ 6/8", "6월 6,7,8일").
-    Specifically looks for the range June 6th to June 8th.
-    Returns: True if the specific 2-night, 3-day (June 6-8) pattern is found, False otherwise.
-    """
-    # Pattern for "6월 6일 ~ 6월 8일" or "6월 6일~6월 8일" (with or without space around ~)
-    pattern1 = r"6월\s*6일\s*~\s*6월\s*8일"
-    # Pattern for "6/6 ~ 6/8" or "6/6~6/8"
-    pattern2 = r"6/6\s*~\s*6/8"
-    # Pattern for "June 6 ~ June 8" or "June 6~June 8" (case-insensitive)
-    pattern3 = r"June\s*6\s*~\s*June\s*8"
-    # Pattern for "6월 6,7,8일" or "6월 6, 7, 8일"
-    pattern4 = r"6월\s*6\s*,\s*7\s*,\s*8\s*일"
-    # Pattern for "June 6,7,8" or "June 6, 7, 8" (case-insensitive)
-    pattern5 = r"June\s*6\s*,\s*7\s*,\s*8"
-    # Pattern for "6/6,7,8" or "6/6, 7, 8"
-    pattern6 = r"6/6\s*,\s*7\s*,\s*8"
-    # Pattern for "6월 6일 부터 6월 8일 까지" (with or without space around 부터/까지)
-    pattern7 = r"6월\s*6일\s*부터\s*6월\s*8일\s*까지"
-    # Pattern for "6월 6일 부터 8일 까지" (short end date)
-    pattern8 = r"6월\s*6일\s*부터\s*8일\s*까지"
-
-
-    if re.search(pattern1, post_text) or \
-       re.search(pattern2, post_text) or \
-       re.search(pattern3, post_text, re.IGNORECASE) or \
-       re.search(pattern4, post_text) or \
-       re.search(pattern5, post_text, re.IGNORECASE) or \
-       re.search(pattern6, post_text) or \
-       re.search(pattern7, post_text) or \
-       re.search(pattern8, post_text):
-        return True
+"""
+Post analysis for Naver Cafe campsite-transfer posts: date, keyword,
+location and feed-region checks, single-post and batch.
+
+Every check works on the normalized view of the post (see text_normalizer:
+full-width characters, tilde variants, NBSP and whitespace runs are unified),
+built once per post and shared by all checks. Checks accept either the raw
+post text or a NormalizedPost.
+
+This module has no browser or sound dependencies, so batch analysis jobs,
+benchmarks and tests can import it cheaply; naver_cafe_automator.py uses it
+for all of its post analysis.
+"""
+import logging
+from collections import namedtuple
+
+from batch_analysis import format_rule_stats, run_rule_chain
+from campsite_index import get_campsite_index
+from date_extractor import DEFAULT_TARGET_WINDOW, extract_date_ranges, range_matches_window
+from geo import get_spatial_index, haversine
+from region_gazetteer import get_region_gazetteer
+from text_normalizer import normalize_post
+
+DEFAULT_MAX_DISTANCE_KM = 150
+DEFAULT_FEED_REGIONS = ("경기", "강원", "충청") # Regions accepted by check_feed_region
+# Campsite names written approximately ("자라섬 캠핑징") still count when no name matches exactly
+# and the similarity is at least this (see CampsiteIndex.find_fuzzy); None disables fuzzy matching.
+FUZZY_CAMPSITE_THRESHOLD = 0.8
+
+# Everything watch matching needs from one post (see extract_post_features):
+# offer (check_keyword), date_windows (frozenset of ((start_month, start_day), (end_month, end_day))),
+# campsites (mentioned campsite_db names) and regions (frozenset of region names).
+PostFeatures = namedtuple("PostFeatures", ["offer", "date_windows", "campsites", "regions"])
+
+logger = logging.getLogger(__name__)
+
+def check_dates(post_text, target_window=DEFAULT_TARGET_WINDOW):
+    """
+    Extracts every stay mentioned in the post (e.g. "6월 6일 ~ 6월 8일", "6/6 ~ 6/8",
+    "June 6,7,8", "6월 6일 부터 8일 까지", "6월 6일 2박 3일") and checks it against
+    target_window. target_window is ((start_month, start_day), (end_month, end_day));
+    the default is June 6th to June 8th (2 nights, 3 days).
+    Returns: True if any mentioned stay matches the target window, False otherwise.
+    """
+    post = normalize_post(post_text)
+    if len(post.digit_spans) < 2: # Every stay needs at least two numbers (a month and a day)
+        return False
+    for date_range in extract_date_ranges(post.text):
+        if range_matches_window(date_range, target_window):
+            return True
     return False
 
 def check_keyword(post_text):
     """
-    Checks if the post text contains the keyword "양도" (offering a transfer)
-    and does NOT contain keywords indicating seeking a transfer (e.g., "구합니다", "구해요").
+    Checks if the post text indicates an OFFER of transfer ("양도")
+    and not a REQUEST for transfer.
+    - Must contain "양도".
+    - Must NOT contain "구합니다" or "구해요" (strong exclusion).
+    - If "양도" is present, it must NOT be accompanied by specific seeking phrases
+      like "받아요", "해주세요", "해주실 분".
+    """
+    post_text = normalize_post(post_text).text
+    # Condition 1: "양도" must be present.
+    if "양도" not in post_text:
+        return False
 
-    Args:
-        post_text (str): The text content of the post.
+    # Condition 2: Strong exclusion keywords - if these exist, always filter out.
+    strong_seeking_keywords = ["구합니다", "구해요"]
+    for keyword in strong_seeking_keywords:
+        if keyword in post_text:
+            return False # Filter out if "구합니다" or "구해요" is present
 
-    Returns:
-        bool: True if "양도" is present and "구합니다"/"구해요" are absent, False otherwise.
-    """
-    has_offer_keyword = "양도" in post_text
-    has_seeking_keyword1 = "구합니다" in post_text
-    has_seeking_keyword2 = "구해요" in post_text
+    # Condition 3: "양도" is present, but check for accompanying seeking phrases.
+    # These phrases only lead to exclusion if "양도" is also present,
+    # implying a request for a transfer someone else is making.
+    accompanying_seeking_phrases = [
+        "받아요",    # e.g., "양도 받아요"
+        "해주세요",  # e.g., "양도 해주세요"
+        "해주실 분"  # e.g., "양도 해주실 분"
+    ]
+    for phrase in accompanying_seeking_phrases:
+        if phrase in post_text:
+            return False # Filter out if "양도" is present with these seeking phrases
 
-    if has_offer_keyword and not has_seeking_keyword1 and not has_seeking_keyword2:
-        return True
-    return False
+    # If "양도" is present and none of the exclusion conditions were met
+    return True
 
-def check_location(post_text, target_lat, target_lon, campsite_db):
+def check_location(post_text, target_lat, target_lon, campsite_db, max_distance_km=DEFAULT_MAX_DISTANCE_KM):
     """
-    Extracts potential campsite names from post_text.
-    For each found campsite name, retrieves its lat/lon from campsite_db.
-    Calculates the distance to target_lat, target_lon using haversine.
-    Returns: True if any mentioned campsite is within 150km, False otherwise.
+    Finds the campsite names from campsite_db mentioned in post_text
+    (one pass over the text via the campsite name index).
+    For each found campsite name, looks up its precomputed distance to
+    target_lat, target_lon (the spatial index computes every campsite's
+    distance once, so this is a bit test per mention).
+    Returns: True if any mentioned campsite is within max_distance_km, False otherwise.
     """
-    for campsite_name, details in campsite_db.items():
-        if campsite_name in post_text:
-            distance = haversine(target_lat, target_lon, details['lat'], details['lon'])
-            if distance <= 150:
-                return True
+    spatial_index = get_spatial_index(campsite_db, [(target_lat, target_lon)])
+    for campsite_name in get_campsite_index(campsite_db).mentioned_names(normalize_post(post_text).text, FUZZY_CAMPSITE_THRESHOLD):
+        if spatial_index.is_eligible(campsite_name, max_distance_km):
+            return True
     return False
 
-def analyze_post(post_text, target_lat, target_lon, campsite_db):
+def check_feed_region(post_text, campsite_db, target_regions=DEFAULT_FEED_REGIONS):
     """
-    Calls check_dates, check_keyword, and check_location.
-    Returns: True if all checks pass, False otherwise.
+    Region check used for 'feed' posts: True if the post mentions a campsite_db
+    campsite whose "region" is in target_regions, or names a place in one of
+    those regions: the region itself or one of its provinces, cities or
+    counties (e.g. "가평" for "경기"; see region_gazetteer).
     """
-    dates_ok = check_dates(post_text)
-    keyword_ok = check_keyword(post_text)
-    location_ok = check_location(post_text, target_lat, target_lon, campsite_db)
+    post_text = normalize_post(post_text).text
+    found_matching_region = False
+    mentioned_campsites_in_db = []
+
+    # 1. Check campsite_db for mentioned campsites and their regions
+    #    (single pass over the post using the campsite name index)
+    for campsite_name in get_campsite_index(campsite_db).mentioned_names(post_text, FUZZY_CAMPSITE_THRESHOLD):
+        camp_info = campsite_db[campsite_name]
+        mentioned_campsites_in_db.append(campsite_name)
+        # Check if camp_info has 'region' and if it's in target_regions
+        if "region" in camp_info and camp_info["region"] in target_regions:
+            logger.debug("Region check (feed): campsite '%s' is in target region %s.", campsite_name, camp_info["region"])
+            found_matching_region = True
+            break # Found a match, no need to check other DB entries or text keywords
+        else:
+            logger.debug("Region check (feed): campsite '%s' region (%s) is not a target region.", campsite_name, camp_info.get("region", "N/A"))
 
-    return dates_ok and keyword_ok and location_ok
+    # 2. If no match from campsite_db, check post_text for region keywords
+    if not found_matching_region:
+        logger.debug("Region check (feed): no campsite_db campsite in a target region (mentioned: %s). Checking region keywords.",
+                     mentioned_campsites_in_db)
+
+        # One scan of the post resolves every place name to its region (gazetteer compiled once)
+        gazetteer = get_region_gazetteer()
+        mentioned_regions = gazetteer.regions_in(post_text)
+        for region in target_regions:
+            if region in mentioned_regions:
+                logger.debug("Region check (feed): found a place in region '%s' in post text.", region)
+                found_matching_region = True
+                break
+            if region not in gazetteer.regions and region in post_text:
+                # A configured region the gazetteer does not know: match its name literally
+                logger.debug("Region check (feed): found region keyword '%s' in post text.", region)
+                found_matching_region = True
+                break
+
+    if not found_matching_region:
+        logger.debug("Region check (feed): not met; post does not appear to be in %s.", list(target_regions))
+        return False
+
+    logger.debug("Region check (feed): MET.")
+    return True
+
+def extract_post_features(post_text, campsite_db, regions=DEFAULT_FEED_REGIONS):
+    """
+    Extracts, in one pass per feature, what a post offers: whether it is a
+    transfer offer, every stay it mentions as a ((start_month, start_day),
+    (end_month, end_day)) window, the campsite_db campsites it names, and its
+    regions: those of the named campsites, of every place named in the text
+    (see region_gazetteer), and any of `regions` unknown to the gazetteer
+    whose name appears in the text. Returns a PostFeatures.
+    """
+    post = normalize_post(post_text)
+    date_windows = frozenset()
+    if len(post.digit_spans) >= 2:
+        date_windows = frozenset(((date_range.start.month, date_range.start.day), (date_range.end.month, date_range.end.day))
+                                 for date_range in extract_date_ranges(post.text))
+    campsites = tuple(get_campsite_index(campsite_db).mentioned_names(post.text, FUZZY_CAMPSITE_THRESHOLD))
+    gazetteer = get_region_gazetteer()
+    found_regions = gazetteer.regions_in(post.text)
+    found_regions.update(campsite_db[name]["region"] for name in campsites if campsite_db[name].get("region"))
+    for region in regions:
+        if region not in gazetteer.regions and region in post.text:
+            found_regions.add(region)
+    return PostFeatures(check_keyword(post), date_windows, campsites, frozenset(found_regions))
+
+def analysis_rules(url_type, target_lat, target_lon, campsite_db, max_distance_km=DEFAULT_MAX_DISTANCE_KM,
+                   target_window=DEFAULT_TARGET_WINDOW, feed_regions=DEFAULT_FEED_REGIONS):
+    """
+    Returns the (name, predicate) checks a post from url_type must pass, or
+    None for an unknown url_type:
+    - None:    keyword, dates, and a campsite within max_distance_km of the target
+    - "board": keyword and dates only
+    - "feed":  keyword, dates, and a campsite or region name in feed_regions
+    """
+    rules = [
+        ("keyword", check_keyword), # Cheapest first; run_rule_chain reorders by measured cost once it has data
+        ("dates", lambda post_text: check_dates(post_text, target_window)),
+    ]
+    if url_type is None:
+        rules.append(("location", lambda post_text: check_location(post_text, target_lat, target_lon, campsite_db, max_distance_km)))
+    elif url_type == "feed":
+        rules.append(("region", lambda post_text: check_feed_region(post_text, campsite_db, feed_regions)))
+    elif url_type != "board":
+        return None
+    return rules
+
+def analyze_post(post_text, target_lat, target_lon, campsite_db, max_distance_km=DEFAULT_MAX_DISTANCE_KM, url_type=None,
+                 target_window=DEFAULT_TARGET_WINDOW, feed_regions=DEFAULT_FEED_REGIONS):
+    """
+    Applies the checks for url_type (see analysis_rules) in order, stopping at
+    the first one that fails.
+    Returns: True if all checks pass, False otherwise (always False for an
+    unknown url_type).
+    """
+    rules = analysis_rules(url_type, target_lat, target_lon, campsite_db, max_distance_km, target_window, feed_regions)
+    if rules is None:
+        logger.warning("Post analysis: unknown url_type '%s'. Defaulting to False.", url_type)
+        return False
+    post = normalize_post(post_text) # Normalized once, shared by every check
+    for name, predicate in rules:
+        if not predicate(post):
+            logger.debug("Post analysis (%s): %s criteria not met.", url_type, name)
+            return False
+    return True
+
+def analyze_posts(posts, target_lat, target_lon, campsite_db, max_distance_km=DEFAULT_MAX_DISTANCE_KM, url_type=None,
+                  rule_stats=None, rejected_by=None, target_window=DEFAULT_TARGET_WINDOW, feed_regions=DEFAULT_FEED_REGIONS):
+    """
+    Batch version of analyze_post for a whole scraped page (post dicts with a
+    "text" key, or plain post texts). Each post is normalized once and stops
+    at the first failing check, and checks are reordered by measured cost
+    per rejection (see batch_analysis.run_rule_chain), so e.g. the cheap
+    keyword check runs before the date extraction once it has proven selective.
+    Returns (results, rule_stats): a list of booleans aligned with posts and
+    a dict of per-check RuleStats (evaluated, rejected, seconds) that may be
+    passed back in to keep the learned ordering. If rejected_by is a list, the
+    name of the check that rejected each post (None for matches) is appended.
+    """
+    rules = analysis_rules(url_type, target_lat, target_lon, campsite_db, max_distance_km, target_window, feed_regions)
+    if rules is None:
+        logger.warning("Post analysis: unknown url_type '%s'. Defaulting to False.", url_type)
+        if rejected_by is not None:
+            rejected_by.extend(["url_type"] * len(posts))
+        return [False] * len(posts), rule_stats if rule_stats is not None else {}
+    return run_rule_chain(posts, rules, rule_stats, rejected_by, prepare=normalize_post)
 
 
 def post_comment_stub(post_identifier, comment_text):
@@ -190,3 +322,8 @@ if __name__ == "__main__":
         if analysis_result:
             post_comment_stub(f"manual_post_id_{index}", "저요")
     print("--- End of Processing List ---")
+
+    # --- Batch analysis of the same list ---
+    batch_results, batch_rule_stats = analyze_posts(manual_posts, target_lat_suwon, target_lon_suwon, campsite_database)
+    print(f"\nBatch analysis results: {batch_results}") # Expected: [True, False, False, False, True]
+    print(f"Rule stats: {format_rule_stats(batch_rule_stats)}")
@@ -0,0 +1,111 @@
+"""
+Seeded generator for synthetic Korean campsite-transfer posts and campsite
+databases, shared by analyzer_benchmark.py and replay_harness.py.
+The same seed always produces the same corpus, so benchmark numbers are
+comparable across runs.
+"""
+import random
+
+# Rough centres of the regions used in CAMPSITE_DB "region" fields.
+REGION_CENTRES = {
+    "경기": (37.45, 127.20),
+    "강원": (37.80, 128.30),
+    "충청": (36.60, 127.30),
+    "전라": (35.30, 127.00),
+    "경상": (35.80, 128.70),
+    "제주": (33.40, 126.55),
+}
+REGION_WORDS = {
+    "경기": ["경기", "경기도", "가평", "용인"],
+    "강원": ["강원", "강원도", "홍천", "평창"],
+    "충청": ["충남", "충북", "충청남도", "태안"],
+    "전라": ["전북", "전남", "전라도", "무주"],
+    "경상": ["경북", "경남", "경상도", "거제"],
+    "제주": ["제주", "제주도", "서귀포"],
+}
+# The region matching posts are placed in (close to TARGET_LAT/TARGET_LON in Suwon).
+MATCH_REGION = "경기"
+
+_SYLLABLES = "가나다라마바사아자차카타파하강산숲솔별달해봄빛들물섬골길내뜰"
+_CAMPSITE_SUFFIXES = ["캠핑장", "오토캠핑장", "글램핑", " 캠핑장", " 자연휴양림", "캠핑리조트"]
+
+_MATCHING_DATES = ["6월 6일 ~ 6월 8일", "6/6 ~ 6/8", "6월 6,7,8일", "6월 6일부터 8일까지",
+                   "June 6 ~ June 8", "6월 6일에서 8일까지", "6월 6일 2박 3일"]
+_OTHER_DATES = ["6월 13일 ~ 6월 15일", "7/4 ~ 7/6", "8월 1일", "이번 주말", "6월 5일~6월 7일", "9/20, 21, 22"]
+_OFFER_PHRASES = ["양도합니다.", "양도해요.", "양도 원합니다.", "급하게 양도합니다!"]
+_NON_OFFER_PHRASES = ["양도 구합니다.", "양도 받아요.", "자리 구해요.", "같이 가실 분 계신가요?", "후기 남겨요."]
+_FILLER = [
+    "사정이 생겨서 못 가게 되었어요.", "좋은 자리입니다.", "연락 주세요.", "사이트 번호는 쪽지로 알려드려요.",
+    "전기 사용 가능한 사이트예요.", "아이들과 가기 좋은 곳입니다.", "매너타임 잘 지켜주실 분이면 좋겠어요.",
+    "결제 금액 그대로 넘깁니다.", "선착순입니다.", "댓글 남겨주시면 순서대로 연락드릴게요.",
+]
+
+
+def generate_campsite_db(size, seed=0):
+    """
+    Returns a CAMPSITE_DB-style dict with `size` uniquely named campsites,
+    each with "lat", "lon" and "region". Roughly a sixth are in MATCH_REGION.
+    """
+    rng = random.Random(seed)
+    regions = list(REGION_CENTRES)
+    campsite_db = {}
+    while len(campsite_db) < size:
+        name = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))) + rng.choice(_CAMPSITE_SUFFIXES)
+        if name in campsite_db:
+            name = f"{name}{len(campsite_db)}"
+        region = regions[len(campsite_db) % len(regions)]
+        centre_lat, centre_lon = REGION_CENTRES[region]
+        campsite_db[name] = {
+            "lat": round(centre_lat + rng.uniform(-0.35, 0.35), 5),
+            "lon": round(centre_lon + rng.uniform(-0.35, 0.35), 5),
+            "region": region,
+        }
+    return campsite_db
+
+
+def group_by_region(campsite_db):
+    """Returns {region: [campsite_name, ...]} for a CAMPSITE_DB-style dict."""
+    campsites_by_region = {}
+    for name, info in (campsite_db or {}).items():
+        campsites_by_region.setdefault(info.get("region"), []).append(name)
+    return campsites_by_region
+
+
+def generate_post(rng, matching, campsites_by_region, min_filler=1, max_filler=6):
+    """
+    Builds one post. Matching posts have the target dates, an offer keyword
+    and a campsite (from campsites_by_region, see group_by_region) or region
+    word from MATCH_REGION; non-matching posts fail at least one of those.
+    """
+
+    if matching:
+        near = campsites_by_region.get(MATCH_REGION)
+        place = rng.choice(near) if near else rng.choice(REGION_WORDS[MATCH_REGION])
+        parts = [rng.choice(_MATCHING_DATES), place, rng.choice(_OFFER_PHRASES)]
+        if near and rng.random() < 0.5:
+            parts.append(rng.choice(REGION_WORDS[MATCH_REGION]))
+    else:
+        failure = rng.choice(["dates", "keyword", "location"])
+        region = rng.choice(list(REGION_WORDS)) if failure != "location" else \
+            rng.choice([r for r in REGION_WORDS if r not in (MATCH_REGION, "강원", "충청")])
+        names = campsites_by_region.get(region)
+        place = rng.choice(names) if names and rng.random() < 0.7 else rng.choice(REGION_WORDS[region])
+        parts = [
+            rng.choice(_OTHER_DATES) if failure == "dates" else rng.choice(_MATCHING_DATES + _OTHER_DATES),
+            place,
+            rng.choice(_NON_OFFER_PHRASES) if failure == "keyword" else rng.choice(_OFFER_PHRASES + _NON_OFFER_PHRASES),
+        ]
+    parts.extend(rng.choice(_FILLER) for _ in range(rng.randint(min_filler, max_filler)))
+    rng.shuffle(parts)
+    return " ".join(parts)
+
+
+def generate_posts(count, match_ratio=0.1, seed=0, campsite_db=None, min_filler=1, max_filler=6):
+    """
+    Returns `count` post texts of varied length, about match_ratio of which
+    satisfy every analyzer criterion.
+    """
+    rng = random.Random(seed)
+    campsites_by_region = group_by_region(campsite_db)
+    return [generate_post(rng, rng.random() < match_ratio, campsites_by_region, min_filler, max_filler)
+            for _ in range(count)]
@@ -0,0 +1,174 @@
+"""
+Gazetteer of Korean place names resolved to the broad regions used in the
+configuration ("경기", "강원", "충청", ...): provinces and metropolitan
+cities under all their usual spellings, and every 시/군 (e.g. "가평",
+"가평군", "홍천") under its parent region.
+
+All names are compiled into one regular expression (a trie of alternatives),
+so a post is scanned once whatever the number of places. 시/군 names only
+match at the start of a word (not right after another Hangul syllable);
+province-level names match anywhere, as in "서울경기 양도".
+"""
+import re
+
+# Broad region -> province-level names (provinces, metropolitan and special cities)
+PROVINCE_NAMES = {
+    "서울": ("서울", "서울시", "서울특별시"),
+    "인천": ("인천", "인천시", "인천광역시"),
+    "경기": ("경기", "경기도"),
+    "강원": ("강원", "강원도", "강원특별자치도"),
+    "충청": ("충청", "충청도", "충청남북도", "충청남도", "충청북도", "충남", "충북",
+             "대전", "대전시", "대전광역시", "세종", "세종시", "세종특별자치시"),
+    "전라": ("전라", "전라도", "전라남도", "전라북도", "전북특별자치도", "전남", "전북", "광주광역시"),
+    "경상": ("경상", "경상도", "경상남도", "경상북도", "경남", "경북",
+             "부산", "부산시", "부산광역시", "대구", "대구시", "대구광역시", "울산", "울산시", "울산광역시"),
+    "제주": ("제주", "제주도", "제주특별자치도"),
+}
+
+# Broad region -> 시/군 names without their 시/군 suffix
+DISTRICT_NAMES = {
+    "인천": ("강화", "옹진"),
+    "경기": ("수원", "성남", "고양", "용인", "부천", "안산", "안양", "남양주", "화성", "평택", "의정부", "시흥",
+             "파주", "김포", "광명", "광주", "군포", "하남", "오산", "이천", "안성", "의왕", "양주", "구리",
+             "포천", "동두천", "과천", "여주", "양평", "가평", "연천"),
+    "강원": ("춘천", "원주", "강릉", "동해", "태백", "속초", "삼척", "홍천", "횡성", "영월", "평창", "정선",
+             "철원", "화천", "양구", "인제", "고성", "양양"),
+    "충청": ("청주", "충주", "제천", "보은", "옥천", "영동", "증평", "진천", "괴산", "음성", "단양",
+             "천안", "공주", "보령", "아산", "서산", "논산", "계룡", "당진", "금산", "부여", "서천", "청양",
+             "홍성", "예산", "태안"),
+    "전라": ("전주", "군산", "익산", "정읍", "남원", "김제", "완주", "진안", "무주", "장수", "임실", "순창",
+             "고창", "부안", "목포", "여수", "순천", "나주", "광양", "담양", "곡성", "구례", "고흥", "보성",
+             "화순", "장흥", "강진", "해남", "영암", "무안", "함평", "영광", "장성", "완도", "진도", "신안"),
+    "경상": ("포항", "경주", "김천", "안동", "구미", "영주", "영천", "상주", "문경", "경산", "군위", "의성",
+             "청송", "영양", "영덕", "청도", "고령", "성주", "칠곡", "예천", "봉화", "울진", "울릉",
+             "창원", "진주", "통영", "사천", "김해", "밀양", "거제", "양산", "의령", "함안", "창녕", "고성",
+             "남해", "하동", "산청", "함양", "거창", "합천"),
+    "제주": ("서귀포",),
+}
+
+# 시/군 names that are also everyday words or names (고양이, 음성, 예산, 공주, 영양, 진도, 완주 "finishing",
+# 진주 "pearl", 이천 "2,000", ...) or name places in two regions: these only count with their
+# suffix, e.g. "고양시", "음성군".
+SUFFIX_REQUIRED = frozenset({
+    "고양", "화성", "안성", "양주", "구리", "광주", "동해", "고성", "인제", "보은", "음성", "공주", "부여",
+    "예산", "장수", "영광", "장성", "강진", "진도", "무안", "구미", "상주", "영양", "고령", "봉화", "양산",
+    "남해", "거창", "성주", "청도", "의성", "영주", "서산", "금산", "아산", "안산",
+    "완주", "오산", "진주", "영동", "장흥", "이천", "사천", "신안", "광명",
+})
+DISTRICT_SUFFIXES = ("시", "군")
+
+
+def default_places():
+    """{place name: (broad region, ...)} built from the tables above."""
+    places = {}
+    for region, names in PROVINCE_NAMES.items():
+        for name in names:
+            places.setdefault(name, []).append(region)
+    for region, names in DISTRICT_NAMES.items():
+        for name in names:
+            spellings = [name + suffix for suffix in DISTRICT_SUFFIXES]
+            if name not in SUFFIX_REQUIRED:
+                spellings.append(name)
+            for spelling in spellings:
+                if region not in places.setdefault(spelling, []):
+                    places[spelling].append(region)
+    return {name: tuple(regions) for name, regions in places.items()}
+
+
+def province_spellings():
+    """Every spelling in PROVINCE_NAMES (matched inside words too)."""
+    return frozenset(name for names in PROVINCE_NAMES.values() for name in names)
+
+
+def _trie_pattern(words):
+    """Regex matching any of words, written as a trie so the engine never retries shared prefixes."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy: the longest spelling wins ("경기도" over "경기")
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class RegionGazetteer:
+    """
+    places maps each place name to the broad region(s) it belongs to (a name
+    shared by two regions maps to both). regions_in(text) resolves every
+    mentioned place in a single scan. Names only match at the start of a
+    word, except those in anywhere, which also match inside one.
+    """
+
+    def __init__(self, places, anywhere=()):
+        self.places = dict(places)
+        self.regions = frozenset(region for regions in self.places.values() for region in regions)
+        anywhere = [name for name in anywhere if name in self.places]
+        if self.places:
+            # The leading first-character class lets the engine skip ahead cheaply before the word-start test.
+            # At the start of a word any name matches (the longest wins); inside a word only the anywhere names.
+            first_chars = "".join(re.escape(char) for char in sorted({name[0] for name in self.places}))
+            pattern = f"(?=[{first_chars}])(?:(?<![가-힣]){_trie_pattern(self.places)}"
+            pattern += f"|{_trie_pattern(anywhere)})" if anywhere else ")"
+        else:
+            pattern = "(?!)"
+        self._pattern = re.compile(pattern)
+
+    def __len__(self):
+        return len(self.places)
+
+    def find_all(self, text):
+        """[(place name, regions, start, end), ...] for every place mentioned in text, in order."""
+        places = self.places
+        return [(match.group(), places[match.group()], match.start(), match.end())
+                for match in self._pattern.finditer(text)]
+
+    def regions_in(self, text):
+        """The set of broad regions of every place mentioned in text."""
+        places = self.places
+        found = set()
+        for name in self._pattern.findall(text):
+            found.update(places[name])
+        return found
+
+
+_gazetteer = None
+
+
+def get_region_gazetteer():
+    """The default RegionGazetteer, compiled on first use and then shared."""
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = RegionGazetteer(default_places(), anywhere=province_spellings())
+    return _gazetteer
+
+
+if __name__ == "__main__":
+    # Self-checks: (post text, regions it should resolve to)
+    cases = [
+        ("가평 자라섬 캠핑장 양도", {"경기"}),
+        ("서울경기 양도", {"서울", "경기"}),
+        ("충청남도 태안", {"충청"}),
+        ("완주군 캠핑장", {"전라"}),
+        ("카가평 캠핑장", set()),            # Not at the start of a word
+        ("고양이랑 캠핑", set()),             # Everyday words need the 시/군 suffix
+        ("마라톤 완주 기념 양도", set()),
+        ("진주 목걸이 드려요", set()),
+        ("이천원 할인", set()),
+    ]
+    gazetteer = get_region_gazetteer()
+    failures = 0
+    for text, expected in cases:
+        result = gazetteer.regions_in(text)
+        print(f"{'ok  ' if result == expected else 'FAIL'} {text!r}: {sorted(result)} (expected {sorted(expected)})")
+        failures += result != expected
+    print(f"{len(cases) - failures}/{len(cases)} region checks passed.")
+    raise SystemExit(1 if failures else 0)
@@ -0,0 +1,262 @@
+"""
+Offline replay harness for naver_cafe_automator.
+
+Starts a local HTTP server that stands in for Naver (login page, feed/board
+pages with a `cafe_main` iframe of `div.article` rows, article pages with a
+`CommentFrame` comment form), points the automator at it, and runs complete
+automation cycles under headless Chrome. Reports throughput (posts/sec) and
+per-stage latency so pipeline changes can be measured without network access.
+The login sets a session cookie that list pages require, so --http-fetch
+(the automator's HTTP_FETCH_MODE) is exercised with the browser's cookies.
+
+Usage:
+    python replay_harness.py [--boards 3] [--posts-per-board 50] [--match-ratio 0.1]
+                             [--cycles 1] [--seed 42] [--recorded-dir DIR] [--json-out FILE] [--lean]
+                             [--http-fetch]
+
+Pages are synthetic by default. With --recorded-dir, any request path that
+exists as a file under DIR (e.g. DIR/board/1/list) is served from disk
+instead, so saved copies of real pages can be replayed.
+"""
+import argparse
+import html
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import naver_cafe_automator as automator
+import post_corpus
+from metrics import REGISTRY
+
+SESSION_COOKIE = "NID_SES=replay-session"
+
+
+class ReplayFixtures:
+    """Synthetic feed, board and article content (from post_corpus) served by the replay server."""
+
+    def __init__(self, boards=3, posts_per_board=50, match_ratio=0.1, seed=42, campsite_db=None):
+        self.lists = {}      # list name ("feed", "1", "2", ...) -> [(article_id, text), ...] newest first
+        self.comments = []   # (article_id, comment_text) received by the server
+        self._lock = threading.Lock()
+        next_article_id = 100000
+        for list_offset, list_name in enumerate(["feed"] + [str(n) for n in range(1, boards + 1)]):
+            texts = post_corpus.generate_posts(posts_per_board, match_ratio, seed + list_offset, campsite_db)
+            posts = []
+            for text in texts:
+                next_article_id += 1
+                posts.append((next_article_id, text))
+            posts.reverse()
+            self.lists[list_name] = posts
+
+    def record_comment(self, article_id, comment_text):
+        with self._lock:
+            self.comments.append((article_id, comment_text))
+
+
+def _page(body):
+    return f"<!DOCTYPE html><html><head><meta charset='utf-8'></head><body>{body}</body></html>"
+
+
+def make_handler(fixtures, recorded_dir=None):
+    class ReplayHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # Keep-alive, as Naver serves it; every response sets Content-Length
+
+        def log_message(self, format, *args):
+            pass # Keep the harness output readable
+
+        def _send(self, status, body="", headers=None):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            parts = [part for part in url.path.split("/") if part]
+
+            if recorded_dir:
+                recorded_path = os.path.join(recorded_dir, *parts)
+                if parts and os.path.isfile(recorded_path):
+                    with open(recorded_path, encoding="utf-8") as f:
+                        return self._send(200, f.read())
+
+            if url.path == "/nidlogin.login":
+                return self._send(200, _page(
+                    "<form method='post' action='/login'>"
+                    "<input id='id' name='id'><input id='pw' name='pw' type='password'>"
+                    "<button id='log.login' type='submit'>로그인</button></form>"))
+            if url.path == "/home":
+                return self._send(200, _page("<p>logged in</p>"))
+            if parts[:1] in (["feed"], ["board"]) and len(parts) <= 2:
+                list_name = "feed" if parts[0] == "feed" else parts[1]
+                return self._send(200, _page(f"<iframe id='cafe_main' src='/list/{list_name}'></iframe>"))
+            if parts[:1] == ["list"] and len(parts) == 2 and parts[1] in fixtures.lists:
+                if SESSION_COOKIE not in (self.headers.get("Cookie") or ""):
+                    return self._send(403, _page("login required"))
+                rows = "".join(
+                    f"<div class='article'><a class='article_link' href='/article?articleid={article_id}'>"
+                    f"{html.escape(text)}</a></div>"
+                    for article_id, text in fixtures.lists[parts[1]])
+                return self._send(200, _page(rows))
+            if url.path == "/article":
+                article_id = query.get("articleid", [""])[0]
+                return self._send(200, _page(
+                    f"<p>article {html.escape(article_id)}</p>"
+                    f"<iframe id='CommentFrame' src='/comment_frame?articleid={html.escape(article_id)}'></iframe>"))
+            if url.path == "/comment_frame":
+                article_id = html.escape(query.get("articleid", [""])[0])
+                return self._send(200, _page(
+                    f"<form method='post' action='/comment?articleid={article_id}'>"
+                    "<textarea class='comment_textarea' name='comment'></textarea>"
+                    "<button class='btn_register' type='submit'>등록</button></form>"))
+            return self._send(404, _page("not found"))
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            form = parse_qs(self.rfile.read(length).decode("utf-8"))
+            if url.path == "/login":
+                return self._send(303, "", {"Location": "/home", "Set-Cookie": f"{SESSION_COOKIE}; Path=/"})
+            if url.path == "/comment":
+                article_id = parse_qs(url.query).get("articleid", [""])[0]
+                fixtures.record_comment(article_id, form.get("comment", [""])[0])
+                return self._send(200, _page("<p>comment registered</p>"))
+            return self._send(404, _page("not found"))
+
+    return ReplayHandler
+
+
+class StageTimer:
+    """Wraps automator functions so every call's wall time is recorded per stage."""
+
+    def __init__(self):
+        self.samples = {}  # stage name -> [seconds, ...]
+
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.samples.setdefault(stage, []).append(time.perf_counter() - started)
+        return timed
+
+    def summary(self):
+        summary = {}
+        for stage, samples in self.samples.items():
+            ordered = sorted(samples)
+            summary[stage] = {
+                "calls": len(samples),
+                "total_ms": sum(samples) * 1000,
+                "mean_ms": statistics.fmean(samples) * 1000,
+                "p50_ms": ordered[len(ordered) // 2] * 1000,
+                "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                "max_ms": ordered[-1] * 1000,
+            }
+        return summary
+
+
+def run_replay(boards=3, posts_per_board=50, match_ratio=0.1, cycles=1, seed=42, recorded_dir=None, lean=False,
+               http_fetch=False):
+    """
+    Runs `cycles` automation cycles against a local replay server and returns
+    a report dict with throughput and per-stage latency. lean=True uses the
+    automator's lean browser profile (LEAN_BROWSER_PROFILE); http_fetch=True
+    fetches post lists over HTTP (HTTP_FETCH_MODE).
+    """
+    fixtures = ReplayFixtures(boards, posts_per_board, match_ratio, seed, automator.CAMPSITE_DB)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(fixtures, recorded_dir))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # Point the automator at the replay server and switch off human-like delays and sound.
+    automator.NAVER_LOGIN_URL = f"{base_url}/nidlogin.login"
+    automator.FEED_URL = f"{base_url}/feed"
+    automator.BOARD_URLS = [f"{base_url}/board/{n}" for n in range(1, boards + 1)]
+    automator.DELAY_SCALE = 0
+    automator.ENABLE_SOUND_ALERT = False
+    automator.LEAN_BROWSER_PROFILE = lean
+    automator.HTTP_FETCH_MODE = http_fetch
+    automator.METRICS_PORT = None # The report includes the metrics snapshot instead
+    automator.LOG_JSON_PATH = None
+    state_dir = tempfile.mkdtemp(prefix="replay_harness_")
+    automator.SEEN_POSTS_DB_PATH = os.path.join(state_dir, "seen_posts.sqlite3")
+
+    timer = StageTimer()
+    scraped_counts = []
+
+    def counting(scrape):
+        def counting_scrape(*args, **kwargs):
+            posts = scrape(*args, **kwargs)
+            scraped_counts.append(len(posts))
+            return posts
+        return counting_scrape
+
+    automator.scrape_cafe_posts = counting(timer.wrap("scrape", automator.scrape_cafe_posts))
+    automator.scrape_cafe_posts_http = counting(timer.wrap("scrape", automator.scrape_cafe_posts_http))
+    automator.login_to_naver = timer.wrap("login", automator.login_to_naver)
+    automator.analyze_posts = timer.wrap("analysis", automator.analyze_posts)
+    automator.post_comment = timer.wrap("comment", automator.post_comment)
+
+    started = time.perf_counter()
+    try:
+        automator.run_automation("replay_user", "replay_password", max_cycles=cycles, headless=True)
+    finally:
+        elapsed = time.perf_counter() - started
+        server.shutdown()
+        server.server_close()
+
+    posts_scraped = sum(scraped_counts)
+    return {
+        "cycles": cycles,
+        "lean": lean,
+        "http_fetch": http_fetch,
+        "elapsed_s": elapsed,
+        "posts_scraped": posts_scraped,
+        "posts_per_sec": posts_scraped / elapsed if elapsed else 0.0,
+        "comments_received": len(fixtures.comments),
+        "stages": timer.summary(),
+        "metrics": REGISTRY.snapshot(),
+    }
+
+
+def print_report(report):
+    print("\n=== Replay report ===")
+    print(f"Cycles: {report['cycles']}  Lean profile: {report['lean']}  HTTP fetch: {report['http_fetch']}  Elapsed: {report['elapsed_s']:.2f} s  "
+          f"Posts scraped: {report['posts_scraped']}  Throughput: {report['posts_per_sec']:.1f} posts/sec  "
+          f"Comments received: {report['comments_received']}")
+    print(f"{'stage':<10}{'calls':>7}{'total ms':>12}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for stage, stats in report["stages"].items():
+        print(f"{stage:<10}{stats['calls']:>7}{stats['total_ms']:>12.1f}{stats['mean_ms']:>10.1f}"
+              f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['max_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Naver Cafe automator against a local replay server.")
+    parser.add_argument("--boards", type=int, default=3)
+    parser.add_argument("--posts-per-board", type=int, default=50)
+    parser.add_argument("--match-ratio", type=float, default=0.1)
+    parser.add_argument("--cycles", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--recorded-dir", help="Serve files under this directory instead of synthetic pages")
+    parser.add_argument("--json-out", help="Also write the report as JSON to this file")
+    parser.add_argument("--lean", action="store_true", help="Use the automator's lean headless browser profile")
+    parser.add_argument("--http-fetch", action="store_true", help="Fetch post lists over HTTP (HTTP_FETCH_MODE)")
+    args = parser.parse_args()
+
+    replay_report = run_replay(args.boards, args.posts_per_board, args.match_ratio, args.cycles,
+                               args.seed, args.recorded_dir, args.lean, args.http_fetch)
+    print_report(replay_report)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(replay_report, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,187 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Post states recorded in the store. Any recorded post is skipped on later cycles.
+STATUS_ANALYZED = "analyzed"      # Analyzed, did not match (or matched while not logged in)
+STATUS_QUEUED = "queued"          # Matched and waiting to be commented on; cleared on startup (never attempted)
+STATUS_COMMENTING = "commenting"  # Comment submission started; left behind if the script crashed mid-comment
+STATUS_COMMENTED = "commented"    # Comment submitted successfully
+
+_ARTICLE_ID_RE = re.compile(r"(?:articleid=|/articles/)(\d+)", re.IGNORECASE)
+_CAFE_ID_RE = re.compile(r"(?:clubid=|/cafes/)(\d+)", re.IGNORECASE)
+_LEGACY_ARTICLE_KEY_RE = re.compile(r"^article:\d+$")
+SCHEMA_VERSION = 1  # 1: article keys include the cafe id
+
+
+def article_id_from_link(link):
+    """Extracts the numeric Naver Cafe article id from a post link, or returns None."""
+    if not link:
+        return None
+    match = _ARTICLE_ID_RE.search(link)
+    return match.group(1) if match else None
+
+
+def cafe_id_from_link(link):
+    """Extracts the numeric Naver Cafe id (clubid) from a post link, or returns None."""
+    if not link:
+        return None
+    match = _CAFE_ID_RE.search(link)
+    return match.group(1) if match else None
+
+
+def post_article_id(post):
+    """
+    Article id of a scraped post: the "article_id" the scraper recorded,
+    else the id parsed from its link (or "id"), else None.
+    """
+    return post.get("article_id") or article_id_from_link(post.get("link")) or article_id_from_link(str(post.get("id") or ""))
+
+
+def post_key(post):
+    """
+    Stable dedup key for a scraped post dict ({"text", "link", "id", "article_id"}):
+    the cafe and article id when the link carries them (article ids are only
+    unique within a cafe, and the feed mixes cafes; links without a clubid
+    are keyed by the article id alone), otherwise the link itself, otherwise
+    a hash of the post text (scrape_cafe_posts falls back to placeholder
+    links/ids that are not unique across pages).
+    """
+    link = post.get("link") or ""
+    article_id = post_article_id(post)
+    if article_id:
+        cafe_id = cafe_id_from_link(link)
+        return f"article:{cafe_id}:{article_id}" if cafe_id else f"article:{article_id}"
+    if link.startswith("http"):
+        return f"link:{link}"
+    return "text:" + hashlib.sha1(post.get("text", "").encode("utf-8")).hexdigest()
+
+
+class SeenPostStore:
+    """
+    Persistent record of posts already processed, so each cycle only analyzes
+    new articles and a restart never comments on the same post twice.
+    Also keeps the per-board high-water mark (highest article id processed)
+    used by scrape_cafe_posts to stop reading at already-seen articles.
+
+    Keys live in a SQLite file (committed on every write) and are mirrored in
+    an in-memory set, so membership checks never touch the disk.
+    The store may be shared between threads (e.g. the analysis and driver
+    threads of pipeline.ScrapePipeline); writes are serialized by a lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_posts ("
+            " key TEXT PRIMARY KEY, status TEXT NOT NULL, link TEXT, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS high_water_marks ("
+            " url TEXT PRIMARY KEY, article_id INTEGER NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            self._migrate()
+        with self._conn:
+            # Matches queued by an earlier run that stopped before commenting on them are picked up again
+            self._conn.execute("DELETE FROM seen_posts WHERE status = ?", (STATUS_QUEUED,))
+        self._keys = {row[0] for row in self._conn.execute("SELECT key FROM seen_posts")}
+        self._high_water_marks = dict(self._conn.execute("SELECT url, article_id FROM high_water_marks"))
+
+    def _migrate(self):
+        """Re-keys rows stored before article keys carried the cafe id (article:<id> -> article:<cafe>:<id>)."""
+        rows = self._conn.execute("SELECT key, link FROM seen_posts WHERE key LIKE 'article:%'").fetchall()
+        with self._conn:
+            for key, link in rows:
+                if not _LEGACY_ARTICLE_KEY_RE.match(key):
+                    continue
+                new_key = post_key({"link": link or ""})
+                if new_key != key and new_key.startswith("article:"):
+                    self._conn.execute("UPDATE OR REPLACE seen_posts SET key = ? WHERE key = ?", (new_key, key))
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, post):
+        return post_key(post) in self._keys
+
+    def is_seen(self, post):
+        """True if the post was already analyzed or commented on (in this run or an earlier one)."""
+        return post_key(post) in self._keys
+
+    def filter_new(self, posts):
+        """Returns only the posts that have not been processed yet, preserving order."""
+        return [post for post in posts if post_key(post) not in self._keys]
+
+    def mark(self, post, status=STATUS_ANALYZED):
+        """Records the post with the given status and commits immediately."""
+        key = post_key(post)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO seen_posts (key, status, link, updated_at) VALUES (?, ?, ?, ?)",
+                (key, status, post.get("link"), time.time()),
+            )
+            self._conn.commit()
+            self._keys.add(key)
+
+    def forget(self, post):
+        """Removes the post so it is picked up again next cycle (e.g. after a failed comment)."""
+        key = post_key(post)
+        with self._lock:
+            self._conn.execute("DELETE FROM seen_posts WHERE key = ?", (key,))
+            self._conn.commit()
+            self._keys.discard(key)
+
+    def status(self, post):
+        """Returns the recorded status of the post, or None if it has not been seen."""
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM seen_posts WHERE key = ?", (post_key(post),)).fetchone()
+        return row[0] if row else None
+
+    def get_high_water_mark(self, url):
+        """Highest article id already processed for the board URL, or None if none recorded."""
+        return self._high_water_marks.get(url)
+
+    def update_high_water_mark(self, url, posts):
+        """
+        Raises the board's high-water mark to the highest article id among posts.
+        The mark stays below any post that is not recorded in the store (e.g. a
+        failed comment that was forgotten) so that post is read again next
+        cycle, and it never moves backwards. Returns the (possibly unchanged) mark.
+        """
+        with self._lock:
+            seen_ids, unseen_ids = [], []
+            for post in posts:
+                article_id = post_article_id(post)
+                if article_id:
+                    (seen_ids if post_key(post) in self._keys else unseen_ids).append(int(article_id))
+            current = self._high_water_marks.get(url)
+            if not seen_ids:
+                return current
+            mark = max(seen_ids)
+            if unseen_ids:
+                mark = min(mark, min(unseen_ids) - 1)
+            if current is not None and mark <= current:
+                return current
+            self._conn.execute(
+                "INSERT OR REPLACE INTO high_water_marks (url, article_id, updated_at) VALUES (?, ?, ?)",
+                (url, mark, time.time()),
+            )
+            self._conn.commit()
+            self._high_water_marks[url] = mark
+            return mark
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,72 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+# Tilde look-alikes used in date ranges ("6/6∼6/8", "6월 6일〜8일"): U+223C, U+301C,
+# U+2053 and the full-width U+FF5E (which NFKC maps as well).
+_TILDE_RE = re.compile("[\u223c\u301c\uff5e\u2053]")
+# Zero-width characters that split words when text is pasted from other sites.
+_ZERO_WIDTH_RE = re.compile("[\u200b\u200c\u200d\u2060\ufeff]")
+# Any of the above, or whitespace that NFKC leaves alone (other than space, tab and newlines).
+_SPECIAL_RE = re.compile("[\u223c\u301c\uff5e\u2053\u200b\u200c\u200d\u2060\ufeff"
+                         "\x0b\x0c\x1c-\x1f\x85\u1680\u2028\u2029]")
+_DIGIT_RUN_RE = re.compile(r"\d+")
+
+# Number of posts whose normalized view is kept by normalize_post().
+NORMALIZED_CACHE_SIZE = 1024
+
+
+def normalize_text(text):
+    """
+    Normalizes post text for matching: NFKC (full-width digits, letters and
+    punctuation, NBSP and ideographic spaces become ASCII), tilde look-alikes
+    become "~", zero-width characters are removed and every whitespace run
+    (including newlines) becomes one space.
+    Text needing none of this (most posts) costs a few substring scans.
+    """
+    if not unicodedata.is_normalized("NFKC", text):
+        text = unicodedata.normalize("NFKC", text)
+    if _SPECIAL_RE.search(text):
+        text = _ZERO_WIDTH_RE.sub("", _TILDE_RE.sub("~", text))
+    elif "  " not in text and "\n" not in text and "\t" not in text and "\r" not in text:
+        return text.strip()
+    return " ".join(text.split())
+
+
+class NormalizedPost:
+    """
+    Normalized view of one post, shared by every check:
+    text (see normalize_text) and digit_spans ([start, end) offsets of every
+    digit run in text, computed on first use).
+    """
+
+    __slots__ = ("text", "_digit_spans")
+
+    def __init__(self, raw_text):
+        self.text = normalize_text(raw_text)
+        self._digit_spans = None
+
+    @property
+    def digit_spans(self):
+        if self._digit_spans is None:
+            self._digit_spans = tuple(match.span() for match in _DIGIT_RUN_RE.finditer(self.text))
+        return self._digit_spans
+
+    def __repr__(self):
+        return f"NormalizedPost({self.text!r})"
+
+
+@lru_cache(maxsize=NORMALIZED_CACHE_SIZE)
+def _normalized_post(raw_text):
+    return NormalizedPost(raw_text)
+
+
+def normalize_post(post_text):
+    """
+    Returns the NormalizedPost for post_text, building it once per distinct
+    text (recently used views are cached). A NormalizedPost is returned as is,
+    so checks can be given either the raw text or a prepared view.
+    """
+    if isinstance(post_text, NormalizedPost):
+        return post_text
+    return _normalized_post(post_text)
@@ -0,0 +1,192 @@
+"""
+Matching posts against many watches (subscriptions) at once.
+
+Each post is reduced once to its PostFeatures (intent, stay windows,
+campsites, regions; see post_analyzer.extract_post_features). Watches are
+kept in inverted indexes by date window, campsite and region, so matching a
+post only touches the watches indexed under its own windows, campsites and
+regions (plus the watches without a date or location criterion), never the
+whole registry. Radius criteria are resolved to campsites when the watch is
+added.
+"""
+from collections import defaultdict
+
+from batch_analysis import post_text_of
+from geo import CampsiteSpatialIndex
+from post_analyzer import PostFeatures, extract_post_features
+
+
+def _window(value):
+    """((start_month, start_day), (end_month, end_day)) from any nested pair of pairs (e.g. JSON lists)."""
+    (start_month, start_day), (end_month, end_day) = value
+    return ((int(start_month), int(start_day)), (int(end_month), int(end_day)))
+
+
+class Watch:
+    """
+    One subscription. A post matches when it offers a transfer (see
+    post_analyzer.check_keyword), mentions a stay equal to date_window (any
+    stay when date_window is None) and, if any location criterion is given,
+    names one of `campsites`, a campsite within max_distance_km of target
+    (lat, lon), or a campsite or region name from `regions`.
+    """
+
+    def __init__(self, watch_id, date_window=None, regions=(), campsites=(), target=None, max_distance_km=None):
+        if (target is None) != (max_distance_km is None):
+            raise ValueError(f"Watch {watch_id!r}: target and max_distance_km must be given together")
+        self.watch_id = watch_id
+        self.date_window = _window(date_window) if date_window is not None else None
+        self.regions = tuple(regions)
+        self.campsites = tuple(campsites)
+        self.target = (float(target[0]), float(target[1])) if target is not None else None
+        self.max_distance_km = max_distance_km
+
+    @classmethod
+    def from_dict(cls, config):
+        """Builds a Watch from a config dict with the constructor's keyword names."""
+        return cls(**config)
+
+    def has_location(self):
+        return bool(self.regions or self.campsites or self.target)
+
+    def _criteria(self):
+        return (self.watch_id, self.date_window, self.regions, self.campsites, self.target, self.max_distance_km)
+
+    def __eq__(self, other):
+        return isinstance(other, Watch) and self._criteria() == other._criteria()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Watch({self.watch_id!r}, date_window={self.date_window}, regions={self.regions}, " \
+               f"campsites={self.campsites}, target={self.target}, max_distance_km={self.max_distance_km})"
+
+
+class WatchRegistry:
+    """
+    Watches over one campsite database, indexed for matching. add() replaces
+    a watch with the same id; match() returns the ids of the watches a post
+    matches, in the order they were added.
+    """
+
+    def __init__(self, campsite_db, watches=()):
+        self.campsite_db = campsite_db
+        self._watches = {}                   # watch id -> Watch, in the order added
+        self._order = {}                     # watch id -> sequence number
+        self._sequence = 0
+        self._by_window = defaultdict(set)   # date window -> watch ids
+        self._any_window = set()             # watches without a date criterion
+        self._by_campsite = defaultdict(set) # campsite name -> watch ids (listed or within the radius)
+        self._by_region = defaultdict(set)   # region name -> watch ids
+        self._any_location = set()           # watches without a location criterion
+        self._indexed_campsites = {}         # watch id -> campsite names it is indexed under
+        self._spatial_index = None           # Built for the first radius watch
+        for watch in watches:
+            self.add(watch)
+
+    def __len__(self):
+        return len(self._watches)
+
+    def __contains__(self, watch_id):
+        return watch_id in self._watches
+
+    def watches(self):
+        return list(self._watches.values())
+
+    def add(self, watch):
+        if watch.watch_id in self._watches:
+            self.remove(watch.watch_id)
+        watch_id = watch.watch_id
+        self._watches[watch_id] = watch
+        self._order[watch_id] = self._sequence
+        self._sequence += 1
+
+        if watch.date_window is None:
+            self._any_window.add(watch_id)
+        else:
+            self._by_window[watch.date_window].add(watch_id)
+
+        if not watch.has_location():
+            self._any_location.add(watch_id)
+            return
+        campsites = set(watch.campsites)
+        if watch.target is not None:
+            if self._spatial_index is None:
+                self._spatial_index = CampsiteSpatialIndex(self.campsite_db, ())
+            campsites.update(name for name, _ in self._spatial_index.within(*watch.target, watch.max_distance_km))
+        for name in campsites:
+            self._by_campsite[name].add(watch_id)
+        self._indexed_campsites[watch_id] = campsites
+        for region in watch.regions:
+            self._by_region[region].add(watch_id)
+
+    def remove(self, watch_id):
+        """Removes a watch; unknown ids are ignored."""
+        watch = self._watches.pop(watch_id, None)
+        if watch is None:
+            return
+        del self._order[watch_id]
+        if watch.date_window is None:
+            self._any_window.discard(watch_id)
+        else:
+            self._discard(self._by_window, watch.date_window, watch_id)
+        self._any_location.discard(watch_id)
+        for name in self._indexed_campsites.pop(watch_id, ()):
+            self._discard(self._by_campsite, name, watch_id)
+        for region in watch.regions:
+            self._discard(self._by_region, region, watch_id)
+
+    def sync(self, watches):
+        """
+        Makes the registry hold exactly `watches`, re-indexing only the
+        watches that were added, changed or removed (unchanged watches keep
+        their place in the match order). Returns (added or changed, removed) ids.
+        """
+        wanted = {watch.watch_id: watch for watch in watches}
+        removed = [watch_id for watch_id in self._watches if watch_id not in wanted]
+        for watch_id in removed:
+            self.remove(watch_id)
+        updated = [watch_id for watch_id, watch in wanted.items() if self._watches.get(watch_id) != watch]
+        for watch_id in updated:
+            self.add(wanted[watch_id])
+        return updated, removed
+
+    @staticmethod
+    def _discard(index, key, watch_id):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(watch_id)
+            if not ids:
+                del index[key]
+
+    def extract(self, post_text):
+        """PostFeatures of a post, looking for the region names used by any watch."""
+        return extract_post_features(post_text, self.campsite_db, tuple(self._by_region))
+
+    def match(self, post):
+        """
+        Returns the ids of the watches post matches. post is a PostFeatures
+        (from extract), a scraped post dict or the post text.
+        """
+        features = post if isinstance(post, PostFeatures) else self.extract(post_text_of(post))
+        if not features.offer:
+            return []
+
+        date_candidates = set(self._any_window)
+        for window in features.date_windows:
+            date_candidates.update(self._by_window.get(window, ()))
+        if not date_candidates:
+            return []
+
+        location_candidates = set(self._any_location)
+        for name in features.campsites:
+            location_candidates.update(self._by_campsite.get(name, ()))
+        for region in features.regions:
+            location_candidates.update(self._by_region.get(region, ()))
+
+        matched = date_candidates & location_candidates
+        return sorted(matched, key=self._order.__getitem__)
+
+    def match_posts(self, posts):
+        """match() for each post, as a list aligned with posts."""
+        return [self.match(post) for post in posts]